@@ -0,0 +1,184 @@
+"""
+Training inkremental: melanjutkan model yang sudah ada dengan observasi baru dari aplikasi.
+
+Observasi ditulis aplikasi ke ../data/observations (pollucare/observations.py) sebagai file
+Parquet append-only per tanggal, dengan kolom fitur dan `AQI Category` yang sama seperti
+aqi_preprocessing. Script ini:
+    1. memuat models/air_quality_dnn_model.h5 (bobot awal, bukan inisialisasi acak),
+    2. hanya membaca file observasi yang belum tercatat di models/incremental_state.json,
+    3. mencampur observasi baru dengan sampel acak data training lama (rehearsal) agar model
+       tidak melupakan distribusi lama,
+    4. fine-tune beberapa epoch dengan learning rate kecil,
+    5. menolak menyimpan bila akurasi di split test aqi_preprocessing (split yang sama dengan
+       modelling.py) turun lebih dari --max-accuracy-drop.
+Model baru menimpa .h5 dan .npz di models/, seperti modelling.py. Jika .h5 diganti training
+penuh (hash di state berbeda), semua observasi dianggap baru lagi.
+
+    python incremental.py
+    python incremental.py --observations ../data/observations --epochs 5 --learning-rate 1e-4
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from tensorflow import keras
+
+from training import EpochTimer, FEATURES, TARGET, export_npz, load_training_data, make_dataset
+
+# Daftar file observasi dibaca dengan helper yang sama dengan penulisnya (pollucare, root repo)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pollucare.observations import list_files  # noqa: E402
+
+MODEL_PATH = os.path.join("models", "air_quality_dnn_model.h5")
+NPZ_PATH = os.path.join("models", "air_quality_dnn_model.npz")
+STATE_PATH = os.path.join("models", "incremental_state.json")
+
+# Baris observasi dengan lokasi dan waktu observasi yang sama adalah pembacaan upstream yang sama
+DEDUP_COLUMNS = ['lat', 'lon', 'observed_at']
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_state(path, model_hash):
+    """State run sebelumnya; dikosongkan bila model di disk bukan hasil run inkremental terakhir."""
+    if not os.path.exists(path):
+        return {"model_sha1": None, "trained_files": [], "runs": []}
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("model_sha1") != model_hash:
+        print("Model di disk berbeda dari hasil run inkremental terakhir; semua observasi dipakai ulang.")
+        state["trained_files"] = []
+    return state
+
+
+def save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_observations(path, files):
+    frames = [pd.read_parquet(os.path.join(path, name), columns=FEATURES + [TARGET] + DEDUP_COLUMNS)
+              for name in files]
+    observations = pd.concat(frames, ignore_index=True).drop_duplicates(DEDUP_COLUMNS)
+    return observations[FEATURES + [TARGET]].reset_index(drop=True)
+
+
+parser = argparse.ArgumentParser(description="Fine-tune model DNN AQI dengan observasi baru.")
+parser.add_argument("--observations", default=os.path.join("..", "data", "observations"))
+parser.add_argument("--epochs", type=int, default=5)
+parser.add_argument("--batch-size", type=int, default=64)
+parser.add_argument("--learning-rate", type=float, default=1e-4,
+                    help="Lebih kecil dari training penuh (0.001) agar bobot lama tidak rusak.")
+parser.add_argument("--rehearsal", type=float, default=1.0,
+                    help="Jumlah baris data training lama per baris observasi baru.")
+parser.add_argument("--min-rows", type=int, default=50, help="Observasi baru minimal sebelum fine-tune.")
+parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                    help="Batas penurunan akurasi test aqi_preprocessing; di atasnya model tidak disimpan.")
+args = parser.parse_args()
+
+if not os.path.exists(MODEL_PATH):
+    sys.exit(f"{MODEL_PATH} belum ada; jalankan training penuh (modelling.py) lebih dulu.")
+
+state = load_state(STATE_PATH, file_sha1(MODEL_PATH))
+trained = set(state["trained_files"])
+new_files = [name for name in list_files(args.observations) if name not in trained]
+if not new_files:
+    print(f"Tidak ada file observasi baru di {args.observations}.")
+    sys.exit(0)
+
+observations = load_observations(args.observations, new_files)
+print(f"{len(new_files)} file observasi baru, {len(observations)} baris unik.")
+if len(observations) < args.min_rows:
+    print(f"Kurang dari {args.min_rows} baris; fine-tune ditunda sampai observasi bertambah.")
+    sys.exit(0)
+
+# --- Data lama: split yang sama dengan modelling.py (kode kategori sudah berupa indeks kelas) ---
+df = load_training_data()
+X_train, X_test, y_train, y_test = train_test_split(
+    df[FEATURES], df[TARGET].to_numpy(), test_size=0.2, stratify=df[TARGET], random_state=42
+)
+X_test = X_test.to_numpy(dtype="float32")
+
+# Sebagian observasi baru disisihkan untuk mengukur akurasi pada data terbaru
+X_new = observations[FEATURES].to_numpy(dtype="float32")
+y_new = observations[TARGET].to_numpy()
+X_new_fit, X_new_holdout, y_new_fit, y_new_holdout = train_test_split(X_new, y_new, test_size=0.2, random_state=42)
+
+rehearsal_rows = min(len(X_train), int(round(len(X_new_fit) * args.rehearsal)))
+rehearsal = np.random.default_rng(42).choice(len(X_train), rehearsal_rows, replace=False)
+X_fit = np.concatenate([X_new_fit, X_train.to_numpy(dtype="float32")[rehearsal]])
+y_fit = np.concatenate([y_new_fit, y_train[rehearsal]])
+
+model = keras.models.load_model(MODEL_PATH, compile=False)
+model.compile(optimizer=keras.optimizers.Adam(learning_rate=args.learning_rate),
+              loss='sparse_categorical_crossentropy',
+              metrics=['accuracy'])
+_, accuracy_before = model.evaluate(X_test, y_test, batch_size=4096, verbose=0)
+_, new_accuracy_before = model.evaluate(X_new_holdout, y_new_holdout, verbose=0)
+
+mlflow.set_experiment("AQI_Classification_CI")
+with mlflow.start_run(run_name="incremental"):
+    mlflow.log_param("mode", "incremental")
+    mlflow.log_param("epochs", args.epochs)
+    mlflow.log_param("batch_size", args.batch_size)
+    mlflow.log_param("learning_rate", args.learning_rate)
+    mlflow.log_param("rehearsal", args.rehearsal)
+    mlflow.log_metric("new_files", len(new_files))
+    mlflow.log_metric("new_samples", len(observations))
+    mlflow.log_metric("rehearsal_samples", rehearsal_rows)
+
+    timer = EpochTimer(len(X_fit))
+    start_time = time.time()
+    model.fit(make_dataset(X_fit, y_fit, args.batch_size, training=True),
+              epochs=args.epochs, callbacks=[timer], verbose=2)
+    training_duration = time.time() - start_time
+
+    _, accuracy_after = model.evaluate(X_test, y_test, batch_size=4096, verbose=0)
+    _, new_accuracy_after = model.evaluate(X_new_holdout, y_new_holdout, verbose=0)
+    mlflow.log_metric("training_duration_seconds", training_duration)
+    mlflow.log_metric("test_accuracy_before", accuracy_before)
+    mlflow.log_metric("final_test_accuracy", accuracy_after)
+    mlflow.log_metric("new_holdout_accuracy_before", new_accuracy_before)
+    mlflow.log_metric("new_holdout_accuracy", new_accuracy_after)
+
+    print(f"Fine-tune {len(X_fit)} baris ({len(X_new_fit)} baru + {rehearsal_rows} rehearsal) "
+          f"dalam {training_duration:.1f} s")
+    print(f"Akurasi test aqi_preprocessing: {accuracy_before:.4f} -> {accuracy_after:.4f}")
+    print(f"Akurasi holdout observasi baru: {new_accuracy_before:.4f} -> {new_accuracy_after:.4f}")
+
+    if accuracy_before - accuracy_after > args.max_accuracy_drop:
+        mlflow.log_metric("accepted", 0)
+        sys.exit(f"Akurasi test turun lebih dari {args.max_accuracy_drop:.4f}; model tidak disimpan.")
+    mlflow.log_metric("accepted", 1)
+
+    model.save(MODEL_PATH)
+    export_npz(model, NPZ_PATH)
+    mlflow.log_artifact(NPZ_PATH)
+    print(f"Model disimpan di {MODEL_PATH} dan {NPZ_PATH}")
+
+    state["model_sha1"] = file_sha1(MODEL_PATH)
+    state["trained_files"] = sorted(trained | set(new_files))
+    state["runs"].append({
+        "finished_at": int(time.time()),
+        "new_files": len(new_files),
+        "new_samples": len(observations),
+        "training_seconds": round(training_duration, 2),
+        "test_accuracy_before": round(float(accuracy_before), 4),
+        "test_accuracy_after": round(float(accuracy_after), 4),
+    })
+    save_state(STATE_PATH, state)
@@ -1,33 +1,76 @@
+import argparse
 import mlflow
-import pandas as pd
-import numpy as np
 import os
+import sys
 import time
 import tensorflow as tf
 from tensorflow import keras
-from tensorflow.keras import layers
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-from sklearn.preprocessing import LabelEncoder
+
+from training import (
+    EpochTimer, FEATURES, TARGET, build_model, export_npz, export_tflite, load_training_data, make_dataset,
+    prune_model
+)
+
+# Daftar kategori diambil dari pollucare (root repo), sumber yang sama dengan aplikasi
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pollucare.constants import AQI_CATEGORY_MAP  # noqa: E402
+
+# --- Training Options ---
+# Mode "legacy" sama dengan training awal (DataFrame langsung ke model.fit, jumlah epoch tetap).
+# Mode "tfdata" memakai pipeline tf.data (cache, shuffle, map paralel, prefetch), early stopping
+# dengan pemulihan bobot terbaik, checkpoint, dan opsi batch besar dengan skala learning rate.
+parser = argparse.ArgumentParser(description="Training model DNN klasifikasi AQI.")
+parser.add_argument("--pipeline", choices=["legacy", "tfdata"], default="legacy")
+parser.add_argument("--epochs", type=int, default=50)
+parser.add_argument("--batch-size", type=int, default=64)
+parser.add_argument("--learning-rate", type=float, default=0.001, help="Learning rate Adam untuk batch 64.")
+parser.add_argument("--lr-scaling", choices=["none", "linear"], default="none",
+                    help="linear: learning rate dikali batch_size / 64 untuk training batch besar.")
+parser.add_argument("--patience", type=int, default=5, help="Epoch tanpa perbaikan val_loss sebelum berhenti (tfdata).")
+parser.add_argument("--shuffle-buffer", type=int, default=10000)
+parser.add_argument("--intra-op-threads", type=int, default=0, help="0 = biarkan TensorFlow memilih.")
+parser.add_argument("--inter-op-threads", type=int, default=0, help="0 = biarkan TensorFlow memilih.")
+parser.add_argument("--precision", choices=["float32", "mixed_bfloat16", "mixed_float16"], default="float32",
+                    help="mixed_bfloat16 hanya menguntungkan di CPU dengan dukungan bf16 (mis. AVX512-BF16/AMX).")
+parser.add_argument("--checkpoint-dir", default="checkpoints")
+parser.add_argument("--export", default="",
+                    help="Artefak serving tambahan, dipisah koma: tflite_int8, tflite_float16, pruned.")
+parser.add_argument("--prune-sparsity", type=float, default=0.5, help="Bagian bobot Dense yang dipangkas (pruned).")
+args = parser.parse_args()
+
+EXPORT_CHOICES = {"tflite_int8", "tflite_float16", "pruned"}
+exports = [name.strip() for name in args.export.split(",") if name.strip() not in ("", "none")]
+if set(exports) - EXPORT_CHOICES:
+    parser.error(f"--export hanya mendukung: {', '.join(sorted(EXPORT_CHOICES))}")
+
+BASE_BATCH_SIZE = 64
+
+# Konfigurasi thread harus diatur sebelum operasi TensorFlow pertama dijalankan
+if args.intra_op_threads:
+    tf.config.threading.set_intra_op_parallelism_threads(args.intra_op_threads)
+if args.inter_op_threads:
+    tf.config.threading.set_inter_op_parallelism_threads(args.inter_op_threads)
+if args.precision != "float32":
+    keras.mixed_precision.set_global_policy(args.precision)
 
 # --- MLflow Setup ---
 mlflow.set_experiment("AQI_Classification_CI")
 
 # --- Data Loading and Preparation ---
-df = pd.read_csv("aqi_preprocessing.csv")
-features = ['CO AQI Value', 'Ozone AQI Value', 'NO2 AQI Value', 'PM2.5 AQI Value']
-target = 'AQI Category'
+features = FEATURES
+target = TARGET
 
-X = df[features]
-y = df[target]
+df = load_training_data()
 
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
-num_classes = len(label_encoder.classes_)
-print(f"Jumlah kategori AQI unik: {num_classes}")
+X = df[features]
+# Kolom target sudah berupa kode kelas AQI_CATEGORY_MAP (0..5), langsung dipakai sebagai label
+y = df[target].to_numpy()
+num_classes = len(AQI_CATEGORY_MAP)
+print(f"Jumlah kategori AQI: {num_classes}")
 
 X_train, X_test, y_train, y_test = train_test_split(
-    X, y_encoded, test_size=0.2, stratify=y_encoded, random_state=42
+    X, y, test_size=0.2, stratify=y, random_state=42
 )
 
 # --- MLflow Logging: Dataset Metrics ---
@@ -50,35 +93,61 @@ with mlflow.start_run(nested=True): # <--- ADDED nested=True HERE
     mlflow.log_param("output_layer_units", num_classes)
     mlflow.log_param("activation_output", "softmax")
 
-    epochs = 50
-    batch_size = 64
+    epochs = args.epochs
+    batch_size = args.batch_size
+    learning_rate = args.learning_rate * (batch_size / BASE_BATCH_SIZE if args.lr_scaling == "linear" else 1.0)
     mlflow.log_param("epochs", epochs)
     mlflow.log_param("batch_size", batch_size)
+    mlflow.log_param("learning_rate", learning_rate)
+    mlflow.log_param("pipeline", args.pipeline)
+    mlflow.log_param("precision", args.precision)
+    mlflow.log_param("intra_op_threads", args.intra_op_threads)
+    mlflow.log_param("inter_op_threads", args.inter_op_threads)
 
-    model = keras.Sequential([
-        layers.Dense(64, activation='relu', input_shape=(X_train.shape[1],)),
-        layers.Dropout(0.2),
-        layers.Dense(32, activation='relu'),
-        layers.Dropout(0.2),
-        layers.Dense(num_classes, activation='softmax')
-    ])
-
-    model.compile(optimizer='adam',
-                  loss='sparse_categorical_crossentropy',
-                  metrics=['accuracy'])
+    model = build_model(X_train.shape[1], num_classes, units_1=64, units_2=32, dropout=0.2,
+                        learning_rate=learning_rate)
 
     print(model.summary())
 
-    start_time = time.time()
-    history = model.fit(X_train, y_train,
-                        epochs=epochs,
-                        batch_size=batch_size,
-                        validation_data=(X_test, y_test),
-                        verbose=1)
+    if args.pipeline == "tfdata":
+        # Early stopping memantau validasi dari data train, sehingga data test tetap tidak terlihat
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=0.1, stratify=y_train, random_state=42
+        )
+        timer = EpochTimer(len(X_fit))
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+        callbacks = [
+            timer,
+            keras.callbacks.EarlyStopping(monitor="val_loss", patience=args.patience, restore_best_weights=True),
+            keras.callbacks.ModelCheckpoint(
+                os.path.join(args.checkpoint_dir, "best.weights.h5"),
+                monitor="val_loss", save_best_only=True, save_weights_only=True
+            ),
+        ]
+        train_data = make_dataset(X_fit.to_numpy(), y_fit, batch_size, training=True,
+                                  shuffle_buffer=args.shuffle_buffer)
+        validation_data = make_dataset(X_val.to_numpy(), y_val, batch_size, training=False)
+        start_time = time.time()
+        history = model.fit(train_data,
+                            epochs=epochs,
+                            validation_data=validation_data,
+                            callbacks=callbacks,
+                            verbose=2)
+    else:
+        timer = EpochTimer(len(X_train))
+        start_time = time.time()
+        history = model.fit(X_train.astype("float32"), y_train,
+                            epochs=epochs,
+                            batch_size=batch_size,
+                            validation_data=(X_test.astype("float32"), y_test),
+                            callbacks=[timer],
+                            verbose=1)
     training_duration = time.time() - start_time
     mlflow.log_metric("training_duration_seconds", training_duration)
+    mlflow.log_metric("epochs_trained", len(timer.epoch_seconds))
+    mlflow.log_metric("mean_samples_per_second", timer.num_samples * len(timer.epoch_seconds) / sum(timer.epoch_seconds))
 
-    loss, accuracy = model.evaluate(X_test, y_test, verbose=0)
+    loss, accuracy = model.evaluate(X_test.astype("float32"), y_test, verbose=0)
     print(f"Test Accuracy: {accuracy:.4f}")
     print(f"Test Loss: {loss:.4f}")
 
@@ -93,4 +162,35 @@ with mlflow.start_run(nested=True): # <--- ADDED nested=True HERE
     model.save(model_save_path)
     print(f"Model TensorFlow disimpan secara lokal di: {model_save_path}")
 
+    # Ekspor bobot Dense ke .npz agar aplikasi bisa inferensi dengan NumPy tanpa TensorFlow
+    # (format dibaca oleh pollucare.inference.NumpyDNN.from_npz; Dropout tidak ikut diekspor)
+    npz_save_path = os.path.join("models", "air_quality_dnn_model.npz")
+    export_npz(model, npz_save_path)
+    mlflow.log_artifact(npz_save_path)
+    print(f"Bobot model untuk inferensi NumPy disimpan di: {npz_save_path}")
+
+    # --- Artefak serving tambahan (opsional), dimuat aplikasi lewat pollucare.inference.load_model ---
+    # Data kalibrasi int8 diambil dari baris training aqi_preprocessing
+    representative = X_train.sample(min(500, len(X_train)), random_state=42).to_numpy(dtype="float32")
+    for quantization in ("int8", "float16"):
+        if f"tflite_{quantization}" in exports:
+            tflite_path = os.path.join("models", f"air_quality_dnn_model_{quantization}.tflite")
+            export_tflite(model, tflite_path, quantization, representative)
+            mlflow.log_artifact(tflite_path)
+            mlflow.log_metric(f"tflite_{quantization}_size_bytes", os.path.getsize(tflite_path))
+            print(f"Model TFLite {quantization} disimpan di: {tflite_path}")
+
+    if "pruned" in exports:
+        pruned_model = prune_model(
+            model, args.prune_sparsity,
+            make_dataset(X_train.to_numpy(), y_train, batch_size, training=True), validation_data=None
+        )
+        _, pruned_accuracy = pruned_model.evaluate(X_test.astype("float32"), y_test, verbose=0)
+        pruned_path = os.path.join("models", "air_quality_dnn_model_pruned.npz")
+        export_npz(pruned_model, pruned_path)
+        mlflow.log_param("prune_sparsity", args.prune_sparsity)
+        mlflow.log_metric("pruned_test_accuracy", pruned_accuracy)
+        mlflow.log_artifact(pruned_path)
+        print(f"Model pruned ({args.prune_sparsity:.0%} bobot nol, akurasi test {pruned_accuracy:.4f}) disimpan di: {pruned_path}")
+
 print("\nEksperimen selesai. Periksa UI MLflow untuk detail lebih lanjut.")
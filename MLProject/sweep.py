@@ -0,0 +1,306 @@
+"""
+Pencarian hyperparameter paralel untuk model DNN klasifikasi AQI.
+
+Grid atau successive halving atas lebar layer, dropout, batch size dan learning rate. Setiap trial
+dilatih di proses terpisah (jumlah proses mengikuti jumlah core) dan mencatat nested run MLflow di
+bawah run sweep. Trial dipangkas lebih awal bila val_loss-nya lebih buruk dari median trial lain
+pada epoch yang sama. Model terbaik diekspor ke models/ bersama tabel latensi vs akurasi, sehingga
+bisa dipilih model termurah yang masih memenuhi batas akurasi (--accuracy-bar).
+
+    python sweep.py --strategy halving
+    python sweep.py --strategy grid --max-epochs 30 --accuracy-bar 0.95
+"""
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mlflow
+import numpy as np
+import pandas as pd
+
+# Latensi diukur dengan NumpyDNN dari pollucare (root repo), jalur inferensi yang sama dengan aplikasi
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pollucare.constants import AQI_CATEGORY_MAP  # noqa: E402
+from pollucare.inference import NumpyDNN  # noqa: E402
+
+SEARCH_SPACE = {
+    'units_1': [32, 64, 128],
+    'units_2': [16, 32],
+    'dropout': [0.0, 0.2],
+    'batch_size': [64, 256],
+    'learning_rate': [0.001, 0.003],
+}
+
+# Trial baru bisa dipangkas setelah epoch ini dan bila sudah ada cukup pembanding di epoch yang sama
+PRUNE_WARMUP_EPOCHS = 3
+PRUNE_MIN_TRIALS = 3
+
+TABLE_COLUMNS = [
+    'trial', *SEARCH_SPACE, 'params', 'epochs', 'val_loss', 'val_accuracy', 'test_accuracy', 'latency_us', 'pruned'
+]
+
+_splits = None
+
+
+def grid(space):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def halving_rungs(min_epochs, max_epochs, eta):
+    """Total epoch setiap rung, mis. (5, 50, 3) -> [5, 15, 50]."""
+    rungs = [min_epochs]
+    while rungs[-1] * eta < max_epochs:
+        rungs.append(rungs[-1] * eta)
+    if max_epochs - rungs[-1] < rungs[-1]:
+        rungs[-1] = max_epochs
+    else:
+        rungs.append(max_epochs)
+    return rungs
+
+
+def init_worker(tracking_uri, intra_op_threads):
+    # Tanpa ini, run anak akan melanjutkan run induk yang diwariskan `mlflow run` lewat environment
+    os.environ.pop("MLFLOW_RUN_ID", None)
+    mlflow.set_tracking_uri(tracking_uri)
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def load_splits():
+    """Split train/validasi/test yang sama dengan modelling.py (mode tfdata), dimuat sekali per proses."""
+    global _splits
+    if _splits is None:
+        from sklearn.model_selection import train_test_split
+
+        from training import FEATURES, TARGET, load_training_data
+
+        df = load_training_data()
+        y = df[TARGET].to_numpy()
+        X_train, X_test, y_train, y_test = train_test_split(
+            df[FEATURES].to_numpy(), y, test_size=0.2, stratify=y, random_state=42
+        )
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=0.1, stratify=y_train, random_state=42
+        )
+        _splits = (X_fit, y_fit, X_val, y_val, X_test.astype("float32"), y_test, len(AQI_CATEGORY_MAP))
+    return _splits
+
+
+def single_row_latency_us(npz_path, repeats=2000):
+    """Median latensi prediksi satu baris dengan NumpyDNN (pollucare.inference), dalam mikrodetik."""
+    model = NumpyDNN.from_npz(npz_path)
+    row = np.zeros((1, model.num_features), dtype=np.float32)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
+
+
+def make_pruner(trial, history, lock, enabled):
+    from tensorflow import keras
+
+    class ValidationPruner(keras.callbacks.Callback):
+        """Mencatat val_loss per epoch ke MLflow dan menghentikan trial yang lebih buruk dari median."""
+
+        def __init__(self):
+            super().__init__()
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            val_loss = logs["val_loss"]
+            mlflow.log_metric("val_loss", val_loss, step=epoch)
+            mlflow.log_metric("val_accuracy", logs["val_accuracy"], step=epoch)
+            if not enabled:
+                return
+            with lock:
+                others = [loss for other, loss in history.get(epoch, []) if other != trial]
+                history[epoch] = history.get(epoch, []) + [(trial, val_loss)]
+            if epoch + 1 >= PRUNE_WARMUP_EPOCHS and len(others) >= PRUNE_MIN_TRIALS and val_loss > np.median(others):
+                self.pruned = True
+                self.model.stop_training = True
+
+    return ValidationPruner()
+
+
+def run_trial(task):
+    """
+    Melatih satu trial sampai `task['epochs']` total epoch (melanjutkan model rung sebelumnya bila ada).
+    Returns:
+        dict: Konfigurasi, metrik validasi/test, latensi dan status pruning trial.
+    """
+    from tensorflow import keras
+
+    from training import EpochTimer, build_model, export_npz, make_dataset
+
+    X_fit, y_fit, X_val, y_val, X_test, y_test, num_classes = load_splits()
+    config = task['config']
+    model_path = os.path.join(task['workdir'], f"trial_{task['trial']}.keras")
+    if task['initial_epoch']:
+        model = keras.models.load_model(model_path)
+    else:
+        model = build_model(X_fit.shape[1], num_classes, units_1=config['units_1'], units_2=config['units_2'],
+                            dropout=config['dropout'], learning_rate=config['learning_rate'])
+
+    run_kwargs = {"run_id": task['run_id']} if task['run_id'] else {
+        "experiment_id": task['experiment_id'],
+        "run_name": f"trial-{task['trial']}",
+        "tags": {"mlflow.parentRunId": task['parent_run_id']},
+    }
+    with mlflow.start_run(**run_kwargs) as run:
+        if not task['run_id']:
+            mlflow.log_params(config)
+        timer = EpochTimer(len(X_fit))
+        # Median pruning hanya di rung pertama; rung berikutnya sudah diseleksi oleh successive halving
+        pruner = make_pruner(task['trial'], task['history'], task['lock'], enabled=not task['initial_epoch'])
+        callbacks = [
+            timer, pruner, keras.callbacks.EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True)
+        ]
+        history = model.fit(
+            make_dataset(X_fit, y_fit, config['batch_size'], training=True),
+            validation_data=make_dataset(X_val, y_val, config['batch_size'], training=False),
+            epochs=task['epochs'],
+            initial_epoch=task['initial_epoch'],
+            callbacks=callbacks,
+            verbose=0,
+        )
+        model.save(model_path)
+        export_npz(model, model_path.replace(".keras", ".npz"))
+
+        best = int(np.argmin(history.history["val_loss"]))
+        _, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+        result = {
+            'trial': task['trial'],
+            **config,
+            'params': model.count_params(),
+            'epochs': task['initial_epoch'] + len(history.history["val_loss"]),
+            'val_loss': float(history.history["val_loss"][best]),
+            'val_accuracy': float(history.history["val_accuracy"][best]),
+            'test_accuracy': float(test_accuracy),
+            'pruned': pruner.pruned,
+            'run_id': run.info.run_id,
+        }
+        mlflow.log_metrics({key: result[key] for key in ('params', 'test_accuracy')})
+        mlflow.set_tag("pruned", str(pruner.pruned).lower())
+    return result
+
+
+def run_rung(executor, tasks):
+    return list(executor.map(run_trial, tasks))
+
+
+def select_best(table, accuracy_bar):
+    """Model termurah (latensi) dengan val_accuracy >= batas; tanpa batas, model dengan val_loss terendah."""
+    candidates = table[~table['pruned']]
+    if accuracy_bar:
+        passing = candidates[candidates['val_accuracy'] >= accuracy_bar]
+        if len(passing):
+            return passing.sort_values(['latency_us', 'params']).iloc[0]
+        print(f"Tidak ada trial dengan val_accuracy >= {accuracy_bar}; memakai val_loss terendah.")
+    return candidates.sort_values('val_loss').iloc[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pencarian hyperparameter paralel untuk model DNN AQI.")
+    parser.add_argument("--strategy", choices=["grid", "halving"], default="halving")
+    parser.add_argument("--workers", type=int, default=0, help="Jumlah proses; 0 = jumlah core.")
+    parser.add_argument("--max-epochs", type=int, default=50)
+    parser.add_argument("--min-epochs", type=int, default=5, help="Epoch rung pertama (halving).")
+    parser.add_argument("--eta", type=int, default=3, help="Faktor reduksi per rung (halving).")
+    parser.add_argument("--accuracy-bar", type=float, default=0.0, help="Batas val_accuracy; 0 = tanpa batas.")
+    parser.add_argument("--promote", action="store_true",
+                        help="Juga timpa models/air_quality_dnn_model.h5/.npz dengan model terbaik.")
+    parser.add_argument("--experiment", default="AQI_Classification_CI")
+    parser.add_argument("--tracking-uri", default=os.environ.get("MLFLOW_TRACKING_URI") or "file:./mlruns")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    configs = grid(SEARCH_SPACE)
+    rungs = [args.max_epochs] if args.strategy == "grid" else halving_rungs(args.min_epochs, args.max_epochs, args.eta)
+    print(f"{len(configs)} konfigurasi, rung epoch {rungs}, {workers} proses")
+
+    # File store lokal aman ditulis banyak proses sekaligus (satu direktori per run); MLflow 3.x
+    # menolaknya tanpa opt-in ini. Variabel lingkungan ikut diwariskan ke proses trial.
+    os.environ.setdefault("MLFLOW_ALLOW_FILE_STORE", "true")
+    mlflow.set_tracking_uri(args.tracking_uri)
+    mlflow.set_experiment(args.experiment)
+    workdir = tempfile.mkdtemp(prefix="aqi-sweep-")
+    context = multiprocessing.get_context("spawn")  # TensorFlow tidak aman di-fork
+    try:
+        with mlflow.start_run(run_name=f"sweep-{args.strategy}") as parent, context.Manager() as manager:
+            mlflow.log_params({"strategy": args.strategy, "workers": workers, "rungs": rungs, "trials": len(configs)})
+            history, lock = manager.dict(), manager.Lock()
+            results = {}
+            active = list(range(len(configs)))
+            start = time.time()
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=context, initializer=init_worker,
+                initargs=(args.tracking_uri, max(1, (os.cpu_count() or 1) // workers))
+            ) as executor:
+                previous = 0
+                for level, epochs in enumerate(rungs):
+                    tasks = [{
+                        'trial': trial, 'config': configs[trial], 'epochs': epochs, 'initial_epoch': previous,
+                        'run_id': results[trial]['run_id'] if trial in results else None,
+                        'parent_run_id': parent.info.run_id, 'experiment_id': parent.info.experiment_id,
+                        'workdir': workdir, 'history': history, 'lock': lock,
+                    } for trial in active]
+                    for result in run_rung(executor, tasks):
+                        results[result['trial']] = result
+                    survivors = sorted(
+                        (trial for trial in active if not results[trial]['pruned']),
+                        key=lambda trial: results[trial]['val_loss']
+                    )
+                    if level < len(rungs) - 1:
+                        survivors = survivors[:max(1, math.ceil(len(active) / args.eta))]
+                    print(f"Rung {level} ({epochs} epoch): {len(survivors)} dari {len(active)} trial lanjut")
+                    active, previous = survivors, epochs
+            mlflow.log_metric("sweep_duration_seconds", time.time() - start)
+
+            # Latensi diukur berurutan setelah pool selesai agar tidak terganggu trial lain yang sedang training
+            client = mlflow.tracking.MlflowClient()
+            for trial, result in results.items():
+                result['latency_us'] = single_row_latency_us(os.path.join(workdir, f"trial_{trial}.npz"))
+                client.log_metric(result['run_id'], "latency_us", result['latency_us'])
+
+            table = pd.DataFrame(list(results.values()))[TABLE_COLUMNS].sort_values('latency_us')
+            best = select_best(table, args.accuracy_bar)
+            print(table.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+            print(f"\nModel terpilih: trial {best['trial']} (val_accuracy {best['val_accuracy']:.4f}, "
+                  f"test_accuracy {best['test_accuracy']:.4f}, {best['latency_us']:.1f} µs/baris)")
+
+            from tensorflow import keras
+
+            from training import export_npz
+
+            os.makedirs("models", exist_ok=True)
+            table_path = os.path.join("models", "sweep_results.csv")
+            table.to_csv(table_path, index=False)
+            model = keras.models.load_model(os.path.join(workdir, f"trial_{best['trial']}.keras"))
+            names = ["sweep_best_model"] + (["air_quality_dnn_model"] if args.promote else [])
+            for name in names:
+                model.save(os.path.join("models", f"{name}.h5"))
+                export_npz(model, os.path.join("models", f"{name}.npz"))
+            mlflow.log_params({f"best_{key}": best[key] for key in SEARCH_SPACE})
+            mlflow.log_metrics({"best_val_accuracy": best['val_accuracy'], "best_test_accuracy": best['test_accuracy'],
+                                "best_latency_us": best['latency_us']})
+            mlflow.log_artifact(table_path)
+            mlflow.log_artifact(os.path.join("models", "sweep_best_model.npz"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
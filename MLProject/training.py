@@ -0,0 +1,151 @@
+"""
+Komponen training yang dipakai bersama oleh modelling.py (satu run) dan sweep.py (pencarian hyperparameter).
+"""
+import os
+import sys
+import time
+
+import mlflow
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+# Daftar fitur dan format .npz diambil dari pollucare (root repo) agar sama dengan jalur inferensi aplikasi
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pollucare.constants import FEATURES_USED_IN_TRAINING  # noqa: E402
+from pollucare.inference import NumpyDNN  # noqa: E402
+
+FEATURES = FEATURES_USED_IN_TRAINING
+TARGET = 'AQI Category'
+
+
+def load_training_data():
+    """
+    Dataset dihasilkan oleh `python -m pollucare.preprocessing`; Parquet dibaca lewat memory map
+    dan hanya kolom yang dipakai. CSV lama tetap didukung sebagai cadangan.
+    """
+    if os.path.exists("aqi_preprocessing.parquet"):
+        return pd.read_parquet("aqi_preprocessing.parquet", columns=FEATURES + [TARGET], memory_map=True)
+    return pd.read_csv(
+        "aqi_preprocessing.csv", usecols=FEATURES + [TARGET],
+        dtype={**{feature: "int16" for feature in FEATURES}, TARGET: "int8"}
+    )
+
+
+def build_model(num_features, num_classes, units_1=64, units_2=32, dropout=0.2, learning_rate=0.001):
+    model = keras.Sequential([
+        layers.Dense(units_1, activation='relu', input_shape=(num_features,)),
+        layers.Dropout(dropout),
+        layers.Dense(units_2, activation='relu'),
+        layers.Dropout(dropout),
+        # Output tetap float32 agar softmax stabil saat mixed precision
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss='sparse_categorical_crossentropy',
+                  metrics=['accuracy'])
+    return model
+
+
+def make_dataset(features_array, labels, batch_size, training, shuffle_buffer=10000):
+    """
+    Pipeline tf.data: data disimpan dalam dtype ringkas lalu di-cache, batch dibentuk lebih dulu
+    sehingga konversi ke float32 berjalan per batch secara paralel, dan batch berikutnya disiapkan
+    selagi batch sekarang dilatih.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices((features_array, labels)).cache()
+    if training:
+        dataset = dataset.shuffle(shuffle_buffer, seed=42, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(
+        lambda x, y: (tf.cast(x, tf.float32), y),
+        num_parallel_calls=tf.data.AUTOTUNE, deterministic=not training
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class EpochTimer(keras.callbacks.Callback):
+    """Mencatat waktu per epoch dan throughput (sampel/detik) ke MLflow."""
+
+    def __init__(self, num_samples):
+        super().__init__()
+        self.num_samples = num_samples
+        self.epoch_seconds = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        self.epoch_seconds.append(elapsed)
+        mlflow.log_metric("epoch_seconds", elapsed, step=epoch)
+        mlflow.log_metric("samples_per_second", self.num_samples / elapsed, step=epoch)
+
+
+def export_npz(model, path):
+    """Menyimpan bobot Dense model Keras ke .npz dengan NumpyDNN.save_npz, format yang dimuat aplikasi."""
+    NumpyDNN.from_keras(model).save_npz(path)
+
+
+def export_tflite(model, path, quantization, representative_features):
+    """
+    Mengonversi model ke TFLite.
+    quantization "float16": bobot disimpan float16. "int8": bobot dan aktivasi int8 dengan rentang
+    dikalibrasi dari `representative_features` (contoh baris dari dataset training); input dan
+    output tetap float32 sehingga pemanggil tidak perlu tahu skala kuantisasinya.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        def representative_dataset():
+            for row in np.asarray(representative_features, dtype=np.float32):
+                yield [row.reshape(1, -1)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Kuantisasi '{quantization}' tidak dikenal.")
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+
+class KeepPruned(keras.callbacks.Callback):
+    """Mengembalikan bobot yang sudah dipangkas ke nol setelah setiap batch fine-tuning."""
+
+    def __init__(self, masks):
+        super().__init__()
+        self.masks = masks
+
+    def on_train_batch_end(self, batch, logs=None):
+        for layer, mask in self.masks:
+            layer.kernel.assign(layer.kernel * mask)
+
+
+def prune_model(model, sparsity, train_data, validation_data, epochs=10):
+    """
+    Magnitude pruning: `sparsity` bagian kernel Dense tersembunyi dengan nilai absolut terkecil
+    dijadikan nol, lalu model di-fine-tune beberapa epoch dengan mask tetap agar akurasinya pulih.
+    Layer Dense pertama dan output tidak dipangkas: input tidak dinormalisasi sehingga besar bobotnya
+    tidak mencerminkan pentingnya, dan keduanya hanya sebagian kecil dari jumlah parameter.
+    Model asli tidak diubah.
+    """
+    pruned = keras.models.clone_model(model)
+    pruned.set_weights(model.get_weights())
+    pruned.compile(optimizer=keras.optimizers.Adam(learning_rate=1e-3),
+                   loss='sparse_categorical_crossentropy',
+                   metrics=['accuracy'])
+    masks = []
+    dense_layers = [layer for layer in pruned.layers if isinstance(layer, layers.Dense)]
+    for layer in dense_layers[1:-1]:
+        kernel = layer.kernel.numpy()
+        threshold = np.quantile(np.abs(kernel), sparsity)
+        mask = (np.abs(kernel) > threshold).astype(kernel.dtype)
+        layer.kernel.assign(kernel * mask)
+        masks.append((layer, tf.constant(mask)))
+    pruned.fit(train_data, epochs=epochs, validation_data=validation_data,
+               callbacks=[KeepPruned(masks)], verbose=0)
+    return pruned
@@ -0,0 +1 @@
+"""PolluCare: modul pendukung untuk prediksi kualitas udara dan saran kesehatan."""
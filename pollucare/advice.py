@@ -0,0 +1,189 @@
+"""
+Pembuatan saran kesehatan dengan Gemini secara streaming, dengan cache berbasis input prompt.
+
+Key cache dibentuk dari kategori AQI, level polutan yang sudah dibulatkan (2 angka penting),
+nama kota dan profil pengguna yang dinormalisasi. Nilai polutan di prompt memakai pembulatan
+yang sama, sehingga saran yang diambil dari cache tetap sesuai dengan input yang menghasilkannya.
+Cache memakai tier persisten (pollucare/cache.py) sehingga TTL dan batas LRU-nya ikut berlaku.
+
+Model cukup berupa objek dengan `generate_content(prompt, stream=True, request_options=...)`
+yang mengembalikan iterable potongan ber-atribut `text`, sehingga mudah diganti stub lokal.
+"""
+import queue
+import threading
+
+from pollucare.cache import get_cache
+
+ADVICE_CACHE_TTL = 6 * 3600
+
+_STREAM_END = object()
+
+POLLUTANT_KEYS = ('CO', 'Ozone', 'NO2', 'PM25')
+
+
+def bucket_value(value):
+    """Membulatkan ke 2 angka penting (mis. 287.4 -> 290.0, 35.2 -> 35.0)."""
+    try:
+        return float(f"{float(value):.2g}")
+    except (TypeError, ValueError):
+        return 'N/A'
+
+
+def bucket_pollutants(pollutant_values):
+    return {key: bucket_value(pollutant_values.get(key, 'N/A')) for key in POLLUTANT_KEYS}
+
+
+def _normalize_text(value):
+    return " ".join(str(value).casefold().split())
+
+
+def _normalize_list(value):
+    items = [_normalize_text(item) for item in str(value).split(",")]
+    return ", ".join(sorted(item for item in items if item))
+
+
+def normalize_profile(user_info):
+    user_info = user_info or {}
+    return (
+        str(user_info.get('age', 'N/A')).strip(),
+        _normalize_list(user_info.get('medical_condition', 'Tidak ada')),
+        _normalize_list(user_info.get('activity_preference', 'Tidak disebutkan')),
+    )
+
+
+def has_profile(user_info):
+    return bool(user_info) and (
+        user_info.get('medical_condition', 'Tidak ada') != 'Tidak ada'
+        or user_info.get('activity_preference', 'Tidak disebutkan') != 'Tidak disebutkan'
+    )
+
+
+def advice_cache_args(aqi_category, pollutant_values, city_name, user_info):
+    buckets = bucket_pollutants(pollutant_values)
+    profile = normalize_profile(user_info) if has_profile(user_info) else None
+    return (aqi_category, tuple(buckets[key] for key in POLLUTANT_KEYS), _normalize_text(city_name), profile)
+
+
+def build_prompt(aqi_category, pollutant_values, city_name_param, user_info=None):
+    pollutant_values = bucket_pollutants(pollutant_values)
+    prompt = f"""
+    Sebagai tenaga medis dan ahli kualitas udara, berikan saran tindakan dan rekomendasi spesifik yang ringkas, persuasif, dan mudah dipahami.
+    Fokuslah pada tindakan yang dibutuhkan berdasarkan kondisi kualitas udara dan polutan, serta profil pengguna.
+
+    Saran harus disajikan sebagai satu paragraf yang mengalir, tidak poin-poin panjang, dan gunakan bahasa yang hangat serta peduli,
+    seperti seorang tenaga medis yang berbicara kepada pasien. Jangan lupa menyapa terlebih dahulu dengan panggilan Bapak/Ibu.
+
+    Gunakan data berikut untuk menghasilkan saran:
+    - Kota: {city_name_param}
+    - Prediksi Kategori Kualitas Udara (AQI): {aqi_category}
+    - Konsentrasi polutan saat ini (berikan nilai dalam µg/m³):
+        - Karbon Monoksida (CO): {pollutant_values.get('CO', 'N/A')} µg/m³
+        - Ozon (O3): {pollutant_values.get('Ozone', 'N/A')} µg/m³
+        - Nitrogen Dioksida (NO2): {pollutant_values.get('NO2', 'N/A')} µg/m³
+        - Partikulat (PM2.5): {pollutant_values.get('PM25', 'N/A')} µg/m³
+    """
+
+    if has_profile(user_info):
+        prompt += f"""
+    Informasi tambahan tentang pengguna:
+    - Usia: {user_info.get('age', 'N/A')} tahun
+    - Kondisi medis: {user_info.get('medical_condition', 'Tidak ada')}
+    - Kebiasaan: {user_info.get('activity_preference', 'Tidak disebutkan')}
+    """
+    return prompt
+
+
+def extract_text(response):
+    """Teks dari respon/potongan Gemini, atau string kosong jika tidak ada bagian teks."""
+    try:
+        if hasattr(response, 'text') and response.text:
+            return response.text
+    except ValueError:
+        # `text` melempar ValueError jika respon tidak punya bagian teks (mis. diblokir filter)
+        pass
+    for part in getattr(response, 'parts', None) or []:
+        if hasattr(part, 'text') and part.text:
+            return part.text
+    return ""
+
+
+def get_cached_advice(aqi_category, pollutant_values, city_name, user_info=None):
+    cache = get_cache()
+    if cache is None:
+        return None
+    args = advice_cache_args(aqi_category, pollutant_values, city_name, user_info)
+    return cache.get("health_advice", args, {}, ADVICE_CACHE_TTL)
+
+
+def stream_health_advice(model, aqi_category, pollutant_values, city_name, user_info=None, timeout=60):
+    """
+    Menghasilkan potongan teks saran secara bertahap.
+    Jika saran untuk input yang setara sudah ada di cache, seluruh teks dikembalikan sekaligus
+    tanpa memanggil model. Teks lengkap disimpan ke cache setelah streaming selesai.
+    """
+    cached_text = get_cached_advice(aqi_category, pollutant_values, city_name, user_info)
+    if cached_text:
+        yield cached_text
+        return
+
+    prompt = build_prompt(aqi_category, pollutant_values, city_name, user_info)
+    response = model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+    chunks = []
+    for chunk in response:
+        text = extract_text(chunk)
+        if text:
+            chunks.append(text)
+            yield text
+
+    cache = get_cache()
+    if chunks and cache is not None:
+        args = advice_cache_args(aqi_category, pollutant_values, city_name, user_info)
+        cache.put("health_advice", args, {}, "".join(chunks), ADVICE_CACHE_TTL)
+
+
+def hedged_stream(primary, fallback, budget):
+    """
+    Meneruskan potongan teks dari `primary()` bila potongan pertama datang dalam `budget` detik.
+    Jika tidak, atau primary selesai tanpa teks, hasil `fallback()` yang dikembalikan. Stream primary
+    yang terlambat tetap dihabiskan di background agar hasilnya masuk cache untuk request berikutnya.
+    Exception dari primary sebelum potongan pertama dilempar ulang ke pemanggil.
+    """
+    first = queue.Queue(maxsize=1)
+    lock = threading.Lock()
+    state = {'abandoned': False}
+    stream = primary()
+
+    def pull_first():
+        try:
+            item = (next(stream, _STREAM_END), None)
+        except Exception as e:
+            item = (None, e)
+        with lock:
+            abandoned = state['abandoned']
+            if not abandoned:
+                first.put(item)
+        if abandoned and item[1] is None and item[0] is not _STREAM_END:
+            try:
+                for _ in stream:
+                    pass
+            except Exception:
+                pass
+
+    threading.Thread(target=pull_first, daemon=True).start()
+    try:
+        chunk, error = first.get(timeout=budget)
+    except queue.Empty:
+        with lock:
+            state['abandoned'] = first.empty()
+        if state['abandoned']:
+            yield fallback()
+            return
+        chunk, error = first.get_nowait()
+
+    if error is not None:
+        raise error
+    if chunk is _STREAM_END:
+        yield fallback()
+        return
+    yield chunk
+    yield from stream
@@ -0,0 +1,160 @@
+"""
+Mesin saran kesehatan lokal berbasis template, tanpa LLM.
+
+Tabel paragraf saran dihitung sekali saat modul diimpor untuk setiap kombinasi
+(kategori AQI x polutan dominan x kelompok usia x kondisi medis umum). Saat dipakai, input
+pengguna cukup diklasifikasikan lalu paragrafnya diisi nama kota dan aktivitas, sehingga
+render berjalan jauh di bawah 1 ms. Dipakai sebagai jalur utama (POLLUCARE_ADVICE_MODE=template)
+atau sebagai cadangan ketika Gemini tidak tersedia atau terlalu lama merespons.
+"""
+import itertools
+
+from pollucare.constants import AQI_CATEGORY_MAP
+
+# Pedoman WHO 2021 (µg/m³) sebagai acuan untuk menentukan polutan yang paling menonjol
+POLLUTANT_REFERENCE = {
+    'PM25': 15.0,
+    'Ozone': 100.0,
+    'NO2': 25.0,
+    'CO': 4000.0,
+}
+
+POLLUTANT_NAMES = {
+    'PM25': 'partikulat halus (PM2.5)',
+    'Ozone': 'ozon (O3)',
+    'NO2': 'nitrogen dioksida (NO2)',
+    'CO': 'karbon monoksida (CO)',
+}
+
+CATEGORY_SENTENCES = {
+    'Baik': "kualitas udara di {city} saat ini tergolong baik, sehingga aktivitas di luar ruangan umumnya aman dilakukan",
+    'Sedang': "kualitas udara di {city} saat ini berada pada tingkat sedang; sebagian besar orang masih bisa beraktivitas normal, namun orang yang sangat sensitif sebaiknya mulai berhati-hati",
+    'Tidak Sehat untuk Kelompok Sensitif': "kualitas udara di {city} saat ini tidak sehat untuk kelompok sensitif, jadi anak-anak, lansia, dan penderita penyakit pernapasan atau jantung sebaiknya mengurangi aktivitas berat di luar ruangan",
+    'Tidak Sehat': "kualitas udara di {city} saat ini tidak sehat, sehingga semua orang sebaiknya membatasi aktivitas di luar ruangan dan menggunakan masker saat keluar rumah",
+    'Sangat Tidak Sehat': "kualitas udara di {city} saat ini sangat tidak sehat, jadi sebisa mungkin tetaplah di dalam ruangan dengan jendela tertutup dan gunakan masker N95 bila harus keluar",
+    'Berbahaya': "kualitas udara di {city} saat ini berbahaya bagi kesehatan, sehingga hindari seluruh aktivitas di luar ruangan, tetap di dalam ruangan dengan pemurni udara bila ada, dan gunakan masker N95 jika terpaksa keluar",
+}
+
+POLLUTANT_SENTENCES = {
+    'PM25': "Polutan yang paling menonjol adalah {pollutant}, partikel sangat kecil yang dapat masuk jauh ke paru-paru, sehingga masker yang rapat jauh lebih membantu daripada masker kain biasa.",
+    'Ozone': "Polutan yang paling menonjol adalah {pollutant}, yang biasanya memuncak pada siang hingga sore hari, jadi aktivitas luar ruangan lebih baik dilakukan pagi atau malam hari.",
+    'NO2': "Polutan yang paling menonjol adalah {pollutant} yang banyak berasal dari kendaraan bermotor, jadi hindari jalan raya yang padat dan jam sibuk lalu lintas.",
+    'CO': "Polutan yang paling menonjol adalah {pollutant}, gas tak berbau dari pembakaran, jadi pastikan ruangan memiliki ventilasi yang baik dan hindari area dengan asap kendaraan atau pembakaran.",
+}
+
+AGE_BANDS = ('anak', 'remaja', 'dewasa', 'lansia', 'tidak_diketahui')
+
+AGE_SENTENCES = {
+    'anak': "Anak-anak bernapas lebih cepat sehingga menghirup lebih banyak polutan, jadi batasi waktu bermain di luar dan pastikan mereka cukup minum air.",
+    'remaja': "Pada usia remaja, kurangi intensitas olahraga di luar ruangan saat udara memburuk dan pilih kegiatan di dalam ruangan bila memungkinkan.",
+    'dewasa': "Perhatikan tubuh Anda; bila muncul batuk, sesak, atau mata perih, segera kurangi aktivitas dan beristirahatlah di dalam ruangan.",
+    'lansia': "Pada usia lanjut, daya tahan paru dan jantung cenderung menurun, jadi sebaiknya kurangi aktivitas fisik di luar dan segera periksakan diri bila merasa sesak atau nyeri dada.",
+    'tidak_diketahui': "Perhatikan tubuh Anda; bila muncul batuk, sesak, atau mata perih, segera kurangi aktivitas dan beristirahatlah di dalam ruangan.",
+}
+
+# Kata kunci (huruf kecil) untuk mengenali kondisi medis umum dari input bebas pengguna
+CONDITION_KEYWORDS = {
+    'asma': ('asma', 'asthma', 'mengi'),
+    'ppok': ('ppok', 'copd', 'bronkitis', 'emfisema'),
+    'paru': ('pneumonia', 'paru', 'tbc', 'tuberkulosis', 'ispa'),
+    'jantung': ('jantung', 'hipertensi', 'darah tinggi', 'stroke', 'kardiovaskular'),
+    'diabetes': ('diabetes', 'gula darah', 'kencing manis'),
+    'hamil': ('hamil', 'kehamilan'),
+}
+
+CONDITIONS = tuple(CONDITION_KEYWORDS) + ('lainnya', 'tidak_ada')
+
+CONDITION_SENTENCES = {
+    'asma': "Karena Anda memiliki riwayat asma, selalu bawa inhaler pereda, hindari pemicu seperti asap dan debu, dan segera gunakan obat bila napas mulai berbunyi atau terasa berat.",
+    'ppok': "Dengan riwayat penyakit paru obstruktif, lanjutkan obat rutin sesuai anjuran dokter dan hindari keluar rumah saat udara memburuk.",
+    'paru': "Dengan riwayat penyakit paru, paru-paru Anda lebih rentan terhadap iritasi, jadi hindari paparan udara kotor dan segera periksakan diri bila batuk atau sesak bertambah.",
+    'jantung': "Dengan riwayat penyakit jantung atau tekanan darah tinggi, polusi udara dapat memperberat kerja jantung, jadi hindari aktivitas berat dan minum obat rutin secara teratur.",
+    'diabetes': "Penderita diabetes lebih rentan terhadap dampak peradangan akibat polusi, jadi jaga kadar gula darah tetap terkendali dan cukupi kebutuhan cairan.",
+    'hamil': "Selama kehamilan, paparan polusi dapat memengaruhi ibu dan janin, jadi kurangi waktu di luar ruangan dan konsultasikan dengan bidan atau dokter bila merasa tidak nyaman.",
+    'lainnya': "Mengingat kondisi kesehatan Anda, tetap lanjutkan pengobatan rutin dan konsultasikan dengan dokter bila keluhan muncul saat kualitas udara memburuk.",
+    'tidak_ada': "",
+}
+
+ACTIVITY_SENTENCE = "Untuk rencana {activity} Anda, sesuaikan waktu dan intensitasnya dengan kondisi udara di atas."
+
+GREETING = "Bapak/Ibu yang saya hormati, "
+CLOSING = "Semoga Anda tetap sehat dan jangan ragu menghubungi tenaga medis bila ada keluhan."
+
+
+def _compose(category, pollutant, age_band, condition):
+    # Saat udara baik, polutan dominan tidak perlu ditonjolkan
+    pollutant_sentence = "" if category == 'Baik' else POLLUTANT_SENTENCES[pollutant].replace("{pollutant}", POLLUTANT_NAMES[pollutant])
+    sentences = [
+        GREETING + CATEGORY_SENTENCES[category] + ".",
+        pollutant_sentence,
+        AGE_SENTENCES[age_band],
+        CONDITION_SENTENCES[condition],
+        "{activity_sentence}",
+        CLOSING,
+    ]
+    return " ".join(s for s in sentences if s)
+
+
+# Tabel saran yang dihitung sekali: (kategori, polutan, usia, kondisi) -> paragraf dengan placeholder
+ADVICE_TABLE = {
+    key: _compose(*key)
+    for key in itertools.product(AQI_CATEGORY_MAP.values(), POLLUTANT_REFERENCE, AGE_BANDS, CONDITIONS)
+}
+
+
+def dominant_pollutant(pollutant_values):
+    """Polutan dengan rasio konsentrasi terhadap pedoman WHO yang paling tinggi."""
+    best, best_ratio = 'PM25', -1.0
+    for key, reference in POLLUTANT_REFERENCE.items():
+        try:
+            ratio = float(pollutant_values.get(key, 0.0)) / reference
+        except (TypeError, ValueError):
+            continue
+        if ratio > best_ratio:
+            best, best_ratio = key, ratio
+    return best
+
+
+def age_band(age):
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return 'tidak_diketahui'
+    if age < 13:
+        return 'anak'
+    if age < 18:
+        return 'remaja'
+    if age < 60:
+        return 'dewasa'
+    return 'lansia'
+
+
+def classify_condition(medical_condition):
+    text = str(medical_condition or '').lower()
+    if not text or text == 'tidak ada':
+        return 'tidak_ada'
+    for condition, keywords in CONDITION_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return condition
+    return 'lainnya'
+
+
+def render_advice(aqi_category, pollutant_values, city_name, user_info=None):
+    """
+    Menyusun paragraf saran yang dipersonalisasi dari tabel yang sudah dihitung.
+    Kategori harus salah satu nilai AQI_CATEGORY_MAP; kategori lain melempar ValueError agar tidak
+    diam-diam dijawab dengan saran tingkat lain.
+    """
+    if aqi_category not in CATEGORY_SENTENCES:
+        raise ValueError(f"Kategori AQI '{aqi_category}' tidak dikenal.")
+    user_info = user_info or {}
+    key = (
+        aqi_category,
+        dominant_pollutant(pollutant_values or {}),
+        age_band(user_info.get('age')),
+        classify_condition(user_info.get('medical_condition')),
+    )
+    activity = user_info.get('activity_preference', 'Tidak disebutkan')
+    activity_sentence = "" if activity in (None, '', 'Tidak disebutkan') else ACTIVITY_SENTENCE.format(activity=activity.lower())
+    text = ADVICE_TABLE[key].replace("{activity_sentence}", activity_sentence).replace("{city}", city_name or "lokasi Anda")
+    return " ".join(text.split())
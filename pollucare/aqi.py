@@ -0,0 +1,157 @@
+"""
+Konversi konsentrasi polutan (µg/m³, seperti dari OpenWeather) menjadi sub-indeks AQI US EPA.
+
+Model DNN dilatih dengan kolom `CO/Ozone/NO2/PM2.5 AQI Value` (sub-indeks 0-500), bukan konsentrasi
+mentah, sehingga setiap input dari API harus dikonversi dulu ke skala yang sama. Konversinya:
+    1. µg/m³ -> satuan tabel EPA (ppm/ppb pada 25 °C, 1 atm; PM2.5 tetap µg/m³),
+    2. dipotong (truncate) ke presisi tabel EPA,
+    3. interpolasi linier di dalam pita breakpoint: I = (Ih - Il) / (Ch - Cl) * (C - Cl) + Il.
+Semua langkah berjalan sebagai operasi NumPy atas seluruh array (tanpa loop per baris), sehingga
+jalur satu request, batch (pollucare/predict.py) dan forecast memakai fungsi yang sama.
+
+Benchmark throughput:
+    python -m pollucare.aqi --bench --rows 5000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from pollucare.constants import FEATURES_USED_IN_TRAINING
+
+# Volume molar gas ideal (L/mol) pada 25 °C dan 1 atm: ppb = µg/m³ * 24.45 / berat molekul
+MOLAR_VOLUME = 24.45
+
+# Kunci konsentrasi (sama dengan openweather.parse_components) untuk setiap fitur model
+CONCENTRATION_KEYS = {
+    'CO AQI Value': 'CO',
+    'Ozone AQI Value': 'Ozone',
+    'NO2 AQI Value': 'NO2',
+    'PM2.5 AQI Value': 'PM25',
+}
+
+# Faktor µg/m³ -> satuan tabel EPA
+UNIT_FACTORS = {
+    'CO': MOLAR_VOLUME / 28.01 / 1000,    # ppm
+    'Ozone': MOLAR_VOLUME / 48.00 / 1000,  # ppm
+    'NO2': MOLAR_VOLUME / 46.0055,         # ppb
+    'PM25': 1.0,                           # µg/m³
+}
+
+# Jumlah desimal konsentrasi sebelum dicari pitanya (aturan pemotongan EPA)
+PRECISION = {
+    'CO': 1,
+    'Ozone': 3,
+    'NO2': 0,
+    'PM25': 1,
+}
+
+# Tabel breakpoint EPA (revisi 2024): (C_low, C_high, I_low, I_high).
+# Ozon memakai tabel 8 jam sampai 0.200 ppm dan tabel 1 jam di atasnya; konsentrasi di antara
+# keduanya dibatasi pada indeks 300.
+BREAKPOINTS = {
+    'CO': [
+        (0.0, 4.4, 0, 50), (4.5, 9.4, 51, 100), (9.5, 12.4, 101, 150),
+        (12.5, 15.4, 151, 200), (15.5, 30.4, 201, 300), (30.5, 50.4, 301, 500),
+    ],
+    'Ozone': [
+        (0.000, 0.054, 0, 50), (0.055, 0.070, 51, 100), (0.071, 0.085, 101, 150),
+        (0.086, 0.105, 151, 200), (0.106, 0.200, 201, 300), (0.405, 0.504, 301, 400), (0.505, 0.604, 401, 500),
+    ],
+    'NO2': [
+        (0, 53, 0, 50), (54, 100, 51, 100), (101, 360, 101, 150),
+        (361, 649, 151, 200), (650, 1249, 201, 300), (1250, 2049, 301, 500),
+    ],
+    'PM25': [
+        (0.0, 9.0, 0, 50), (9.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+        (55.5, 125.4, 151, 200), (125.5, 225.4, 201, 300), (225.5, 325.4, 301, 500),
+    ],
+}
+
+_TABLES = {key: np.array(rows, dtype=np.float64).T for key, rows in BREAKPOINTS.items()}
+
+
+def to_epa_units(pollutant, concentration):
+    """Konsentrasi µg/m³ -> satuan tabel EPA, sudah dipotong ke presisi tabel."""
+    scale = 10.0 ** PRECISION[pollutant]
+    values = np.asarray(concentration, dtype=np.float64) * UNIT_FACTORS[pollutant]
+    # Epsilon kecil agar nilai seperti 4.35 * 10 = 43.4999... tidak turun satu digit
+    return np.floor(values * scale + 1e-9) / scale
+
+
+def sub_index(pollutant, concentration):
+    """
+    Sub-indeks AQI (dibulatkan ke bilangan bulat) untuk array konsentrasi µg/m³ satu polutan.
+    Nilai di atas tabel dibatasi 500, nilai negatif menjadi 0, dan NaN tetap NaN.
+    """
+    c_low, c_high, i_low, i_high = _TABLES[pollutant]
+    c = to_epa_units(pollutant, concentration)
+    band = np.clip(np.searchsorted(c_low, c, side='right') - 1, 0, len(c_low) - 1)
+    index = (i_high[band] - i_low[band]) / (c_high[band] - c_low[band]) * (c - c_low[band]) + i_low[band]
+    index = np.clip(index, 0, i_high[band])
+    return np.rint(index)
+
+
+def concentrations_to_features(concentrations):
+    """
+    Matriks konsentrasi µg/m³ berukuran (n, 4) dengan urutan kolom FEATURES_USED_IN_TRAINING
+    -> matriks sub-indeks AQI float32 dengan bentuk yang sama, siap untuk `model.predict`.
+    """
+    concentrations = np.asarray(concentrations, dtype=np.float64)
+    if concentrations.ndim == 1:
+        concentrations = concentrations.reshape(1, -1)
+    features = np.empty(concentrations.shape, dtype=np.float32)
+    for i, feature in enumerate(FEATURES_USED_IN_TRAINING):
+        features[:, i] = sub_index(CONCENTRATION_KEYS[feature], concentrations[:, i])
+    return features
+
+
+def features_from_components(pollutant_data):
+    """Dict hasil openweather.fetch_air_pollution (CO/Ozone/NO2/PM25 dalam µg/m³) -> matriks fitur (1, 4)."""
+    return concentrations_to_features(
+        [pollutant_data.get(CONCENTRATION_KEYS[feature], 0.0) for feature in FEATURES_USED_IN_TRAINING]
+    )
+
+
+def _scalar_sub_index(pollutant, concentration):
+    """Implementasi per nilai (referensi untuk benchmark dan pengecekan hasil vektor)."""
+    scale = 10.0 ** PRECISION[pollutant]
+    c = int(concentration * UNIT_FACTORS[pollutant] * scale + 1e-9) / scale
+    for c_low, c_high, i_low, i_high in reversed(BREAKPOINTS[pollutant]):
+        if c >= c_low:
+            return float(round(min((i_high - i_low) / (c_high - c_low) * (c - c_low) + i_low, i_high)))
+    return 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Konversi konsentrasi µg/m³ ke sub-indeks AQI EPA.")
+    parser.add_argument("--bench", action="store_true", help="Ukur throughput konversi vektor.")
+    parser.add_argument("--rows", type=int, default=5000000)
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        rng = np.random.default_rng(0)
+        # Rentang kira-kira seperti data OpenWeather: CO, O3, NO2, PM2.5 dalam µg/m³
+        upper = np.array([20000.0, 800.0, 2000.0, 400.0])
+        concentrations = rng.uniform(0, 1, (args.rows, 4)) * upper
+
+        start = time.perf_counter()
+        features = concentrations_to_features(concentrations)
+        elapsed = time.perf_counter() - start
+        print(f"Vektor: {args.rows} baris dalam {elapsed:.3f} s ({args.rows / elapsed / 1e6:.1f} juta baris/s)")
+
+        sample = min(args.rows, 100000)
+        start = time.perf_counter()
+        scalar = np.array([
+            [_scalar_sub_index(CONCENTRATION_KEYS[f], row[i]) for i, f in enumerate(FEATURES_USED_IN_TRAINING)]
+            for row in concentrations[:sample]
+        ])
+        scalar_elapsed = time.perf_counter() - start
+        print(f"Loop per nilai: {sample} baris dalam {scalar_elapsed:.3f} s "
+              f"({sample / scalar_elapsed / 1e6:.2f} juta baris/s)")
+        mismatches = int(np.sum(scalar != features[:sample]))
+        print(f"Selisih hasil vektor vs loop: {mismatches} nilai")
+
+
+if __name__ == "__main__":
+    main()
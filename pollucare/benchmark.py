@@ -0,0 +1,361 @@
+"""
+Benchmark end-to-end jalur request app.py di atas fixture rekam/putar ulang (pollucare/replay.py).
+
+Langkah:
+    1. Rekam respon asli sekali (butuh jaringan, OPENWEATHER_API_KEY dan GEMINI_API_KEY):
+           python -m pollucare.benchmark record
+    2. Jalankan benchmark tanpa jaringan, dengan latensi/error upstream yang bisa diatur:
+           python -m pollucare.benchmark run --output bench_results/baseline.json
+           python -m pollucare.benchmark run --latency "openweather=150,overpass=900,gemini=700" --error-rate "overpass=0.1"
+    3. Bandingkan dua hasil; status keluar 1 jika ada metrik yang memburuk melebihi toleransi:
+           python -m pollucare.benchmark compare bench_results/baseline.json bench_results/new.json --tolerance 0.15
+
+Suite:
+    - stages:    latensi per tahap satu request (trace pollucare/metrics.py), cache kosong (cold) dan terisi (warm),
+    - inference: throughput model.predict pada beberapa ukuran batch,
+    - cache:     hit ratio dan panggilan upstream per request untuk beban berdistribusi Zipf,
+    - load:      beberapa sesi Streamlit bersamaan (request/detik, p50/p99).
+Setiap sesi adalah `streamlit.testing.v1.AppTest` yang menjalankan app.py sungguhan dan menekan
+tombol prediksi, jadi yang diukur adalah kode aplikasi yang sama dengan produksi.
+
+Hasil disimpan sebagai JSON: `meta` (commit, mesin, konfigurasi replay) dan `metrics` berupa
+pasangan nama datar -> angka. Akhiran nama menentukan arah: `_ms` dan `_per_request` lebih kecil
+lebih baik, `_per_s` dan `_ratio` lebih besar lebih baik.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from pollucare import cache, metrics, replay
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+
+SUITES = ("stages", "inference", "cache", "load")
+
+# Profil sesi: (kota, usia, riwayat penyakit, rencana aktivitas). Riwayat penyakit diisi agar
+# pencarian rumah sakit ikut berjalan.
+DEFAULT_PROFILES = (
+    ("Jakarta", "30", "Asma", "Jogging"),
+    ("Pekanbaru", "45", "Hipertensi", "Bersepeda"),
+    ("Surabaya", "23", "Tidak ada", "Bekerja"),
+    ("Medan", "60", "PPOK", "Jalan pagi"),
+    ("Bandung", "35", "Asma", "Bermain dengan anak"),
+    ("Makassar", "28", "Tidak ada", "Lari sore"),
+)
+
+INFERENCE_BATCH_SIZES = (1, 8, 64, 256, 1024)
+LOAD_CONCURRENCY = (1, 4, 8)
+
+LOWER_IS_BETTER = ("_ms", "_per_request")
+HIGHER_IS_BETTER = ("_per_s", "_ratio")
+
+
+def _prepare_environment():
+    # Harus diset sebelum app.py dijalankan pertama kali: tanpa server metrik, scheduler prefetch
+    # dan sqlite bersama, agar setiap skenario mulai dari cache yang bisa dikosongkan
+    os.environ.setdefault("POLLUCARE_CACHE_BACKEND", "memory")
+    os.environ.setdefault("POLLUCARE_METRICS_PORT", "0")
+    os.environ.setdefault("POLLUCARE_PREFETCH_MODE", "off")
+    os.environ.setdefault("POLLUCARE_STARTUP_MODE", "lazy")
+    # Respon fixture bukan observasi baru dan tidak boleh masuk data retraining
+    os.environ.setdefault("POLLUCARE_OBSERVATIONS", "off")
+
+
+def reset_caches():
+    """Mengosongkan st.cache_data dan cache persisten, seperti replika yang baru dinyalakan."""
+    import streamlit as st
+
+    st.cache_data.clear()
+    cache.set_cache(cache.PersistentCache(cache.MemoryBackend()))
+    replay.call_counts(reset=True)
+
+
+class Session:
+    """Satu sesi pengguna app.py (AppTest) yang mengisi form lalu menekan tombol prediksi."""
+
+    def __init__(self, timeout=120):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.app.run()
+
+    def predict(self, profile):
+        """Menjalankan satu request; mengembalikan trace "predict" dari sesi ini (None jika gagal)."""
+        city, age, condition, activity = profile
+        self.app.text_input(key="city_input_text").input(city)
+        self.app.text_input(key="user_age").input(age)
+        self.app.text_input(key="user_medical").input(condition)
+        self.app.text_input(key="user_activity").input(activity)
+        before = len(metrics.recent_traces("predict"))
+        self.app.button(key="predict_button").click().run()
+        if self.app.exception:
+            return None
+        # Dengan sesi bersamaan (suite load) trace terakhir bisa milik sesi lain; di sana hanya latensi total yang dipakai
+        traces = metrics.recent_traces("predict")[before:]
+        return traces[-1] if traces else None
+
+
+def _percentiles(values, prefix, out):
+    if not values:
+        return
+    out[f"{prefix}.p50_ms"] = round(float(np.percentile(values, 50)) * 1000, 2)
+    out[f"{prefix}.p90_ms"] = round(float(np.percentile(values, 90)) * 1000, 2)
+
+
+def run_stages(profiles, repeat):
+    """Latensi per tahap: setiap profil dijalankan dengan cache kosong lalu sekali lagi dengan cache terisi."""
+    samples = defaultdict(list)
+    for _ in range(repeat):
+        for profile in profiles:
+            reset_caches()
+            session = Session()
+            for phase in ("cold", "warm"):
+                trace = session.predict(profile)
+                if trace is None:
+                    samples[f"{phase}.failed"].append(1)
+                    continue
+                samples[f"{phase}.total"].append(trace.total)
+                for stage, seconds in trace.stages:
+                    samples[f"{phase}.{stage}"].append(seconds)
+    out = {}
+    for name, values in sorted(samples.items()):
+        if name.endswith(".failed"):
+            out[f"stages.{name}"] = len(values)
+        else:
+            _percentiles(values, f"stages.{name}", out)
+    return out
+
+
+def run_inference(batch_sizes=INFERENCE_BATCH_SIZES, seconds=0.5):
+    """Throughput model default (pollucare/predict.py) untuk beberapa ukuran batch."""
+    from pollucare import predict
+
+    model = predict.load_default_model()
+    rng = np.random.default_rng(0)
+    out = {}
+    for size in batch_sizes:
+        features = rng.uniform(0, 300, (size, 4)).astype(np.float32)
+        model.predict(features)
+        calls, start = 0, time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            model.predict(features)
+            calls += 1
+        elapsed = time.perf_counter() - start
+        out[f"inference.batch_{size}.rows_per_s"] = round(calls * size / elapsed, 1)
+        out[f"inference.batch_{size}.call_ms"] = round(elapsed / calls * 1000, 4)
+    return out
+
+
+def run_cache(profiles, requests_count, zipf_s=1.1, seed=0):
+    """
+    Efektivitas cache: `requests_count` request dengan kota dipilih menurut distribusi Zipf
+    (beberapa kota sangat populer), dalam satu proses yang cache-nya awalnya kosong.
+    """
+    reset_caches()
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(profiles) + 1) ** zipf_s
+    choices = rng.choice(len(profiles), size=requests_count, p=weights / weights.sum())
+
+    session = Session()
+    latencies = []
+    for index in choices:
+        trace = session.predict(profiles[index])
+        if trace is not None:
+            latencies.append(trace.total)
+
+    stats = cache.get_cache().stats()
+    lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+    out = {
+        "cache.persistent_hit_ratio": round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0,
+    }
+    calls = replay.call_counts()
+    for service, count in sorted(calls.items()):
+        out[f"cache.{service}_calls_per_request"] = round(count / requests_count, 4)
+    out["cache.upstream_calls_per_request"] = round(sum(calls.values()) / requests_count, 4)
+    _percentiles(latencies, "cache.request", out)
+    return out
+
+
+def run_load(profiles, concurrency_levels, duration):
+    """Sesi bersamaan (satu thread per sesi) yang terus mengirim request selama `duration` detik."""
+    out = {}
+    for concurrency in concurrency_levels:
+        reset_caches()
+        latencies, failures = [], []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(offset):
+            session = Session()
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                trace = session.predict(profiles[i % len(profiles)])
+                with lock:
+                    if trace is None:
+                        failures.append(i)
+                    else:
+                        latencies.append(time.perf_counter() - start)
+                i += 1
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        prefix = f"load.c{concurrency}"
+        out[f"{prefix}.requests_per_s"] = round(len(latencies) / elapsed, 2)
+        out[f"{prefix}.failures"] = len(failures)
+        if latencies:
+            out[f"{prefix}.p50_ms"] = round(float(np.percentile(latencies, 50)) * 1000, 2)
+            out[f"{prefix}.p99_ms"] = round(float(np.percentile(latencies, 99)) * 1000, 2)
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(suites, profiles, args):
+    _prepare_environment()
+    config = replay.configure(mode="replay", fixtures_dir=args.fixtures, latency_ms=args.latency,
+                              jitter=args.jitter, error_rate=args.error_rate, error_kind=args.error_kind,
+                              seed=args.seed)
+    results = {}
+    for suite in suites:
+        start = time.perf_counter()
+        if suite == "stages":
+            results.update(run_stages(profiles, args.repeat))
+        elif suite == "inference":
+            results.update(run_inference())
+        elif suite == "cache":
+            results.update(run_cache(profiles, args.cache_requests))
+        elif suite == "load":
+            results.update(run_load(profiles, args.concurrency, args.duration))
+        print(f"Suite {suite} selesai dalam {time.perf_counter() - start:.1f} s", file=sys.stderr, flush=True)
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "suites": list(suites),
+            "replay": {"latency_ms": args.latency, "jitter": config.jitter, "error_rate": args.error_rate,
+                       "error_kind": args.error_kind, "seed": args.seed},
+        },
+        "metrics": results,
+    }
+
+
+def record(profiles, fixtures_dir):
+    """Menjalankan setiap profil sekali dengan cache kosong dan menyimpan semua respon upstream."""
+    _prepare_environment()
+    replay.configure(mode="record", fixtures_dir=fixtures_dir)
+    for profile in profiles:
+        reset_caches()
+        trace = Session().predict(profile)
+        status = "gagal" if trace is None else f"{trace.total * 1000:.0f} ms"
+        print(f"{profile[0]:<12} {status}  panggilan upstream: {replay.call_counts()}")
+
+
+def _direction(name):
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    return 0
+
+
+def compare(baseline, candidate, tolerance, min_delta_ms=1.0):
+    """
+    Membandingkan metrik dua file hasil. Metrik latensi (`_ms`) baru dianggap memburuk jika
+    selisihnya juga minimal `min_delta_ms`, agar derau pada tahap sub-milidetik tidak ikut gagal.
+    Returns:
+        list: Nama metrik yang memburuk lebih dari `tolerance` (relatif).
+    """
+    regressions = []
+    base, new = baseline["metrics"], candidate["metrics"]
+    for name in sorted(set(base) & set(new)):
+        old_value, new_value = base[name], new[name]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        direction = _direction(name)
+        worse = direction != 0 and -direction * change > tolerance
+        if name.endswith("_ms") and abs(new_value - old_value) < min_delta_ms:
+            worse = False
+        if worse:
+            regressions.append(name)
+        print(f"{'!' if worse else ' '} {name:<48} {old_value:>12g} -> {new_value:>12g}  {change * 100:+7.1f}%")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end PolluCare di atas fixture rekam/putar ulang.")
+    parser.add_argument("--fixtures", default=replay.get_config().fixtures_dir)
+    parser.add_argument("--cities", nargs="+", help="Hanya profil untuk kota-kota ini.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("record", help="Rekam respon upstream asli untuk setiap profil.")
+
+    bench = sub.add_parser("run", help="Jalankan suite benchmark dengan respon dari fixture.")
+    bench.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    bench.add_argument("--output", help="Simpan hasil JSON ke file ini.")
+    bench.add_argument("--latency", default="recorded", help="Latensi upstream (ms), mis. 'openweather=150,*=0'.")
+    bench.add_argument("--jitter", type=float, default=0.0)
+    bench.add_argument("--error-rate", default="", help="Peluang error per layanan, mis. 'overpass=0.1'.")
+    bench.add_argument("--error-kind", choices=("timeout", "connection", "http503"), default="timeout")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--repeat", type=int, default=1, help="Pengulangan suite stages per profil.")
+    bench.add_argument("--cache-requests", type=int, default=60)
+    bench.add_argument("--concurrency", type=int, nargs="+", default=list(LOAD_CONCURRENCY))
+    bench.add_argument("--duration", type=float, default=10, help="Lama setiap level suite load (detik).")
+
+    diff = sub.add_parser("compare", help="Bandingkan dua file hasil.")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument("--tolerance", type=float, default=0.15)
+    diff.add_argument("--min-delta-ms", type=float, default=1.0)
+
+    args = parser.parse_args(argv)
+    profiles = [p for p in DEFAULT_PROFILES if not args.cities or p[0] in args.cities]
+
+    if args.command == "record":
+        record(profiles, args.fixtures)
+    elif args.command == "run":
+        result = run(args.suites, profiles, args)
+        text = json.dumps(result, indent=2, sort_keys=True)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        for name, value in sorted(result["metrics"].items()):
+            print(f"{name:<48} {value:>12g}")
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.candidate, encoding="utf-8") as f:
+            candidate = json.load(f)
+        regressions = compare(baseline, candidate, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} metrik memburuk lebih dari {args.tolerance * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Cache persisten lintas proses untuk hasil panggilan API eksternal.
+
+`st.cache_data` hanya hidup di memori satu proses Streamlit, sehingga setiap restart atau
+replika baru mulai dari kosong. Modul ini menambahkan tier di belakangnya:
+
+- Backend yang bisa diganti (POLLUCARE_CACHE_BACKEND): "sqlite" (default, file bersama antar
+  proses di satu host), "memory", "redis" (butuh paket `redis` dan POLLUCARE_REDIS_URL), atau "none".
+  Backend apa pun cukup menyediakan `get`, `set(key, value, ex=None, nx=False)` dan `delete`
+  seperti subset perintah Redis.
+- Batas jumlah entri dengan eviksi LRU (sqlite/memory; untuk Redis gunakan maxmemory-policy allkeys-lru).
+- Request coalescing: banyak miss bersamaan untuk key yang sama hanya memicu satu panggilan upstream.
+- Stale-while-revalidate: nilai yang sudah lewat TTL tapi masih dalam `stale_ttl` langsung dikembalikan,
+  lalu diperbarui di background.
+- Penghitung hit/miss/eviksi lewat `get_cache().stats()`.
+
+Nilai disimpan sebagai JSON (bukan pickle): backend seperti Redis bisa ditulisi proses lain, dan
+isi cache tidak boleh bisa menjalankan kode di worker. Karena itu fungsi yang di-cache harus
+mengembalikan tipe JSON (dict, list, str, angka); tuple kembali sebagai list.
+
+Pemakaian:
+    @cached("air_pollution", ttl=600, stale_ttl=1800)
+    def fetch_air_pollution(lat, lon, api_key): ...
+"""
+import builtins
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pollucare", "cache.sqlite")
+DEFAULT_MAX_ENTRIES = 50000
+
+# Berapa lama proses lain menunggu proses yang sedang mengisi key yang sama
+LOCK_TTL_SECONDS = 30
+LOCK_POLL_SECONDS = 0.05
+
+# Hasil kosong/gagal dari pemegang lock disimpan sebentar agar proses yang menunggu tidak ikut
+# memanggil upstream; sengaja pendek karena error dan hasil None memang tidak di-cache
+FAILURE_MARKER_TTL_SECONDS = 5
+
+# SQLite: entri kedaluwarsa dan kelebihan entri dibuang setiap sekian penulisan atau detik,
+# bukan pada setiap `set`, agar jalur request tidak menghitung ulang seluruh tabel
+EVICT_EVERY_WRITES = 200
+EVICT_INTERVAL_SECONDS = 60
+
+# Error dari pemegang lock yang dilempar ulang di proses yang menunggu, berdasarkan nama tipenya;
+# tipe lain membuat penunggu memanggil upstream sendiri
+RERAISED_BUILTIN_ERRORS = ("KeyError", "IndexError", "ValueError", "TimeoutError")
+
+
+def _encode(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _rebuild_error(marker):
+    """Exception dari penanda {"error": nama tipe, "message": ...}; None jika tipenya tidak dikenal."""
+    name, message = marker.get("error"), marker.get("message", "")
+    if name in RERAISED_BUILTIN_ERRORS:
+        return getattr(builtins, name)(message)
+    cls = getattr(requests.exceptions, name or "", None)
+    if isinstance(cls, type) and issubclass(cls, requests.exceptions.RequestException):
+        return cls(message)
+    return None
+
+
+class MemoryBackend:
+    """Backend di memori dengan LRU; juga berguna sebagai pengganti Redis lokal."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ex=None, nx=False):
+        expires_at = time.time() + ex if ex else None
+        with self._lock:
+            current = self._data.get(key)
+            if nx and current is not None and (current[1] is None or current[1] > time.time()):
+                return False
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteBackend:
+    """
+    Backend file SQLite (mode WAL) yang bisa dipakai bersama oleh beberapa proses di host yang sama.
+    Setiap thread memakai koneksinya sendiri.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+        self._evicted_at = time.monotonic()
+        self._evict_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value, ex=None, nx=False):
+        conn = self._conn()
+        now = time.time()
+        expires_at = now + ex if ex else None
+        with conn:
+            if nx:
+                conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, now))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now)
+                )
+                if cursor.rowcount == 0:
+                    return False
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now)
+                )
+        if self._evict_due():
+            with conn:
+                self._evict(conn, now)
+        return True
+
+    def _evict_due(self):
+        with self._evict_lock:
+            self._writes += 1
+            if self._writes < EVICT_EVERY_WRITES and time.monotonic() - self._evicted_at < EVICT_INTERVAL_SECONDS:
+                return False
+            self._writes = 0
+            self._evicted_at = time.monotonic()
+            return True
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (overflow,)
+            )
+            self.evictions += overflow
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisBackend:
+    """Pembungkus tipis klien Redis (atau objek lain dengan antarmuka get/set/delete yang sama)."""
+
+    def __init__(self, client):
+        self.client = client
+        self.evictions = 0
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        return bool(self.client.set(key, value, ex=int(ex) if ex else None, nx=nx))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class PersistentCache:
+
+    def __init__(self, backend, namespace="pollucare"):
+        self.backend = backend
+        self.namespace = namespace
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._counters)
+        result["evictions"] = getattr(self.backend, "evictions", 0)
+        return result
+
+    def make_key(self, name, args, kwargs):
+        raw = repr((args, sorted(kwargs.items()))).encode("utf-8")
+        return f"{self.namespace}:{name}:{hashlib.sha1(raw).hexdigest()}"
+
+    def _read(self, key):
+        try:
+            raw = self.backend.get(key)
+            return json.loads(raw) if raw is not None else None
+        except Exception:
+            self._count("errors")
+            return None
+
+    def _write(self, key, value, ttl, stale_ttl):
+        # Hasil None (gagal/tidak ditemukan) tidak disimpan agar error tidak ikut di-cache
+        if value is None:
+            return
+        entry = {"value": value, "stored_at": time.time()}
+        try:
+            self.backend.set(key, _encode(entry), ex=ttl + stale_ttl)
+        except Exception:
+            self._count("errors")
+
+    def _single_flight(self, key, fn, ttl, stale_ttl):
+        """Memastikan hanya satu panggilan upstream per key di proses ini (dan sebisanya antar proses)."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            self._count("coalesced")
+            return future.result()
+
+        try:
+            value = self._load_with_lock(key, fn, ttl, stale_ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _backend_call(self, method, *args, **kwargs):
+        try:
+            return getattr(self.backend, method)(*args, **kwargs)
+        except Exception:
+            self._count("errors")
+            return None
+
+    def _write_failure(self, failure_key, error):
+        """Penanda hasil None (error None) atau nama tipe dan pesan error dari pemegang lock."""
+        marker = {"error": None} if error is None else {"error": type(error).__name__, "message": str(error)}
+        self._backend_call("set", failure_key, _encode(marker), ex=FAILURE_MARKER_TTL_SECONDS)
+
+    def _wait_for_owner(self, key, lock_key, failure_key, ttl):
+        """
+        Menunggu proses lain yang memegang lock untuk key ini.
+        Returns:
+            tuple: (True, nilai) jika hasilnya sudah tersedia, atau (False, None) jika lock hilang
+            tanpa hasil sehingga pemanggil harus memanggil upstream sendiri.
+        """
+        waited_until = time.monotonic() + LOCK_TTL_SECONDS
+        while True:
+            lock_held = self._backend_call("get", lock_key) is not None
+            entry = self._read(key)
+            if entry is not None and time.time() - entry["stored_at"] < ttl:
+                self._count("coalesced")
+                return True, entry["value"]
+            failure = self._read(failure_key)
+            if failure is not None:
+                if failure.get("error") is None:
+                    self._count("coalesced")
+                    return True, None
+                error = _rebuild_error(failure)
+                if error is None:
+                    # Error yang tidak dikenal: penunggu memanggil upstream sendiri
+                    return False, None
+                self._count("coalesced")
+                raise error
+            # Lock dibaca sebelum entri: jika lock sudah hilang dan entri tetap tidak ada, pemegang
+            # lock selesai tanpa menulis apa pun (atau lock-nya kedaluwarsa)
+            if not lock_held or time.monotonic() >= waited_until:
+                return False, None
+            time.sleep(LOCK_POLL_SECONDS)
+
+    def _load_with_lock(self, key, fn, ttl, stale_ttl):
+        lock_key = key + ":lock"
+        failure_key = key + ":failed"
+        acquired = self._backend_call("set", lock_key, b"1", ex=LOCK_TTL_SECONDS, nx=True)
+        if not acquired:
+            # Proses lain sedang mengisi key ini; tunggu hasilnya sebelum memanggil upstream sendiri
+            done, value = self._wait_for_owner(key, lock_key, failure_key, ttl)
+            if done:
+                return value
+        else:
+            # Penanda gagal dari pemegang lock sebelumnya tidak berlaku untuk panggilan ini
+            self._backend_call("delete", failure_key)
+        try:
+            try:
+                value = fn()
+            except Exception as e:
+                if acquired:
+                    self._write_failure(failure_key, e)
+                raise
+            self._write(key, value, ttl, stale_ttl)
+            if acquired and value is None:
+                self._write_failure(failure_key, None)
+            return value
+        finally:
+            # Penanda ditulis sebelum lock dilepas, sehingga penunggu yang melihat lock hilang juga melihatnya
+            if acquired:
+                self._backend_call("delete", lock_key)
+
+    def _refresh_in_background(self, key, fn, ttl, stale_ttl):
+        with self._lock:
+            if key in self._inflight:
+                return
+        self._count("refreshes")
+
+        def run():
+            try:
+                self._single_flight(key, fn, ttl, stale_ttl)
+            except Exception:
+                self._count("errors")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_or_load(self, name, args, kwargs, fn, ttl, stale_ttl=0):
+        key = self.make_key(name, args, kwargs)
+        load = functools.partial(fn, *args, **kwargs)
+        entry = self._read(key)
+        if entry is not None:
+            age = time.time() - entry["stored_at"]
+            if age < ttl:
+                self._count("hits")
+                return entry["value"]
+            if age < ttl + stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, load, ttl, stale_ttl)
+                return entry["value"]
+        self._count("misses")
+        return self._single_flight(key, load, ttl, stale_ttl)
+
+    def get(self, name, args, kwargs, ttl):
+        """Membaca nilai yang belum lewat TTL tanpa memanggil upstream; None jika tidak ada."""
+        entry = self._read(self.make_key(name, args, kwargs))
+        if entry is not None and time.time() - entry["stored_at"] < ttl:
+            self._count("hits")
+            return entry["value"]
+        self._count("misses")
+        return None
+
+    def age(self, name, args, kwargs):
+        """Umur (detik) nilai yang tersimpan, atau None jika tidak ada; tidak mengubah penghitung hit/miss."""
+        entry = self._read(self.make_key(name, args, kwargs))
+        return time.time() - entry["stored_at"] if entry is not None else None
+
+    def put(self, name, args, kwargs, value, ttl, stale_ttl=0):
+        self._write(self.make_key(name, args, kwargs), value, ttl, stale_ttl)
+
+
+def _create_default_cache():
+    backend_name = os.environ.get("POLLUCARE_CACHE_BACKEND", "sqlite").lower()
+    max_entries = int(os.environ.get("POLLUCARE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    if backend_name == "none":
+        return None
+    if backend_name == "memory":
+        return PersistentCache(MemoryBackend(max_entries))
+    if backend_name == "redis":
+        import redis
+
+        client = redis.Redis.from_url(os.environ.get("POLLUCARE_REDIS_URL", "redis://localhost:6379/0"))
+        return PersistentCache(RedisBackend(client))
+    return PersistentCache(SQLiteBackend(os.environ.get("POLLUCARE_CACHE_PATH", DEFAULT_CACHE_PATH), max_entries))
+
+
+_default_cache = None
+_default_cache_ready = False
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Cache bersama untuk proses ini, dibuat sekali sesuai variabel lingkungan. None jika dimatikan."""
+    global _default_cache, _default_cache_ready
+    with _default_cache_lock:
+        if not _default_cache_ready:
+            _default_cache = _create_default_cache()
+            _default_cache_ready = True
+        return _default_cache
+
+
+def set_cache(cache):
+    global _default_cache, _default_cache_ready
+    with _default_cache_lock:
+        _default_cache = cache
+        _default_cache_ready = True
+
+
+def cached(name, ttl, stale_ttl=0):
+    """Decorator: menyimpan hasil fungsi di cache bersama dengan TTL (detik)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return fn(*args, **kwargs)
+            return cache.get_or_load(name, args, kwargs, fn, ttl, stale_ttl)
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
@@ -0,0 +1,117 @@
+"""
+Profil cold start aplikasi Streamlit (app.py): waktu import per paket dan waktu sampai render pertama.
+
+Setiap pengukuran memakai proses Python baru, sama seperti replika yang baru dinyalakan autoscaler.
+Render pertama dijalankan dengan `streamlit.testing.v1.AppTest` (tanpa browser dan tanpa klik tombol).
+    python -m pollucare.coldstart importtime --top 15
+    python -m pollucare.coldstart bench --runs 5 --modes eager lazy --max-seconds 3
+`bench` keluar dengan status 1 jika median mode pertama melebihi `--max-seconds`, sehingga bisa
+dipakai sebagai uji regresi di CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+
+STARTUP_MODES = ("eager", "warmup", "lazy")
+
+# Dijalankan di proses anak: waktu diukur dari sebelum Streamlit diimpor sampai render pertama selesai
+FIRST_RENDER_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    sys.exit(f"Render gagal: {at.exception[0].value}")
+print(elapsed)
+"""
+
+
+def _child_env(startup_mode):
+    env = dict(os.environ)
+    env["POLLUCARE_STARTUP_MODE"] = startup_mode
+    # Server metrik dan scheduler prefetch tidak ikut diukur dan tidak bentrok port antar-proses
+    env.setdefault("POLLUCARE_METRICS_PORT", "0")
+    env.setdefault("POLLUCARE_PREFETCH_MODE", "off")
+    return env
+
+
+def first_render_seconds(startup_mode):
+    """Detik sampai render pertama app.py di proses baru dengan POLLUCARE_STARTUP_MODE tertentu."""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER_SCRIPT, APP_PATH],
+        cwd=REPO_DIR, env=_child_env(startup_mode), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "proses gagal")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(startup_mode):
+    """
+    Menjalankan render pertama dengan `-X importtime` lalu menjumlahkan waktu import per paket teratas.
+    Returns:
+        list: Tuple (paket, detik) terurut menurun; waktu "self" dijumlahkan agar submodul tidak terhitung ganda.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", FIRST_RENDER_SCRIPT, APP_PATH],
+        cwd=REPO_DIR, env=_child_env(startup_mode), capture_output=True, text=True,
+    )
+    totals = defaultdict(int)
+    for line in result.stderr.splitlines():
+        # Format: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        if not self_us.isdigit():
+            continue
+        totals[name.split(".")[0]] += int(self_us)
+    return sorted(((package, us / 1e6) for package, us in totals.items()), key=lambda item: item[1], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil cold start aplikasi Streamlit PolluCare.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    importtime = sub.add_parser("importtime", help="Waktu import per paket sampai render pertama.")
+    importtime.add_argument("--mode", choices=STARTUP_MODES, default="lazy")
+    importtime.add_argument("--top", type=int, default=15)
+
+    bench = sub.add_parser("bench", help="Median waktu sampai render pertama per mode start.")
+    bench.add_argument("--modes", nargs="+", choices=STARTUP_MODES, default=["lazy", "eager"])
+    bench.add_argument("--runs", type=int, default=5)
+    bench.add_argument("--max-seconds", type=float, default=None,
+                       help="Gagal (status 1) jika median mode pertama melebihi batas ini.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "importtime":
+        profile = import_profile(args.mode)
+        total = sum(seconds for _, seconds in profile)
+        print(f"Total import (POLLUCARE_STARTUP_MODE={args.mode}): {total * 1000:.0f} ms")
+        for package, seconds in profile[:args.top]:
+            print(f"{package:<28} {seconds * 1000:8.1f} ms")
+        return
+
+    medians = {}
+    for mode in args.modes:
+        samples = [first_render_seconds(mode) for _ in range(args.runs)]
+        medians[mode] = statistics.median(samples)
+        print(f"{mode:<7} median {medians[mode]:.2f} s  (min {min(samples):.2f} s, max {max(samples):.2f} s, "
+              f"{args.runs} proses)", flush=True)
+
+    mode = args.modes[0]
+    if args.max_seconds is not None and medians[mode] > args.max_seconds:
+        print(f"Regresi: render pertama mode {mode} {medians[mode]:.2f} s > batas {args.max_seconds:.2f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Fitur input model DNN, urutannya harus sama dengan saat training (MLProject/modelling.py).
+FEATURES_USED_IN_TRAINING = ['CO AQI Value', 'Ozone AQI Value', 'NO2 AQI Value', 'PM2.5 AQI Value']
+
+# Pemetaan manual untuk kategori AQI.
+AQI_CATEGORY_MAP = {
+    0: 'Baik',
+    1: 'Berbahaya',
+    2: 'Sedang',
+    3: 'Tidak Sehat',
+    4: 'Tidak Sehat untuk Kelompok Sensitif',
+    5: 'Sangat Tidak Sehat'
+}
+
+# Kategori AQI_CATEGORY_MAP urut dari yang paling ringan; posisi dalam tuple = tingkat keparahan.
+AQI_SEVERITY_ORDER = (
+    'Baik',
+    'Sedang',
+    'Tidak Sehat untuk Kelompok Sensitif',
+    'Tidak Sehat',
+    'Sangat Tidak Sehat',
+    'Berbahaya',
+)
+
+# Batas atas AQI (US EPA) untuk tiap kategori AQI_SEVERITY_ORDER; di atas batas terakhir "Berbahaya".
+AQI_BREAKPOINTS = (50, 100, 150, 200, 300)
+
+# Label kategori AQI di data mentah (aqi_raw.csv) dengan kode yang sama seperti AQI_CATEGORY_MAP.
+# Kode ini dipakai saat preprocessing (pollucare/preprocessing.py) sehingga encoding-nya stabil.
+AQI_CATEGORY_LABELS = {
+    0: 'Good',
+    1: 'Hazardous',
+    2: 'Moderate',
+    3: 'Unhealthy',
+    4: 'Unhealthy for Sensitive Groups',
+    5: 'Very Unhealthy'
+}
@@ -0,0 +1,72 @@
+"""
+Menjalankan panggilan API yang saling independen secara bersamaan dengan satu batas waktu total.
+
+Contoh:
+    with TaskGroup(deadline=30) as tasks:
+        tasks.submit('pollution', fetch_air_pollution, lat, lon, key)
+        tasks.submit('hospitals', search_nearby_hospitals, lat, lon)
+        pollution = tasks.result('pollution')
+        for name in tasks.as_completed(['hospitals']):
+            ...
+
+Task yang belum selesai saat deadline habis dianggap gagal (hasilnya `default`) dan
+tidak ditunggu ketika TaskGroup ditutup.
+"""
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class TaskGroup:
+
+    def __init__(self, deadline, max_workers=4, initializer=None):
+        self.deadline_at = time.monotonic() + deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
+        self._futures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        # Jangan menunggu task yang melewati deadline; thread-nya dibiarkan selesai di belakang
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def remaining(self):
+        return max(0.0, self.deadline_at - time.monotonic())
+
+    def submit(self, name, fn, *args, **kwargs):
+        # Konteks (mis. trace request di pollucare/metrics.py) ikut dibawa ke thread pekerja
+        future = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        self._futures[name] = future
+        return future
+
+    def __contains__(self, name):
+        return name in self._futures
+
+    def done(self, name):
+        return self._futures[name].done()
+
+    def result(self, name, default=None):
+        """
+        Menunggu hasil task sampai deadline. Mengembalikan `default` jika waktu habis.
+        Exception dari task dilempar ulang ke pemanggil.
+        """
+        future = self._futures[name]
+        done, _ = wait([future], timeout=self.remaining())
+        if not done:
+            return default
+        return future.result()
+
+    def as_completed(self, names):
+        """Menghasilkan nama task sesuai urutan selesainya, berhenti ketika deadline habis."""
+        pending = {self._futures[name]: name for name in names if name in self._futures}
+        while pending:
+            done, _ = wait(pending, timeout=self.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                return
+            for future in done:
+                yield pending.pop(future)
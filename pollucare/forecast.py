@@ -0,0 +1,126 @@
+"""
+Prakiraan kualitas udara per jam: seluruh titik prakiraan OpenWeather (~96 jam) dikonversi ke
+sub-indeks AQI dan diprediksi model DNN dalam satu panggilan `model.predict`, lalu dicari jendela
+waktu paling bersih untuk rencana aktivitas pengguna.
+
+Kode kelas AQI_CATEGORY_MAP mengikuti urutan abjad label mentah, bukan tingkat keparahan, sehingga
+setiap jam juga diberi skor keparahan harapan: jumlah probabilitas kelas dikali peringkat
+keparahannya (0 = Baik ... 5 = Berbahaya). Skor ini lebih halus daripada kategori argmax dan
+dipakai untuk membandingkan jendela waktu.
+
+Contoh CLI:
+    python -m pollucare.forecast --lat -6.2 --lon 106.8 --hours 2
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from pollucare import aqi, openweather
+from pollucare.constants import AQI_CATEGORY_MAP, AQI_SEVERITY_ORDER, FEATURES_USED_IN_TRAINING
+
+_CATEGORY_LOOKUP = np.array([AQI_CATEGORY_MAP[i] for i in range(len(AQI_CATEGORY_MAP))], dtype=object)
+# Peringkat keparahan untuk setiap kode kelas model
+_SEVERITY_WEIGHTS = np.array([AQI_SEVERITY_ORDER.index(AQI_CATEGORY_MAP[i]) for i in range(len(AQI_CATEGORY_MAP))],
+                             dtype=np.float32)
+
+
+def utc_offset_hours(lon):
+    """Perkiraan zona waktu dari bujur (15° per jam); cocok untuk WIB/WITA/WIT."""
+    return int(round(float(lon) / 15.0))
+
+
+def score_forecast(model, forecast, lon=None):
+    """
+    Memprediksi kategori AQI untuk seluruh jam prakiraan sekaligus.
+    Args:
+        model: Objek dengan `predict(features)` (lihat pollucare.inference.load_model).
+        forecast (pd.DataFrame): Hasil openweather.fetch_air_pollution_forecast.
+        lon (float): Bujur lokasi untuk kolom waktu lokal; None berarti tetap UTC.
+    Returns:
+        pd.DataFrame: Kolom `time` (waktu lokal), sub-indeks AQI, `category`, `probability`, dan `severity`.
+    """
+    concentrations = forecast[[aqi.CONCENTRATION_KEYS[f] for f in FEATURES_USED_IN_TRAINING]].to_numpy()
+    features = aqi.concentrations_to_features(concentrations)
+    proba = np.asarray(model.predict(features))
+    class_index = np.argmax(proba, axis=1)
+
+    offset = pd.Timedelta(hours=utc_offset_hours(lon)) if lon is not None else pd.Timedelta(0)
+    scored = pd.DataFrame(features, columns=FEATURES_USED_IN_TRAINING)
+    scored.insert(0, 'time', pd.to_datetime(forecast['dt'].to_numpy(), unit='s') + offset)
+    scored['category'] = _CATEGORY_LOOKUP[class_index]
+    scored['probability'] = proba[np.arange(len(proba)), class_index]
+    scored['severity'] = proba @ _SEVERITY_WEIGHTS
+    return scored
+
+
+def cleanest_window(scored, hours=1, first_hour=None, last_hour=None):
+    """
+    Mencari `hours` jam berturut-turut dengan rata-rata skor keparahan terendah
+    (jika sama, yang paling awal).
+    Args:
+        scored (pd.DataFrame): Hasil score_forecast.
+        hours (int): Lama aktivitas dalam jam.
+        first_hour, last_hour (int): Batas jam lokal (0-23) aktivitas boleh dilakukan, mis. 6 dan 18;
+            jendela tidak boleh melewati batas ini.
+    Returns:
+        dict: `start`, `end`, `severity` rata-rata dan `category` terburuk di jendela, atau None.
+    """
+    hours = max(1, int(hours))
+    if len(scored) < hours:
+        return None
+    severity = scored['severity'].to_numpy(dtype=np.float64)
+    window_mean = np.convolve(severity, np.ones(hours) / hours, mode='valid')
+
+    allowed = np.ones(len(scored), dtype=bool)
+    if first_hour is not None and last_hour is not None:
+        hour_of_day = scored['time'].dt.hour.to_numpy()
+        allowed = (hour_of_day >= first_hour) & (hour_of_day < last_hour)
+    # Jendela valid hanya jika semua jam di dalamnya diizinkan
+    valid = np.convolve(allowed.astype(np.int32), np.ones(hours, dtype=np.int32), mode='valid') == hours
+    if not valid.any():
+        return None
+
+    start = int(np.argmin(np.where(valid, window_mean, np.inf)))
+    window = scored.iloc[start:start + hours]
+    worst = window['category'].iloc[int(np.argmax(window['severity'].to_numpy()))]
+    return {
+        'start': window['time'].iloc[0],
+        'end': window['time'].iloc[-1] + pd.Timedelta(hours=1),
+        'severity': float(window_mean[start]),
+        'category': worst,
+    }
+
+
+def main(argv=None):
+    from pollucare.inference import DEFAULT_NPZ_PATH, load_model
+
+    parser = argparse.ArgumentParser(description="Prakiraan kategori AQI per jam untuk satu lokasi.")
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--hours", type=int, default=1, help="Lama aktivitas (jam) untuk jendela terbersih.")
+    parser.add_argument("--model", default=DEFAULT_NPZ_PATH)
+    parser.add_argument("--api-key", default=os.environ.get("OPENWEATHER_API_KEY"))
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("API key OpenWeather dibutuhkan (--api-key atau env OPENWEATHER_API_KEY).")
+
+    forecast = openweather.fetch_air_pollution_forecast(args.lat, args.lon, args.api_key)
+    if forecast is None:
+        print("Data prakiraan tidak tersedia.")
+        return
+    model = load_model(args.model)
+    start = time.perf_counter()
+    scored = score_forecast(model, forecast, args.lon)
+    elapsed = time.perf_counter() - start
+    print(scored[['time', 'category', 'probability', 'severity']].to_string(index=False))
+    print(f"{len(scored)} jam diprediksi dalam {elapsed * 1000:.2f} ms")
+    window = cleanest_window(scored, args.hours)
+    if window:
+        print(f"Jendela terbersih: {window['start']:%d %b %H:%M} - {window['end']:%H:%M} ({window['category']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Gazetteer lokal dari aqi_raw.csv untuk geocoding tanpa jaringan.
+
+Setiap pasangan unik (Country, City, lat, lng) disimpan sebagai beberapa file `.npy` yang dibuka
+dengan memory map (`np.load(..., mmap_mode='r')`), sehingga proses Streamlit mana pun bisa
+memakainya tanpa menyalin data ke memori:
+    - keys.npy: nama kota ternormalisasi (huruf kecil, aksen dan tanda baca dibuang), terurut,
+    - cities.npy / countries.npy: nama asli untuk ditampilkan,
+    - coords.npy: float32 (n, 2) lintang-bujur dengan urutan yang sama seperti keys,
+    - lat_order.npy: permutasi baris terurut menurut lintang untuk reverse geocoding.
+Karena keys terurut, pencarian nama persis maupun prefix (typeahead) cukup dua `np.searchsorted`
+(setara menelusuri trie yang diratakan ke array). Reverse geocoding memotong satu pita lintang
+lalu menghitung jarak haversine secara vektor, sama seperti pollucare/hospital_index.py.
+
+Build offline (jika belum ada, gazetteer juga dibangun otomatis dari aqi_raw.csv saat pertama dipakai):
+    python -m pollucare.gazetteer build aqi_raw.csv
+Benchmark latensi:
+    python -m pollucare.gazetteer bench
+"""
+import argparse
+import os
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from pollucare.hospital_index import KM_PER_DEGREE_LAT, haversine_km
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RAW_PATH = os.path.join(REPO_DIR, "aqi_raw.csv")
+DEFAULT_GAZETTEER_PATH = os.environ.get("POLLUCARE_GAZETTEER", os.path.join(REPO_DIR, "data", "gazetteer"))
+
+# Nama kota yang sama bisa ada di beberapa negara; tanpa negara di query, negara ini didahulukan
+DEFAULT_COUNTRY = "Indonesia"
+
+# Klik peta lebih jauh dari ini dari kota terdekat tetap memakai reverse geocoding OpenWeather
+DEFAULT_REVERSE_RADIUS_KM = 10
+
+ARRAYS = ('keys', 'cities', 'countries', 'coords', 'lat_order')
+
+_gazetteer = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """'  São-Paulo ' -> 'sao paulo': aksen dibuang, huruf kecil, tanda baca menjadi spasi tunggal."""
+    text = unicodedata.normalize('NFKD', str(name or ''))
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+class Gazetteer:
+
+    def __init__(self, keys, cities, countries, coords, lat_order):
+        self.keys = keys
+        self.cities = cities
+        self.countries = countries
+        self.coords = coords
+        self.lat_order = lat_order
+        self.sorted_lat = np.asarray(coords[:, 0])[lat_order] if len(keys) else np.empty(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Membangun gazetteer dari DataFrame berkolom Country, City, lat, lng."""
+        df = df[['Country', 'City', 'lat', 'lng']].dropna(subset=['City', 'lat', 'lng']).copy()
+        df['Country'] = df['Country'].fillna('')
+        df['key'] = df['City'].map(normalize_name)
+        df = df[df['key'] != ''].drop_duplicates(['key', 'Country', 'lat', 'lng'])
+        df = df.sort_values(['key', 'Country'], kind='stable').reset_index(drop=True)
+        coords = df[['lat', 'lng']].to_numpy(dtype=np.float32)
+        return cls(
+            df['key'].to_numpy(dtype=str),
+            df['City'].to_numpy(dtype=str),
+            df['Country'].to_numpy(dtype=str),
+            coords,
+            np.argsort(coords[:, 0], kind='stable').astype(np.int32),
+        )
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_RAW_PATH):
+        import pandas as pd
+
+        return cls.from_frame(pd.read_csv(path, usecols=['Country', 'City', 'lat', 'lng']))
+
+    @classmethod
+    def load(cls, path=DEFAULT_GAZETTEER_PATH):
+        return cls(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in ARRAYS))
+
+    def save(self, path=DEFAULT_GAZETTEER_PATH):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(getattr(self, name)))
+
+    def _range(self, key, prefix=False):
+        if not key:
+            return 0, 0
+        upper = key + "\U0010ffff" if prefix else key
+        start = int(np.searchsorted(self.keys, key, side='left'))
+        stop = int(np.searchsorted(self.keys, upper, side='right'))
+        return start, stop
+
+    def _pick(self, start, stop, country=None):
+        """
+        Baris terbaik di antara kandidat dengan nama sama: negara dari query (cukup sebagian nama,
+        mis. "bolivia" untuk "Bolivia (Plurinational State of)"), lalu DEFAULT_COUNTRY.
+        Kolom Country di aqi_raw.csv tidak selalu benar untuk nama yang dipakai banyak kota
+        (mis. semua "Santa Cruz" tercatat di Costa Rica), jadi nama ambigu tanpa kecocokan
+        mengembalikan None agar pemanggil memakai geocoding OpenWeather.
+        """
+        if stop - start == 1 and not country:
+            return start
+        countries = [normalize_name(c) for c in self.countries[start:stop]]
+        wanted = country or normalize_name(DEFAULT_COUNTRY)
+        for offset, candidate in enumerate(countries):
+            if wanted in candidate:
+                return start + offset
+        return None
+
+    def lookup(self, query):
+        """
+        Koordinat kota dari nama, mis. "Pekanbaru" atau "Santa Cruz, Bolivia".
+        Returns:
+            tuple: (lat, lon) atau (None, None) jika nama tidak ada di gazetteer.
+        """
+        name, _, country = str(query or '').partition(',')
+        start, stop = self._range(normalize_name(name))
+        if start == stop:
+            return None, None
+        row = self._pick(start, stop, normalize_name(country))
+        if row is None:
+            return None, None
+        lat, lon = self.coords[row]
+        return float(lat), float(lon)
+
+    def suggest(self, prefix, limit=5):
+        """Nama kota (dengan negara) yang diawali `prefix`, untuk typeahead."""
+        start, stop = self._range(normalize_name(prefix), prefix=True)
+        rows = range(start, min(stop, start + limit))
+        return [f"{self.cities[i]}, {self.countries[i]}" if self.countries[i] else str(self.cities[i]) for i in rows]
+
+    def nearest(self, latitude, longitude, max_km=DEFAULT_REVERSE_RADIUS_KM):
+        """
+        Kota terdekat dalam radius `max_km`.
+        Returns:
+            tuple: (nama kota, jarak_km) atau (None, None).
+        """
+        dlat = max_km / KM_PER_DEGREE_LAT
+        start, stop = np.searchsorted(self.sorted_lat, [latitude - dlat, latitude + dlat])
+        if start == stop:
+            return None, None
+        rows = np.asarray(self.lat_order[start:stop])
+        distances = haversine_km(latitude, longitude, self.coords[rows, 0], self.coords[rows, 1])
+        best = int(np.argmin(distances))
+        if distances[best] > max_km:
+            return None, None
+        return str(self.cities[rows[best]]), float(distances[best])
+
+
+def build(raw_path=DEFAULT_RAW_PATH, path=DEFAULT_GAZETTEER_PATH):
+    gazetteer = Gazetteer.from_csv(raw_path)
+    gazetteer.save(path)
+    return gazetteer
+
+
+def get_gazetteer():
+    """
+    Gazetteer bersama, dimuat sekali per proses. Jika file belum dibangun, dibangun dari aqi_raw.csv
+    (dan disimpan bila direktorinya bisa ditulis). None jika keduanya tidak tersedia.
+    """
+    global _gazetteer, _gazetteer_loaded
+    with _gazetteer_lock:
+        if not _gazetteer_loaded:
+            if os.path.exists(os.path.join(DEFAULT_GAZETTEER_PATH, "keys.npy")):
+                _gazetteer = Gazetteer.load(DEFAULT_GAZETTEER_PATH)
+            elif os.path.exists(DEFAULT_RAW_PATH):
+                _gazetteer = Gazetteer.from_csv(DEFAULT_RAW_PATH)
+                try:
+                    _gazetteer.save(DEFAULT_GAZETTEER_PATH)
+                    _gazetteer = Gazetteer.load(DEFAULT_GAZETTEER_PATH)
+                except OSError:
+                    pass
+            _gazetteer_loaded = True
+        return _gazetteer
+
+
+def lookup(city_name):
+    gazetteer = get_gazetteer()
+    return gazetteer.lookup(city_name) if gazetteer is not None else (None, None)
+
+
+def nearest_city(latitude, longitude, max_km=DEFAULT_REVERSE_RADIUS_KM):
+    gazetteer = get_gazetteer()
+    return gazetteer.nearest(latitude, longitude, max_km)[0] if gazetteer is not None else None
+
+
+def suggest(prefix, limit=5):
+    gazetteer = get_gazetteer()
+    return gazetteer.suggest(prefix, limit) if gazetteer is not None else []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gazetteer kota lokal dari aqi_raw.csv.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = sub.add_parser("build", help="Bangun file gazetteer dari CSV mentah.")
+    build_parser.add_argument("raw", nargs="?", default=DEFAULT_RAW_PATH)
+    build_parser.add_argument("-o", "--output", default=DEFAULT_GAZETTEER_PATH)
+
+    bench = sub.add_parser("bench", help="Ukur latensi lookup, typeahead dan reverse geocoding.")
+    bench.add_argument("--queries", type=int, default=20000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        gazetteer = build(args.raw, args.output)
+        print(f"{len(gazetteer)} kota disimpan ke {args.output} dalam {time.perf_counter() - start:.2f} s")
+    else:
+        start = time.perf_counter()
+        gazetteer = get_gazetteer()
+        print(f"Muat {len(gazetteer)} kota: {(time.perf_counter() - start) * 1000:.1f} ms")
+        rng = np.random.default_rng(0)
+        rows = rng.integers(0, len(gazetteer), args.queries)
+        names = [str(gazetteer.cities[i]).upper() for i in rows]
+        points = np.asarray(gazetteer.coords)[rows] + rng.normal(0, 0.02, (args.queries, 2))
+
+        for label, fn, inputs in (
+            ("Lookup nama", gazetteer.lookup, names),
+            ("Typeahead 3 huruf", gazetteer.suggest, [name[:3] for name in names]),
+            ("Kota terdekat", lambda p: gazetteer.nearest(p[0], p[1]), points),
+        ):
+            start = time.perf_counter()
+            for value in inputs:
+                fn(value)
+            elapsed = (time.perf_counter() - start) / args.queries
+            print(f"{label}: {elapsed * 1e6:.1f} µs rata-rata")
+
+
+if __name__ == "__main__":
+    main()
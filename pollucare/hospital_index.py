@@ -0,0 +1,344 @@
+"""
+Indeks spasial lokal untuk pencarian rumah sakit terdekat.
+
+Ekstrak OSM (JSON hasil Overpass atau file .pbf jika paket `osmium` terpasang) diimpor sekali:
+filter nama, normalisasi, dan dedup dilakukan saat build, lalu disimpan ke `.npz`.
+Titik diurutkan berdasarkan lintang sehingga query radius cukup memotong satu pita lintang
+dengan `np.searchsorted` lalu menghitung jarak haversine secara vektor di pita tersebut.
+
+Build dari ekstrak, atau perbarui dari Overpass untuk satu bounding box:
+    python -m pollucare.hospital_index build indonesia-hospitals.json
+    python -m pollucare.hospital_index refresh --bbox -11.2,94.7,6.3,141.1
+Benchmark latensi query pada ekstrak sintetis, dibandingkan dengan post-processing lama
+(loop geodesic dan dedup O(n²) atas elemen hasil Overpass):
+    python -m pollucare.hospital_index bench --points 500000
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from pollucare import geogrid
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "POLLUCARE_HOSPITAL_INDEX",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "hospital_index.npz")
+)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = np.pi * EARTH_RADIUS_KM / 180.0
+
+# Dua entri dengan nama ternormalisasi sama di sel geohash yang sama dianggap duplikat
+DEDUP_PRECISION = 5
+
+REFRESH_QUERY = """
+[out:json][timeout:180];
+nwr["amenity"="hospital"]["name"]({south},{west},{north},{east});
+out center;
+"""
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def normalize_name(name):
+    return name.lower().replace(" ", "")
+
+
+def parse_element(element):
+    """
+    Mengambil (lat, lon, nama, alamat) dari satu elemen OSM dengan filter yang sama seperti
+    pencarian Overpass di app.py. Mengembalikan None jika elemen tidak relevan.
+    """
+    lat_hosp = element.get('lat')
+    lon_hosp = element.get('lon')
+    if 'center' in element: # Untuk way/relation, ambil koordinat dari center
+        lat_hosp = element['center'].get('lat')
+        lon_hosp = element['center'].get('lon')
+    if lat_hosp is None or lon_hosp is None:
+        return None
+
+    tags = element.get('tags', {})
+    name = tags.get('name', 'Nama Tidak Diketahui').strip()
+
+    address_parts = []
+    for key in ('addr:housenumber', 'addr:street', 'addr:subdistrict', 'addr:city', 'addr:postcode'):
+        if tags.get(key):
+            address_parts.append(tags[key])
+    address = ", ".join(address_parts) if address_parts else "Alamat tidak tersedia"
+
+    # 1. Pastikan nama tidak kosong atau generik
+    if not name or name == 'Nama Tidak Diketahui' or name.lower() in ['unknown', 'hospital']:
+        return None
+    # 2. Filter apotek atau klinik murni (yang tidak mengandung "rumah sakit")
+    if "apotek" in name.lower() or "klinik" in name.lower() and "rumah sakit" not in name.lower():
+        return None
+    return float(lat_hosp), float(lon_hosp), name, address
+
+
+class HospitalIndex:
+
+    def __init__(self, lat, lon, names, addresses, bbox=None):
+        order = np.argsort(lat, kind='stable')
+        self.lat = np.asarray(lat, dtype=np.float64)[order]
+        self.lon = np.asarray(lon, dtype=np.float64)[order]
+        self.names = np.asarray(names, dtype=str)[order]
+        self.addresses = np.asarray(addresses, dtype=str)[order]
+        self.normalized = np.array([normalize_name(n) for n in self.names], dtype=str)
+        if bbox is None and len(self.lat):
+            bbox = (self.lat.min(), self.lon.min(), self.lat.max(), self.lon.max())
+        # Wilayah cakupan ekstrak (south, west, north, east); di luar ini pakai Overpass
+        self.bbox = tuple(float(v) for v in bbox) if bbox is not None else None
+
+    def __len__(self):
+        return len(self.lat)
+
+    @classmethod
+    def from_elements(cls, elements, bbox=None):
+        """Membangun indeks dari elemen OSM; filter dan dedup nama dilakukan sekali di sini."""
+        parsed = [p for p in map(parse_element, elements) if p is not None]
+        if not parsed:
+            return cls([], [], [], [], bbox=bbox)
+        lat, lon, names, addresses = (list(column) for column in zip(*parsed))
+        cell_lat, cell_lon = geogrid.snap(np.array(lat), np.array(lon), DEDUP_PRECISION)
+
+        keep = {}
+        for i, key in enumerate(zip(map(normalize_name, names), cell_lat.tolist(), cell_lon.tolist())):
+            keep.setdefault(key, i)
+        rows = sorted(keep.values())
+        lat = [lat[i] for i in rows]
+        lon = [lon[i] for i in rows]
+        names = [names[i] for i in rows]
+        addresses = [addresses[i] for i in rows]
+        return cls(lat, lon, names, addresses, bbox=bbox)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path) as data:
+            bbox = tuple(data['bbox']) if data['bbox'].size else None
+            return cls(data['lat'], data['lon'], data['names'], data['addresses'], bbox=bbox)
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path, lat=self.lat, lon=self.lon, names=self.names, addresses=self.addresses,
+            bbox=np.array(self.bbox if self.bbox else [], dtype=np.float64)
+        )
+
+    def covers(self, latitude, longitude):
+        if self.bbox is None:
+            return False
+        south, west, north, east = self.bbox
+        return south <= latitude <= north and west <= longitude <= east
+
+    def nearest(self, latitude, longitude, radius_km=10, limit=5):
+        """
+        Posisi rumah sakit dalam radius tertentu, terurut dari yang terdekat.
+        Returns:
+            list: Tuple (posisi di indeks, jarak_km), paling banyak `limit` dengan nama unik.
+        """
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        start, stop = np.searchsorted(self.lat, [latitude - dlat, latitude + dlat])
+        if start == stop:
+            return []
+        distances = haversine_km(latitude, longitude, self.lat[start:stop], self.lon[start:stop])
+        inside = np.flatnonzero(distances <= radius_km)
+        if len(inside) == 0:
+            return []
+        inside = inside[np.argsort(distances[inside], kind='stable')]
+
+        results = []
+        added = set()
+        for i in inside:
+            normalized = self.normalized[start + i]
+            if normalized in added:
+                continue
+            added.add(normalized)
+            results.append((start + i, float(distances[i])))
+            if len(results) >= limit:
+                break
+        return results
+
+    def query(self, latitude, longitude, radius_km=10, limit=5):
+        """
+        Rumah sakit dalam radius tertentu, terurut dari yang terdekat.
+        Returns:
+            list: Tuple (nama, alamat, jarak_km), paling banyak `limit` dengan nama unik.
+        """
+        return [(str(self.names[i]), str(self.addresses[i]), distance)
+                for i, distance in self.nearest(latitude, longitude, radius_km, limit)]
+
+    def records(self, latitude, longitude, radius_km=10, limit=5):
+        """Seperti `query`, tetapi sebagai dict dengan koordinat (untuk API JSON)."""
+        return [
+            {
+                "name": str(self.names[i]),
+                "address": str(self.addresses[i]),
+                "lat": float(self.lat[i]),
+                "lon": float(self.lon[i]),
+                "distance_km": round(distance, 3),
+            }
+            for i, distance in self.nearest(latitude, longitude, radius_km, limit)
+        ]
+
+
+def read_osm_extract(path):
+    """Membaca elemen rumah sakit dari JSON Overpass ({"elements": [...]}) atau file .pbf (butuh osmium)."""
+    if path.endswith(".pbf"):
+        return list(_read_pbf(path))
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get('elements', [])
+
+
+def _read_pbf(path):
+    import osmium
+
+    class Handler(osmium.SimpleHandler):
+        def __init__(self):
+            super().__init__()
+            self.elements = []
+
+        def node(self, n):
+            if n.tags.get('amenity') == 'hospital':
+                self.elements.append({'lat': n.location.lat, 'lon': n.location.lon, 'tags': {t.k: t.v for t in n.tags}})
+
+        def way(self, w):
+            if w.tags.get('amenity') == 'hospital':
+                coords = [(node.lat, node.lon) for node in w.nodes if node.location.valid()]
+                if coords:
+                    lat, lon = np.mean(coords, axis=0)
+                    self.elements.append({'center': {'lat': lat, 'lon': lon}, 'tags': {t.k: t.v for t in w.tags}})
+
+    handler = Handler()
+    handler.apply_file(path, locations=True)
+    return handler.elements
+
+
+def refresh_from_overpass(bbox, path=DEFAULT_INDEX_PATH):
+    from pollucare.hospitals import OVERPASS_URL
+    from pollucare.httpclient import DEFAULT_CONNECT_TIMEOUT, get_client
+
+    south, west, north, east = bbox
+    query = REFRESH_QUERY.format(south=south, west=west, north=north, east=east)
+    response = get_client().post(OVERPASS_URL, data=query, timeout=(DEFAULT_CONNECT_TIMEOUT, 300))
+    response.raise_for_status()
+    index = HospitalIndex.from_elements(response.json().get('elements', []), bbox=bbox)
+    index.save(path)
+    return index
+
+
+def synthetic_elements(points, seed=42):
+    """Ekstrak sintetis: sebagian besar titik mengelompok di sekitar 'kota', sisanya acak global."""
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack([rng.uniform(-60, 70, 2000), rng.uniform(-180, 180, 2000)])
+    clustered = int(points * 0.9)
+    idx = rng.integers(0, len(centers), clustered)
+    lat = np.concatenate([centers[idx, 0] + rng.normal(0, 0.2, clustered), rng.uniform(-60, 70, points - clustered)])
+    lon = np.concatenate([centers[idx, 1] + rng.normal(0, 0.2, clustered), rng.uniform(-180, 180, points - clustered)])
+    return [
+        {'lat': float(a), 'lon': float(b), 'tags': {'name': f"Rumah Sakit {i}", 'addr:city': "Kota"}}
+        for i, (a, b) in enumerate(zip(lat, lon))
+    ], centers
+
+
+def legacy_search(elements, latitude, longitude, limit=5):
+    """
+    Post-processing `search_nearby_hospitals` lama di app.py atas elemen yang dikembalikan Overpass:
+    jarak geodesic per elemen, dedup nama dengan memindai seluruh daftar, lalu sort. Hanya untuk bench.
+    """
+    from geopy.distance import geodesic
+
+    found_hospitals_raw = []
+    user_coords = (latitude, longitude)
+    for element in elements:
+        parsed = parse_element(element)
+        if parsed is None:
+            continue
+        lat_hosp, lon_hosp, name, address = parsed
+        distance = geodesic(user_coords, (lat_hosp, lon_hosp)).km
+        normalized_name = normalize_name(name)
+        if normalized_name in [normalize_name(h[0]) for h in found_hospitals_raw]:
+            continue
+        found_hospitals_raw.append((name, address, distance, normalized_name))
+    found_hospitals_raw.sort(key=lambda x: x[2])
+
+    hospitals = []
+    added_hospitals_normalized_names = set()
+    for name, address, distance, normalized_name in found_hospitals_raw:
+        if normalized_name in added_hospitals_normalized_names:
+            continue
+        hospitals.append((name, address, distance))
+        added_hospitals_normalized_names.add(normalized_name)
+        if len(hospitals) >= limit:
+            break
+    return hospitals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indeks lokal rumah sakit dari ekstrak OSM.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Bangun indeks dari JSON Overpass atau file .pbf.")
+    build.add_argument("extract")
+    build.add_argument("-o", "--output", default=DEFAULT_INDEX_PATH)
+
+    refresh = sub.add_parser("refresh", help="Bangun ulang indeks dari Overpass untuk satu bounding box.")
+    refresh.add_argument("--bbox", required=True, help="south,west,north,east")
+    refresh.add_argument("-o", "--output", default=DEFAULT_INDEX_PATH)
+
+    bench = sub.add_parser("bench", help="Ukur latensi query pada ekstrak sintetis.")
+    bench.add_argument("--points", type=int, default=500000)
+    bench.add_argument("--queries", type=int, default=2000)
+    bench.add_argument("--baseline-queries", type=int, default=200,
+                       help="Jumlah query untuk post-processing lama (lambat, geodesic per elemen).")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = HospitalIndex.from_elements(read_osm_extract(args.extract))
+        index.save(args.output)
+        print(f"{len(index)} rumah sakit disimpan ke {args.output}")
+    elif args.command == "refresh":
+        bbox = tuple(float(v) for v in args.bbox.split(","))
+        index = refresh_from_overpass(bbox, args.output)
+        print(f"{len(index)} rumah sakit disimpan ke {args.output}")
+    else:
+        elements, centers = synthetic_elements(args.points)
+        start = time.perf_counter()
+        index = HospitalIndex.from_elements(elements)
+        print(f"Build {len(index)} titik: {time.perf_counter() - start:.2f} s")
+        rng = np.random.default_rng(0)
+        targets = centers[rng.integers(0, len(centers), args.queries)]
+        start = time.perf_counter()
+        for lat, lon in targets:
+            index.query(lat, lon, radius_km=10, limit=5)
+        elapsed = (time.perf_counter() - start) / args.queries
+        print(f"Query radius 10 km, limit 5: {elapsed * 1e6:.1f} µs rata-rata")
+
+        # Baseline: elemen dalam radius seperti yang dikembalikan filter `around` Overpass (tidak diukur),
+        # lalu post-processing lama di sisi klien
+        lats = np.array([element['lat'] for element in elements])
+        lons = np.array([element['lon'] for element in elements])
+        baseline_targets = targets[:args.baseline_queries]
+        responses = [[elements[i] for i in np.flatnonzero(haversine_km(lat, lon, lats, lons) <= 10)]
+                     for lat, lon in baseline_targets]
+        start = time.perf_counter()
+        for (lat, lon), response in zip(baseline_targets, responses):
+            legacy_search(response, lat, lon, limit=5)
+        legacy_elapsed = (time.perf_counter() - start) / len(baseline_targets)
+        mean_elements = sum(map(len, responses)) / len(responses)
+        print(f"Post-processing lama ({mean_elements:.0f} elemen/respon rata-rata): "
+              f"{legacy_elapsed * 1e6:.1f} µs rata-rata ({legacy_elapsed / elapsed:.0f}x indeks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Pencarian rumah sakit terdekat, tanpa ketergantungan ke Streamlit.
+
+Jika indeks lokal (pollucare/hospital_index.py) tersedia dan mencakup lokasi, query dijawab
+langsung dari indeks tanpa jaringan. Di luar cakupan indeks, Overpass API (OpenStreetMap)
+dipakai sebagai cadangan. Error jaringan dilempar sebagai `requests.exceptions.RequestException`.
+`search_hospitals` mengembalikan data terstruktur (untuk API JSON), `find_nearby_hospitals`
+teks markdown yang ditampilkan app.py.
+"""
+import os
+import threading
+
+from pollucare.cache import cached
+from pollucare.hospital_index import DEFAULT_INDEX_PATH, HospitalIndex
+from pollucare.httpclient import DEFAULT_CONNECT_TIMEOUT, get_client
+
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+
+# Overpass bisa lambat untuk radius besar, jadi batas baca-nya lebih longgar dari default klien HTTP
+OVERPASS_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, 30)
+
+NO_HOSPITALS_FOUND = ["Tidak ditemukan rumah sakit di sekitar lokasi ini."]
+
+_local_index = None
+_local_index_loaded = False
+_local_index_lock = threading.Lock()
+
+
+def get_local_index():
+    """Indeks rumah sakit lokal, dimuat sekali per proses. None jika file indeks belum dibangun."""
+    global _local_index, _local_index_loaded
+    with _local_index_lock:
+        if not _local_index_loaded:
+            _local_index = HospitalIndex.load(DEFAULT_INDEX_PATH) if os.path.exists(DEFAULT_INDEX_PATH) else None
+            _local_index_loaded = True
+        return _local_index
+
+
+def format_hospitals(records):
+    return [f"- **{r['name']}**, Alamat: {r['address']}, Jarak: {r['distance_km']:.2f} km" for r in records]
+
+
+@cached("hospital_records", ttl=7200)
+def fetch_nearby_hospitals(latitude, longitude, radius_km=10, limit=5):
+    """Rumah sakit dari Overpass (dict seperti HospitalIndex.records), terurut dari yang terdekat."""
+    overpass_query = f"""
+    [out:json];
+    (
+      node["amenity"="hospital"]["name"](around:{radius_km*1000},{latitude},{longitude});
+      way["amenity"="hospital"]["name"](around:{radius_km*1000},{latitude},{longitude});
+      relation["amenity"="hospital"]["name"](around:{radius_km*1000},{latitude},{longitude});
+    );
+    out center;
+    """
+
+    response = get_client().post(OVERPASS_URL, data=overpass_query, timeout=OVERPASS_TIMEOUT)
+    response.raise_for_status() # Tangani HTTP errors (4xx, 5xx)
+    data = response.json()
+
+    if not (data and data['elements']):
+        return []
+
+    # Hasil Overpass diproses dengan indeks sementara: filter, dedup, dan jarak dihitung secara vektor
+    return HospitalIndex.from_elements(data['elements']).records(latitude, longitude, radius_km, limit)
+
+
+def search_hospitals(latitude, longitude, radius_km=10, limit=5):
+    """
+    Rumah sakit terdekat sebagai data terstruktur.
+    Returns:
+        list: Dict dengan `name`, `address`, `lat`, `lon` dan `distance_km`, terurut dari yang terdekat.
+    """
+    index = get_local_index()
+    if index is not None and index.covers(latitude, longitude):
+        return index.records(latitude, longitude, radius_km, limit)
+    return fetch_nearby_hospitals(latitude, longitude, radius_km, limit)
+
+
+def find_nearby_hospitals(latitude, longitude, radius_km=10, limit=5):
+    return format_hospitals(search_hospitals(latitude, longitude, radius_km, limit)) or NO_HOSPITALS_FOUND
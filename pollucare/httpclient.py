@@ -0,0 +1,227 @@
+"""
+Klien HTTP bersama untuk semua pemanggilan API eksternal (OpenWeather, Overpass).
+
+- Satu `requests.Session` dengan pool koneksi per host (keep-alive, koneksi dipakai ulang).
+- Timeout connect/read default untuk setiap request agar tidak ada panggilan yang menggantung.
+- Retry eksponensial dengan jitter untuk error koneksi, timeout, 429 dan 5xx, menghormati `Retry-After`.
+- Circuit breaker per host: setelah beberapa request berturut-turut gagal (dihitung sekali per
+  request setelah retry habis, bukan per percobaan), request ke host tersebut langsung gagal
+  (CircuitOpenError) sampai masa tunggu habis.
+- Metrik sederhana lewat `HttpClient.metrics()`.
+
+Semua error dilempar sebagai turunan `requests.exceptions.RequestException`, sehingga
+penanganan error yang sudah ada di app.py tetap berlaku.
+"""
+import email.utils
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from pollucare import replay
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("POLLUCARE_HTTP_CONNECT_TIMEOUT", 3.05))
+DEFAULT_READ_TIMEOUT = float(os.environ.get("POLLUCARE_HTTP_READ_TIMEOUT", 10))
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Dilempar tanpa menghubungi host ketika circuit breaker host tersebut sedang terbuka."""
+
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            # Saat half-open hanya satu request percobaan yang diizinkan
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def _parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_to_datetime(value)
+    if parsed is None:
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+class HttpClient:
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, max_retry_after=30.0,
+                 pool_connections=10, pool_maxsize=20, failure_threshold=5, reset_timeout=30.0,
+                 sleep=time.sleep):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._sleep = sleep
+
+        # Retry ditangani sendiri (bukan oleh urllib3) agar bisa dihitung dan digabung dengan circuit breaker
+        self.session = requests.Session()
+        # Dengan POLLUCARE_REPLAY=record/replay respon direkam ke / diputar dari fixture (pollucare/replay.py)
+        adapter = replay.http_adapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._adapter = adapter
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "attempts": 0, "retries": 0, "failures": 0, "circuit_rejections": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def _backoff(self, attempt, response=None):
+        """Lama jeda sebelum retry berikutnya; None berarti tidak perlu retry lagi."""
+        if response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        # Full jitter: acak antara 0 dan batas eksponensial
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, **kwargs):
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        self._count("requests")
+
+        # Izin breaker diminta sekali per request; saat half-open, request ini memegang slot percobaan
+        # sampai semua retry-nya selesai
+        if not breaker.allow():
+            self._count("circuit_rejections")
+            raise CircuitOpenError(f"Circuit breaker untuk {host} sedang terbuka.")
+
+        attempt = 0
+        while True:
+            self._count("attempts")
+            response, error = None, None
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except BaseException:
+                # Error di sisi pemanggil (URL tidak valid, dsb.) atau exception lain (adapter replay,
+                # decoding urllib3) bukan tanda host bermasalah, tetapi request percobaan half-open
+                # harus dilepas; tanpa itu host tersebut ditolak selamanya
+                breaker.release_trial()
+                raise
+
+            if error is None and response.status_code not in RETRY_STATUS_CODES:
+                breaker.record_success()
+                return response
+
+            delay = self._backoff(attempt, response) if attempt < self.max_retries else None
+            if delay is not None and breaker.state == "open":
+                # Circuit dibuka request lain selama retry: hasil percobaan terakhir dikembalikan
+                self._count("circuit_rejections")
+                delay = None
+            if delay is None:
+                breaker.record_failure()
+                self._count("failures")
+                if error is not None:
+                    raise error
+                return response
+
+            self._count("retries")
+            self._sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Penghitung request/retry/kegagalan, jumlah koneksi baru vs dipakai ulang,
+            serta status circuit breaker per host.
+        """
+        with self._lock:
+            result = dict(self._counters)
+            breakers = dict(self._breakers)
+        pools = self._adapter.poolmanager.pools
+        connections = 0
+        pooled_requests = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+        result["connections_opened"] = connections
+        result["connections_reused"] = max(0, pooled_requests - connections)
+        result["circuit_state"] = {host: b.state for host, b in breakers.items()}
+        return result
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client():
+    """Klien bersama untuk seluruh proses (dipakai oleh app.py dan modul pollucare lainnya)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
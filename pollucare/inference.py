@@ -0,0 +1,372 @@
+"""
+Inferensi DNN kualitas udara menggunakan NumPy murni.
+
+Model Keras (Dense 64 -> Dropout -> Dense 32 -> Dropout -> Dense softmax) hanya
+dibutuhkan saat training. Untuk serving, bobot Dense diekspor ke file `.npz`
+dan forward pass dijalankan dengan perkalian matriks NumPy (Dropout tidak aktif
+saat inferensi sehingga dihilangkan).
+
+Artefak serving lain dari `modelling.py --export` (TFLite int8/float16 dan varian pruned) dimuat
+lewat `load_model`, yang memilih runtime dari ekstensi file dan selalu mengembalikan objek dengan
+`predict(x)` berisi probabilitas per kelas.
+
+Ekspor bobot dan cek kesamaan hasil dengan Keras:
+    python -m pollucare.inference --verify MLProject/aqi_preprocessing.csv --bench
+Bandingkan ukuran, waktu muat, latensi dan akurasi semua varian yang ada:
+    python -m pollucare.inference --compare
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MLProject", "models")
+DEFAULT_H5_PATH = os.path.join(MODELS_DIR, "air_quality_dnn_model.h5")
+DEFAULT_NPZ_PATH = os.path.join(MODELS_DIR, "air_quality_dnn_model.npz")
+
+# Nama varian -> artefak; dipakai oleh POLLUCARE_MODEL_BACKEND di app.py dan oleh --compare
+MODEL_VARIANTS = {
+    'keras': DEFAULT_H5_PATH,
+    'numpy': DEFAULT_NPZ_PATH,
+    'pruned': os.path.join(MODELS_DIR, "air_quality_dnn_model_pruned.npz"),
+    'tflite_float16': os.path.join(MODELS_DIR, "air_quality_dnn_model_float16.tflite"),
+    'tflite_int8': os.path.join(MODELS_DIR, "air_quality_dnn_model_int8.tflite"),
+}
+
+
+def _relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+
+def _softmax(x):
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'softmax': _softmax,
+    'linear': _linear,
+}
+
+
+class NumpyDNN:
+    """
+    Forward pass jaringan Dense berlapis dengan NumPy.
+    Antarmuka `predict` sengaja dibuat sama dengan `keras.Model.predict`
+    (mengembalikan probabilitas per kelas) agar bisa menggantikan model Keras di app.py.
+    """
+
+    def __init__(self, kernels, biases, activations):
+        if not (len(kernels) == len(biases) == len(activations)):
+            raise ValueError("Jumlah kernel, bias, dan aktivasi harus sama.")
+        for name in activations:
+            if name not in ACTIVATIONS:
+                raise ValueError(f"Aktivasi '{name}' tidak didukung.")
+        self.kernels = [np.ascontiguousarray(k, dtype=np.float32) for k in kernels]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+
+    @property
+    def num_features(self):
+        return self.kernels[0].shape[0]
+
+    @property
+    def num_classes(self):
+        return self.kernels[-1].shape[1]
+
+    @classmethod
+    def from_npz(cls, path):
+        with np.load(path) as data:
+            activations = [str(a) for a in data['activations']]
+            kernels = [data[f'kernel_{i}'] for i in range(len(activations))]
+            biases = [data[f'bias_{i}'] for i in range(len(activations))]
+        return cls(kernels, biases, activations)
+
+    @classmethod
+    def from_keras(cls, model):
+        """Bobot layer Dense dari model Keras yang sedang di memori (Dropout tidak ikut)."""
+        kernels, biases, activations = [], [], []
+        for layer in model.layers:
+            if type(layer).__name__ != 'Dense':
+                continue
+            kernel, bias = layer.get_weights()
+            kernels.append(kernel)
+            biases.append(bias)
+            activations.append(layer.activation.__name__)
+        return cls(kernels, biases, activations)
+
+    def save_npz(self, path):
+        arrays = {}
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        np.savez_compressed(path, activations=np.array(self.activations), **arrays)
+
+    def predict(self, x, **kwargs):
+        """
+        Menghitung probabilitas kelas untuk matriks input berukuran (n, num_features).
+        Argumen tambahan ala Keras (`verbose`, `batch_size`) diterima dan diabaikan.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            x = x @ kernel
+            x += bias
+            x = ACTIVATIONS[activation](x)
+        return x
+
+    def predict_classes(self, x):
+        return np.argmax(self.predict(x), axis=1)
+
+
+def _tflite_interpreter_class():
+    # Runtime LiteRT/tflite-runtime jauh lebih ringan dari TensorFlow penuh; TF hanya cadangan
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteDNN:
+    """
+    Pembungkus interpreter TFLite dengan antarmuka `predict` yang sama seperti NumpyDNN.
+    Input/output int8 (kuantisasi penuh) dikonversi otomatis memakai skala dan zero point model.
+    """
+
+    def __init__(self, path, num_threads=1):
+        self.interpreter = _tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = 1
+
+    @property
+    def num_features(self):
+        return int(self._input['shape'][-1])
+
+    def _resize(self, batch):
+        if batch != self._batch:
+            self.interpreter.resize_tensor_input(self._input['index'], [batch, self.num_features])
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch = batch
+
+    def predict(self, x, **kwargs):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        self._resize(len(x))
+        scale, zero_point = self._input['quantization']
+        if self._input['dtype'] != np.float32 and scale:
+            x = np.round(x / scale + zero_point)
+        self.interpreter.set_tensor(self._input['index'], x.astype(self._input['dtype']))
+        self.interpreter.invoke()
+        y = self.interpreter.get_tensor(self._output['index'])
+        scale, zero_point = self._output['quantization']
+        if self._output['dtype'] != np.float32 and scale:
+            y = (y.astype(np.float32) - zero_point) * scale
+        return y.astype(np.float32, copy=False)
+
+    def predict_classes(self, x):
+        return np.argmax(self.predict(x), axis=1)
+
+
+def load_model(path):
+    """
+    Memuat artefak model apa pun dengan satu antarmuka:
+    `.npz` -> NumpyDNN, `.tflite` -> TFLiteDNN, `.h5`/`.keras` -> model Keras (butuh TensorFlow).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npz":
+        return NumpyDNN.from_npz(path)
+    if extension == ".tflite":
+        return TFLiteDNN(path)
+    if extension in (".h5", ".keras"):
+        import tensorflow as tf
+
+        return tf.keras.models.load_model(path)
+    raise ValueError(f"Format model '{extension}' tidak dikenal.")
+
+
+def load_from_h5(h5_path):
+    """
+    Membaca bobot layer Dense langsung dari file `.h5` Keras menggunakan h5py,
+    tanpa perlu mengimpor TensorFlow.
+    """
+    import h5py
+
+    with h5py.File(h5_path, 'r') as f:
+        config = f.attrs['model_config']
+        if isinstance(config, bytes):
+            config = config.decode('utf-8')
+        layers = json.loads(config)['config']['layers']
+        weights_root = f['model_weights'] if 'model_weights' in f else f
+
+        kernels, biases, activations = [], [], []
+        for layer in layers:
+            if layer['class_name'] != 'Dense':
+                continue
+            name = layer['config']['name']
+            found = {}
+
+            def collect(path, obj):
+                leaf = path.split('/')[-1].split(':')[0]
+                if isinstance(obj, h5py.Dataset) and leaf in ('kernel', 'bias'):
+                    found[leaf] = obj[()]
+
+            weights_root[name].visititems(collect)
+            kernels.append(found['kernel'])
+            biases.append(found.get('bias', np.zeros(found['kernel'].shape[1], dtype=np.float32)))
+            activations.append(layer['config'].get('activation', 'linear'))
+
+    return NumpyDNN(kernels, biases, activations)
+
+
+def export_h5_to_npz(h5_path=DEFAULT_H5_PATH, npz_path=DEFAULT_NPZ_PATH):
+    model = load_from_h5(h5_path)
+    model.save_npz(npz_path)
+    return model
+
+
+def _verify_against_keras(model, h5_path, csv_path, features):
+    import pandas as pd
+    import tensorflow as tf
+
+    X = pd.read_csv(csv_path, usecols=features)[features].to_numpy(dtype=np.float32)
+    keras_model = tf.keras.models.load_model(h5_path)
+    expected = keras_model.predict(X, batch_size=4096, verbose=0)
+    actual = model.predict(X)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    agreement = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    return len(X), max_abs_diff, agreement, keras_model
+
+
+def _mean_latency_ms(fn, x, repeat):
+    fn(x)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(x)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _load_test_split():
+    """Split test yang sama dengan modelling.py bila scikit-learn tersedia; jika tidak, seluruh dataset."""
+    from pollucare.constants import FEATURES_USED_IN_TRAINING
+    from pollucare.preprocessing import TARGET, load_dataset
+
+    df = load_dataset(columns=FEATURES_USED_IN_TRAINING + [TARGET])
+    X = df[FEATURES_USED_IN_TRAINING].to_numpy(dtype=np.float32)
+    y = df[TARGET].to_numpy()
+    try:
+        from sklearn.model_selection import train_test_split
+    except ImportError:
+        return X, y, "seluruh dataset"
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    return X_test, y_test, "split test"
+
+
+def _median_latency_ms(fn, x, repeat):
+    fn(x)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(x)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def compare_variants(variants=MODEL_VARIANTS, repeat=200):
+    """
+    Mengukur setiap artefak yang ada: ukuran, waktu muat, latensi 1 baris dan 1 batch, akurasi,
+    serta kesamaan kelas dengan model float32 NumPy.
+    Returns:
+        list: Dict per varian.
+    """
+    X, y, split = _load_test_split()
+    reference = NumpyDNN.from_npz(DEFAULT_NPZ_PATH).predict_classes(X) if os.path.exists(DEFAULT_NPZ_PATH) else None
+    rows = []
+    for name, path in variants.items():
+        if not os.path.exists(path):
+            continue
+        start = time.perf_counter()
+        try:
+            model = load_model(path)
+        except ImportError as e:
+            print(f"Lewati {name}: {e}")
+            continue
+        load_ms = (time.perf_counter() - start) * 1000
+        predict = (lambda x, m=model: m.predict(x, verbose=0)) if name == 'keras' else model.predict
+        predicted = np.argmax(predict(X), axis=1)
+        rows.append({
+            'variant': name,
+            'size_kb': os.path.getsize(path) / 1024,
+            'load_ms': load_ms,
+            'row_ms': _median_latency_ms(predict, X[:1], repeat if name != 'keras' else 20),
+            'batch_ms': _median_latency_ms(predict, X, max(3, repeat // 20)),
+            'accuracy': float(np.mean(predicted == y)),
+            'agreement': float(np.mean(predicted == reference)) if reference is not None else float('nan'),
+        })
+    print(f"{len(X)} baris ({split}); batch = seluruh baris sekaligus")
+    print(f"{'varian':<16}{'ukuran KB':>10}{'muat ms':>10}{'1 baris ms':>12}{'batch ms':>10}{'akurasi':>9}{'sama f32':>10}")
+    for row in rows:
+        print(f"{row['variant']:<16}{row['size_kb']:>10.1f}{row['load_ms']:>10.1f}{row['row_ms']:>12.4f}"
+              f"{row['batch_ms']:>10.2f}{row['accuracy']:>9.4f}{row['agreement']:>10.4f}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor bobot DNN Keras ke .npz untuk inferensi NumPy.")
+    parser.add_argument("--h5", default=DEFAULT_H5_PATH)
+    parser.add_argument("--npz", default=DEFAULT_NPZ_PATH)
+    parser.add_argument("--verify", metavar="CSV", help="Bandingkan output NumPy dengan Keras pada seluruh baris CSV.")
+    parser.add_argument("--atol", type=float, default=1e-5)
+    parser.add_argument("--bench", action="store_true", help="Ukur latensi prediksi satu baris.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Bandingkan semua varian model yang ada (tanpa ekspor ulang).")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare_variants()
+        return
+
+    model = export_h5_to_npz(args.h5, args.npz)
+    print(f"Bobot diekspor ke {args.npz} ({os.path.getsize(args.npz)} bytes)")
+
+    keras_model = None
+    if args.verify:
+        from pollucare.constants import FEATURES_USED_IN_TRAINING
+
+        rows, max_abs_diff, agreement, keras_model = _verify_against_keras(
+            model, args.h5, args.verify, FEATURES_USED_IN_TRAINING
+        )
+        print(f"Parity {rows} baris: selisih maksimum {max_abs_diff:.2e}, kesamaan kelas {agreement:.4%}")
+        if max_abs_diff > args.atol:
+            raise SystemExit(f"Output NumPy berbeda dari Keras (> {args.atol}).")
+
+    if args.bench:
+        row = np.array([[1.0, 30.0, 5.0, 50.0]], dtype=np.float32)
+        print(f"NumPy predict 1 baris: {_mean_latency_ms(model.predict, row, 10000):.4f} ms")
+        if keras_model is not None:
+            keras_ms = _mean_latency_ms(lambda x: keras_model.predict(x, verbose=0), row, 50)
+            print(f"Keras predict 1 baris: {keras_ms:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Uji beban untuk layanan HTTP (pollucare/service.py).
+
+Setiap klien virtual memakai satu koneksi keep-alive (asyncio, tanpa dependensi tambahan) dan
+mengirim POST /predict berturut-turut selama `--duration` detik. Payload memakai `components`
+acak sehingga yang diukur adalah jalur layanan + micro-batcher, bukan OpenWeather. Hasilnya:
+request/detik, persentil latensi p50/p90/p99, dan statistik batch dari /health.
+    python -m pollucare.loadtest --url http://localhost:8000 --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+async def _request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    header = await reader.readuntil(b"\r\n\r\n")
+    status = int(header.split(b" ", 2)[1])
+    length = 0
+    for line in header.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    data = await reader.readexactly(length)
+    return status, data
+
+
+async def _get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, data = await _request(reader, writer, host, "GET", path)
+        return json.loads(data)
+    finally:
+        writer.close()
+
+
+async def _client(host, port, deadline, rng, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            payload = {"components": {
+                "CO": float(rng.uniform(100, 3000)), "Ozone": float(rng.uniform(0, 300)),
+                "NO2": float(rng.uniform(0, 200)), "PM25": float(rng.uniform(0, 250)),
+            }}
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", "/predict", payload)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(url, concurrency, duration, warmup=2.0):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    # Pemanasan agar model dan koneksi siap sebelum pengukuran
+    warm = []
+    await asyncio.gather(*(
+        _client(host, port, time.perf_counter() + warmup, np.random.default_rng(i), warm, [])
+        for i in range(concurrency)
+    ))
+
+    before = (await _get_json(host, port, "/health"))["batcher"]
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, start + duration, np.random.default_rng(1000 + i), latencies, errors)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    after = (await _get_json(host, port, "/health"))["batcher"]
+    batches = after["batches"] - before["batches"]
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "latency_ms": {
+            f"p{q}": float(np.percentile(latencies, q) * 1000) if latencies else None for q in (50, 90, 99)
+        },
+        "mean_batch_size": (after["requests"] - before["requests"]) / batches if batches else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban POST /predict pada layanan PolluCare.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=64, help="Jumlah klien bersamaan.")
+    parser.add_argument("--duration", type=float, default=20, help="Lama pengukuran (detik).")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.url, args.concurrency, args.duration))
+    latency = result["latency_ms"]
+    print(f"{result['requests']} request dalam {args.duration:.0f} s ({result['errors']} error), "
+          f"{result['rps']:.0f} request/s")
+    print(f"Latensi p50 {latency['p50']:.2f} ms, p90 {latency['p90']:.2f} ms, p99 {latency['p99']:.2f} ms")
+    if result["mean_batch_size"]:
+        print(f"Rata-rata ukuran batch: {result['mean_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
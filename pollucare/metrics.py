@@ -0,0 +1,231 @@
+"""
+Metrik Prometheus dan tracing latensi per tahap untuk jalur request (app.py dan pollucare/service.py).
+
+Metrik yang diekspor:
+    - pollucare_stage_seconds{stage}: histogram latensi tiap tahap (geocoding, polusi, inferensi,
+      saran, rumah sakit, render, dan request secara keseluruhan),
+    - pollucare_upstream_errors_total{stage, kind}: error upstream; kind "timeout" atau "error",
+    - pollucare_inference_batch_size: histogram jumlah baris per panggilan `model.predict`,
+    - pollucare_cache_events_total{event}: hit/stale_hit/miss/... dari cache persisten
+      (pollucare/cache.py), dibaca saat scrape sehingga cache tidak bergantung ke modul ini.
+
+Streamlit mengekspor metrik di port POLLUCARE_METRICS_PORT (default 9000, sesuai Dockerfile; 0 mematikan),
+layanan FastAPI lewat GET /metrics. Paket `prometheus_client` opsional: tanpa paket itu semua
+fungsi di sini tetap bisa dipanggil tetapi tidak mencatat apa pun.
+
+Trace per request (POLLUCARE_TRACE=1) mencetak satu baris log `pollucare.trace` berisi rincian
+waktu setiap tahap, misalnya:
+    trace predict Jakarta total=1843.2ms geocoding=0.1ms air_pollution=512.4ms inference=0.2ms ...
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+
+from pollucare.cache import get_cache
+
+try:
+    import prometheus_client
+    from prometheus_client.core import CounterMetricFamily
+except ImportError:
+    prometheus_client = None
+
+METRICS_PORT = int(os.environ.get("POLLUCARE_METRICS_PORT", 9000))
+TRACE_ENABLED = os.environ.get("POLLUCARE_TRACE", "0") == "1"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+logger = logging.getLogger("pollucare.trace")
+if TRACE_ENABLED and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+_current_trace = contextvars.ContextVar("pollucare_trace", default=None)
+
+# Trace yang sudah selesai, dibaca oleh pollucare/benchmark.py untuk rincian latensi per tahap
+_recent_traces = deque(maxlen=1024)
+
+if prometheus_client is not None:
+    STAGE_SECONDS = prometheus_client.Histogram(
+        "pollucare_stage_seconds", "Latensi per tahap request.", ["stage"], buckets=LATENCY_BUCKETS
+    )
+    UPSTREAM_ERRORS = prometheus_client.Counter(
+        "pollucare_upstream_errors_total", "Error dan timeout panggilan upstream.", ["stage", "kind"]
+    )
+    INFERENCE_BATCH_SIZE = prometheus_client.Histogram(
+        "pollucare_inference_batch_size", "Jumlah baris per panggilan model.predict.", buckets=BATCH_SIZE_BUCKETS
+    )
+
+    class CacheCollector:
+        """Menerjemahkan penghitung get_cache().stats() menjadi counter Prometheus saat scrape."""
+
+        def _family(self):
+            return CounterMetricFamily("pollucare_cache_events", "Kejadian cache persisten.", labels=["event"])
+
+        def describe(self):
+            # Dipakai saat registrasi, sehingga cache tidak dibuat ketika modul diimpor
+            yield self._family()
+
+        def collect(self):
+            family = self._family()
+            cache = get_cache()
+            if cache is not None:
+                for event, count in cache.stats().items():
+                    family.add_metric([event], count)
+            yield family
+
+    prometheus_client.REGISTRY.register(CacheCollector())
+
+
+class Trace:
+    """Rincian waktu tahap-tahap satu request; aman dipakai dari beberapa thread."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.stages = []
+        self.total = None
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages.append((stage, seconds))
+
+    def summary(self):
+        total = (time.perf_counter() - self.started_at) * 1000
+        with self._lock:
+            parts = " ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.stages)
+        return f"trace {self.name} total={total:.1f}ms {parts}"
+
+
+def observe(stage, seconds):
+    if prometheus_client is not None:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+# Exception yang dihitung `stage`/`instrument_stream` sebagai error upstream; exception lain (bug,
+# input tidak valid) diteruskan tanpa dicatat
+UPSTREAM_EXCEPTIONS = (requests.exceptions.RequestException, TimeoutError)
+
+
+def record_upstream_error(stage, error):
+    if prometheus_client is None:
+        return
+    is_timeout = isinstance(error, (requests.exceptions.Timeout, TimeoutError)) or "timeout" in type(error).__name__.lower()
+    UPSTREAM_ERRORS.labels(stage, "timeout" if is_timeout else "error").inc()
+
+
+def observe_batch_size(size):
+    if prometheus_client is not None:
+        INFERENCE_BATCH_SIZE.observe(size)
+
+
+@contextmanager
+def stage(name):
+    """Mengukur satu tahap: `with metrics.stage("inference"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except UPSTREAM_EXCEPTIONS as e:
+        record_upstream_error(name, e)
+        raise
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def instrument(name):
+    """Dekorator untuk fungsi biasa: seluruh pemanggilan diukur sebagai tahap `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_stream(name):
+    """
+    Dekorator untuk generator (mis. saran yang di-stream): mencatat `<name>_first_chunk`
+    (waktu sampai potongan pertama) dan `name` (sampai generator selesai atau ditutup).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            first = True
+            try:
+                for chunk in fn(*args, **kwargs):
+                    if first:
+                        observe(f"{name}_first_chunk", time.perf_counter() - start)
+                        first = False
+                    yield chunk
+            except UPSTREAM_EXCEPTIONS as e:
+                record_upstream_error(name, e)
+                raise
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace_request(name):
+    """
+    Membuka trace untuk satu request; tahap yang diukur di dalamnya (termasuk di thread
+    fanout.TaskGroup) ikut tercatat. Total dicatat sebagai tahap "request".
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.total = time.perf_counter() - trace.started_at
+        _recent_traces.append(trace)
+        if prometheus_client is not None:
+            STAGE_SECONDS.labels("request").observe(trace.total)
+        if TRACE_ENABLED:
+            logger.info(trace.summary())
+
+
+def recent_traces(name=None):
+    """Trace yang sudah selesai (terbaru di akhir), opsional hanya dengan nama tertentu."""
+    return [trace for trace in list(_recent_traces) if name is None or trace.name == name]
+
+
+def render_latest():
+    """(isi, content type) format teks Prometheus untuk endpoint /metrics."""
+    if prometheus_client is None:
+        return b"", "text/plain; version=0.0.4; charset=utf-8"
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Menjalankan server HTTP /metrics sekali per proses. Mengembalikan False jika tidak dijalankan."""
+    global _server_started
+    if prometheus_client is None or not port:
+        return False
+    with _server_lock:
+        if not _server_started:
+            try:
+                prometheus_client.start_http_server(port)
+            except OSError:
+                # Port sudah dipakai proses lain (mis. replika kedua di host yang sama)
+                return False
+            _server_started = True
+    return True
@@ -0,0 +1,242 @@
+"""
+Penyimpanan observasi polutan dari OpenWeather untuk retraining model.
+
+Setiap pembacaan yang benar-benar diambil dari upstream oleh `openweather.fetch_air_pollution`
+(jalur request app.py, service dan prefetch; cache hit tidak tercatat) ditambahkan ke buffer di
+memori. Thread background menulis buffer itu ke file Parquet kecil yang tidak pernah diubah lagi
+(append-only), dipartisi per tanggal observasi (UTC):
+    data/observations/date=2026-10-18/part-<unix ms>-<pid>-<urutan>.parquet
+Jalur request hanya menambah satu tuple ke list; konversi ke sub-indeks AQI, kompresi dan I/O
+berjalan di thread flush. File ditulis ke path sementara lalu di-rename, sehingga pembaca tidak
+pernah melihat file setengah jadi dan beberapa proses bisa menulis ke direktori yang sama.
+
+Setiap baris memuat konsentrasi mentah (µg/m³), fitur model (sub-indeks AQI, nama kolom sama
+dengan aqi_preprocessing) dan label `AQI Category` dari sub-indeks tertinggi dengan kode
+AQI_CATEGORY_LABELS, sehingga MLProject/incremental.py bisa langsung memakainya sebagai data training.
+
+Diatur lewat env:
+    POLLUCARE_OBSERVATIONS=on|off             (default on)
+    POLLUCARE_OBSERVATIONS_DIR                (default data/observations)
+    POLLUCARE_OBSERVATIONS_FLUSH_ROWS=500     flush lebih awal bila buffer mencapai jumlah ini
+    POLLUCARE_OBSERVATIONS_FLUSH_SECONDS=300  jeda maksimal antar-flush
+
+Ringkasan isi store:
+    python -m pollucare.observations stats
+"""
+import argparse
+import atexit
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OBSERVATIONS_DIR = os.path.join(REPO_DIR, "data", "observations")
+DEFAULT_FLUSH_ROWS = 500
+DEFAULT_FLUSH_SECONDS = 300
+
+# Buffer yang gagal ditulis dicoba lagi pada flush berikutnya, tetapi tidak lebih dari sekian baris
+MAX_PENDING_ROWS = 50000
+
+CONCENTRATIONS = ['CO', 'Ozone', 'NO2', 'PM25']
+FEATURES = ['CO AQI Value', 'Ozone AQI Value', 'NO2 AQI Value', 'PM2.5 AQI Value']
+TARGET = 'AQI Category'
+META_COLUMNS = ['observed_at', 'fetched_at', 'lat', 'lon']
+COLUMNS = META_COLUMNS + CONCENTRATIONS + FEATURES + ['AQI Value', TARGET]
+
+
+def label_frame(rows):
+    """
+    Tuple buffer (observed_at, fetched_at, lat, lon, CO, Ozone, NO2, PM25) -> DataFrame dengan
+    kolom COLUMNS. Label diturunkan seperti di data mentah: AQI = sub-indeks tertinggi, lalu
+    kategori dari breakpoint US EPA.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from pollucare import aqi
+    from pollucare.constants import AQI_BREAKPOINTS, AQI_CATEGORY_MAP, AQI_SEVERITY_ORDER
+
+    frame = pd.DataFrame(rows, columns=META_COLUMNS + CONCENTRATIONS)
+    frame = frame.astype({'observed_at': 'int64', 'fetched_at': 'int64', 'lat': 'float32', 'lon': 'float32',
+                          **{column: 'float32' for column in CONCENTRATIONS}})
+    features = aqi.concentrations_to_features(frame[CONCENTRATIONS].to_numpy())
+    for i, feature in enumerate(FEATURES):
+        frame[feature] = features[:, i].astype(np.int16)
+    aqi_value = features.max(axis=1)
+    frame['AQI Value'] = aqi_value.astype(np.int16)
+    codes = {label: code for code, label in AQI_CATEGORY_MAP.items()}
+    severity_codes = np.array([codes[label] for label in AQI_SEVERITY_ORDER], dtype=np.int8)
+    frame[TARGET] = severity_codes[np.searchsorted(AQI_BREAKPOINTS, aqi_value, side='left')]
+    return frame
+
+
+class ObservationStore:
+
+    def __init__(self, path=DEFAULT_OBSERVATIONS_DIR, flush_rows=DEFAULT_FLUSH_ROWS,
+                 flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.stats = Counter()
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._sequence = itertools.count()
+
+    def record(self, lat, lon, components, observed_at=None):
+        """Menambah satu pembacaan ke buffer (dipanggil dari jalur request, tanpa I/O)."""
+        now = time.time()
+        row = (int(observed_at or now), int(now), float(lat), float(lon),
+               *(float(components.get(key) or 0.0) for key in CONCENTRATIONS))
+        with self._lock:
+            self._rows.append(row)
+            pending = len(self._rows)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pollucare-observations", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if pending >= self.flush_rows:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.stats["flush_errors"] += 1
+
+    def _write(self, date, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        directory = os.path.join(self.path, f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{int(time.time() * 1000)}-{os.getpid()}-{next(self._sequence)}.parquet"
+        path = os.path.join(directory, name)
+        tmp_path = path + ".tmp"
+        try:
+            pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def flush(self):
+        """
+        Menulis isi buffer, satu file per tanggal observasi.
+        Returns:
+            list: Path file yang ditulis.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return []
+            try:
+                frame = label_frame(rows)
+                dates = frame['observed_at'].astype('datetime64[s]').dt.strftime('%Y-%m-%d')
+                written = [self._write(date, part) for date, part in frame.groupby(dates)]
+            except Exception:
+                with self._lock:
+                    self._rows[:0] = rows
+                    overflow = len(self._rows) - MAX_PENDING_ROWS
+                    if overflow > 0:
+                        del self._rows[:overflow]
+                        self.stats["dropped"] += overflow
+                raise
+            self.stats["rows_written"] += len(rows)
+            self.stats["files_written"] += len(written)
+            return written
+
+
+_store = None
+_store_resolved = False
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """ObservationStore per proses sesuai env, atau None jika POLLUCARE_OBSERVATIONS=off."""
+    global _store, _store_resolved
+    if not _store_resolved:
+        with _store_lock:
+            if not _store_resolved:
+                if os.environ.get("POLLUCARE_OBSERVATIONS", "on").lower() != "off":
+                    _store = ObservationStore(
+                        os.environ.get("POLLUCARE_OBSERVATIONS_DIR", DEFAULT_OBSERVATIONS_DIR),
+                        int(os.environ.get("POLLUCARE_OBSERVATIONS_FLUSH_ROWS", DEFAULT_FLUSH_ROWS)),
+                        float(os.environ.get("POLLUCARE_OBSERVATIONS_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)),
+                    )
+                _store_resolved = True
+    return _store
+
+
+def record(lat, lon, components, observed_at=None):
+    """
+    Mencatat satu pembacaan polutan untuk retraining.
+    Args:
+        lat (float): Lintang lokasi yang diminta ke API.
+        lon (float): Bujur lokasi yang diminta ke API.
+        components (dict): Hasil openweather.parse_components (µg/m³).
+        observed_at (int, optional): Waktu observasi (unix time UTC, field `dt` OpenWeather).
+    """
+    store = get_store()
+    if store is not None:
+        store.record(lat, lon, components, observed_at)
+
+
+def list_files(path=DEFAULT_OBSERVATIONS_DIR):
+    """Path relatif semua file observasi (mis. 'date=2026-10-18/part-...parquet'), terurut."""
+    if not os.path.isdir(path):
+        return []
+    files = []
+    for partition in sorted(os.listdir(path)):
+        directory = os.path.join(path, partition)
+        if partition.startswith("date=") and os.path.isdir(directory):
+            files.extend(f"{partition}/{name}" for name in sorted(os.listdir(directory)) if name.endswith(".parquet"))
+    return files
+
+
+def load(path=DEFAULT_OBSERVATIONS_DIR, files=None, columns=None):
+    """Membaca file observasi (default semua) menjadi satu DataFrame."""
+    import pandas as pd
+
+    files = list_files(path) if files is None else files
+    if not files:
+        return pd.DataFrame(columns=columns or COLUMNS)
+    return pd.concat([pd.read_parquet(os.path.join(path, name), columns=columns) for name in files],
+                     ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ringkasan store observasi polutan.")
+    parser.add_argument("command", choices=["stats"])
+    parser.add_argument("--path", default=os.environ.get("POLLUCARE_OBSERVATIONS_DIR", DEFAULT_OBSERVATIONS_DIR))
+    args = parser.parse_args(argv)
+
+    from pollucare.constants import AQI_CATEGORY_MAP
+
+    files = list_files(args.path)
+    if not files:
+        print(f"Belum ada observasi di {args.path}")
+        return
+    frame = load(args.path, files)
+    size = sum(os.path.getsize(os.path.join(args.path, name)) for name in files)
+    partitions = sorted({name.split("/")[0] for name in files})
+    unique = frame.drop_duplicates(['lat', 'lon', 'observed_at'])
+    print(f"{len(files)} file di {len(partitions)} partisi ({partitions[0]} .. {partitions[-1]}), "
+          f"{size / 1024:.1f} KiB")
+    print(f"{len(frame)} baris, {len(unique)} unik per (lat, lon, observed_at), "
+          f"{len(unique[['lat', 'lon']].drop_duplicates())} lokasi")
+    for code, count in unique[TARGET].value_counts().sort_index().items():
+        print(f"  {AQI_CATEGORY_MAP[code]:<36} {count}")
+
+
+if __name__ == "__main__":
+    main()
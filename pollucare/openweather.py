@@ -0,0 +1,95 @@
+"""
+Pemanggilan API OpenWeather (geocoding dan polusi udara) tanpa ketergantungan ke Streamlit.
+
+Semua request memakai klien HTTP bersama (pollucare/httpclient.py) dan hasilnya disimpan di
+cache persisten (pollucare/cache.py) dengan TTL yang sama seperti `st.cache_data` di app.py.
+Prakiraan per jam (~96 titik) diambil dalam satu request per lokasi dan disimpan per slot
+pembaruan upstream (lihat `fetch_air_pollution_forecast`).
+Setiap pembacaan polutan yang diambil dari upstream dicatat ke store observasi
+(pollucare/observations.py) untuk retraining model.
+Error jaringan dilempar sebagai `requests.exceptions.RequestException` agar pemanggil
+(app.py atau mode batch) bisa memutuskan sendiri cara menampilkannya.
+"""
+import time
+
+from pollucare import observations
+from pollucare.cache import cached
+from pollucare.httpclient import get_client
+
+GEO_DIRECT_URL = "http://api.openweathermap.org/geo/1.0/direct"
+GEO_REVERSE_URL = "http://api.openweathermap.org/geo/1.0/reverse"
+AIR_POLLUTION_URL = "http://api.openweathermap.org/data/2.5/air_pollution"
+AIR_POLLUTION_FORECAST_URL = "http://api.openweathermap.org/data/2.5/air_pollution/forecast"
+
+# OpenWeather memperbarui model prakiraan polusi sekitar satu kali per jam
+FORECAST_REFRESH_SECONDS = 3600
+
+
+@cached("coordinates", ttl=3600)
+def fetch_coordinates(city_name, api_key):
+    response = get_client().get(GEO_DIRECT_URL, params={'q': city_name, 'limit': 1, 'appid': api_key})
+    response.raise_for_status()
+    data = response.json()
+    if data:
+        return data[0]['lat'], data[0]['lon']
+    return None, None
+
+
+@cached("city_name", ttl=3600)
+def fetch_city_name(lat, lon, api_key):
+    response = get_client().get(GEO_REVERSE_URL, params={'lat': lat, 'lon': lon, 'limit': 1, 'appid': api_key})
+    response.raise_for_status()
+    data = response.json()
+    if data and len(data) > 0:
+        return data[0].get('name')
+    return None
+
+
+def parse_components(components):
+    return {
+        "CO": components.get('co', 0.0),
+        "Ozone": components.get('o3', 0.0),
+        "NO2": components.get('no2', 0.0),
+        "PM25": components.get('pm2_5', 0.0)
+    }
+
+
+# Data polutan lama (sampai 30 menit) masih ditampilkan sambil diperbarui di background
+@cached("air_pollution", ttl=600, stale_ttl=1800)
+def fetch_air_pollution(lat, lon, api_key):
+    response = get_client().get(AIR_POLLUTION_URL, params={'lat': lat, 'lon': lon, 'appid': api_key})
+    response.raise_for_status()
+    data = response.json()
+    if data and data['list']:
+        components = parse_components(data['list'][0]['components'])
+        # Hanya pembacaan baru dari upstream yang sampai di sini (cache hit tidak), lihat observations.py
+        observations.record(lat, lon, components, data['list'][0].get('dt'))
+        return components
+    return None
+
+
+@cached("air_pollution_forecast", ttl=FORECAST_REFRESH_SECONDS)
+def _fetch_air_pollution_forecast(lat, lon, api_key, refresh_slot):
+    # Baris dict, bukan DataFrame: nilai cache disimpan sebagai JSON
+    response = get_client().get(AIR_POLLUTION_FORECAST_URL, params={'lat': lat, 'lon': lon, 'appid': api_key})
+    response.raise_for_status()
+    data = response.json()
+    rows = [{'dt': item['dt'], **parse_components(item['components'])} for item in data.get('list') or []]
+    return rows or None
+
+
+def fetch_air_pollution_forecast(lat, lon, api_key):
+    """
+    Prakiraan polusi per jam untuk satu lokasi dari satu panggilan upstream.
+    Key cache memuat nomor slot jam (UTC) sehingga entri berganti tepat saat data upstream diperbarui,
+    bukan satu jam setelah request pertama.
+    Returns:
+        pd.DataFrame: Kolom `dt` (unix time UTC) dan konsentrasi CO/Ozone/NO2/PM25 (µg/m³), atau None.
+    """
+    import pandas as pd
+
+    refresh_slot = int(time.time() // FORECAST_REFRESH_SECONDS)
+    rows = _fetch_air_pollution_forecast(lat, lon, api_key, refresh_slot)
+    if not rows:
+        return None
+    return pd.DataFrame(rows, columns=['dt', 'CO', 'Ozone', 'NO2', 'PM25'])
@@ -0,0 +1,189 @@
+"""
+Prediksi kategori AQI secara batch untuk banyak kota/koordinat sekaligus, tanpa Streamlit.
+
+Input berupa DataFrame (atau daftar nama kota / pasangan lat-lon) dengan salah satu kolom berikut:
+    - kolom fitur FEATURES_USED_IN_TRAINING (langsung diprediksi, tanpa panggilan API),
+    - `lat` dan `lon`/`lng` (data polutan diambil dari OpenWeather lalu dikonversi dari µg/m³ ke
+      sub-indeks AQI dengan pollucare/aqi.py),
+    - `City` atau `city` (koordinat dari gazetteer lokal, pollucare/gazetteer.py, atau geocoding OpenWeather).
+Seluruh baris diprediksi dengan satu perkalian matriks.
+
+Contoh CLI (output ditulis per chunk sehingga memori tetap datar untuk input besar):
+    python -m pollucare.predict aqi_raw.csv -o hasil.csv --chunksize 50000
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from pollucare import aqi, gazetteer, geogrid, openweather
+from pollucare.constants import AQI_CATEGORY_MAP, FEATURES_USED_IN_TRAINING
+from pollucare.inference import DEFAULT_NPZ_PATH, NumpyDNN
+
+CITY_COLUMNS = ('City', 'city')
+LON_COLUMNS = ('lon', 'lng')
+
+DEFAULT_MAX_WORKERS = 8
+
+_CATEGORY_LOOKUP = np.array([AQI_CATEGORY_MAP[i] for i in range(len(AQI_CATEGORY_MAP))], dtype=object)
+
+_default_model = None
+
+
+def load_default_model():
+    global _default_model
+    if _default_model is None:
+        _default_model = NumpyDNN.from_npz(DEFAULT_NPZ_PATH)
+    return _default_model
+
+
+def _to_frame(locations):
+    if isinstance(locations, pd.DataFrame):
+        return locations.reset_index(drop=True)
+    locations = list(locations)
+    if locations and isinstance(locations[0], str):
+        return pd.DataFrame({'City': locations})
+    return pd.DataFrame(locations, columns=['lat', 'lon'])
+
+
+def _first_column(df, candidates):
+    for column in candidates:
+        if column in df.columns:
+            return column
+    return None
+
+
+def _safe_call(fn, *args):
+    try:
+        return fn(*args)
+    except (requests.exceptions.RequestException, IndexError, KeyError):
+        return None
+
+
+def _resolve_coordinates(df, api_key, max_workers):
+    city_col = _first_column(df, CITY_COLUMNS)
+    if city_col is None:
+        raise ValueError("Input harus memiliki kolom fitur, kolom lat/lon, atau kolom City.")
+    cities = df[city_col].dropna().unique()
+    # Kota yang dikenal gazetteer lokal tidak perlu geocoding OpenWeather
+    coords = {city: gazetteer.lookup(city) for city in cities}
+    remote = [city for city, (lat, _) in coords.items() if lat is None]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda c: _safe_call(openweather.fetch_coordinates, c, api_key), remote)
+        coords.update(zip(remote, results))
+    pairs = df[city_col].map(lambda c: coords.get(c) or (None, None))
+    lat = pd.to_numeric(pairs.str[0], errors='coerce')
+    lon = pd.to_numeric(pairs.str[1], errors='coerce')
+    return lat, lon
+
+
+def _fetch_features(lat, lon, api_key, max_workers):
+    """
+    Mengambil data polutan sekali untuk setiap sel grid unik, lalu menyusunnya menjadi matriks fitur
+    (sub-indeks AQI) dengan satu konversi vektor untuk seluruh baris.
+    """
+    lat, lon = geogrid.snap_for('air_pollution', lat.to_numpy(dtype=np.float64), lon.to_numpy(dtype=np.float64))
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    unique_coords = list(dict.fromkeys(zip(lat[valid].tolist(), lon[valid].tolist())))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda c: _safe_call(openweather.fetch_air_pollution, c[0], c[1], api_key), unique_coords
+        )
+        pollution = dict(zip(unique_coords, results))
+
+    concentrations = np.full((len(lat), len(FEATURES_USED_IN_TRAINING)), np.nan, dtype=np.float64)
+    for i, coord in enumerate(zip(lat.tolist(), lon.tolist())):
+        data = pollution.get(coord)
+        if data:
+            concentrations[i] = [data.get(aqi.CONCENTRATION_KEYS[f], 0.0) for f in FEATURES_USED_IN_TRAINING]
+    return aqi.concentrations_to_features(concentrations)
+
+
+def predict_features(features, model=None):
+    """
+    Memprediksi matriks fitur (n, 4) dalam satu panggilan model.
+    Returns:
+        tuple: (indeks kelas, nama kategori, probabilitas kelas terpilih). Baris dengan NaN
+        diberi kelas -1 dan kategori None.
+    """
+    model = model or load_default_model()
+    features = np.asarray(features, dtype=np.float32)
+    valid = ~np.isnan(features).any(axis=1)
+
+    class_index = np.full(len(features), -1, dtype=np.int64)
+    probability = np.full(len(features), np.nan, dtype=np.float32)
+    categories = np.full(len(features), None, dtype=object)
+    if valid.any():
+        proba = np.asarray(model.predict(features[valid]))
+        best = proba.argmax(axis=1)
+        class_index[valid] = best
+        probability[valid] = proba[np.arange(len(best)), best]
+        categories[valid] = _CATEGORY_LOOKUP[best]
+    return class_index, categories, probability
+
+
+def predict_batch(locations, api_key=None, model=None, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Memprediksi kategori AQI untuk banyak lokasi sekaligus.
+    Args:
+        locations (DataFrame | list): DataFrame input, daftar nama kota, atau daftar (lat, lon).
+        api_key (str): Kunci API OpenWeather, hanya dibutuhkan jika input tidak memuat kolom fitur.
+        model: Model dengan metode `predict` (default: NumpyDNN dari file .npz).
+        max_workers (int): Jumlah thread untuk panggilan API paralel.
+    Returns:
+        DataFrame: Kolom input ditambah kolom fitur, `Predicted AQI Class`, `Predicted AQI Category`, dan `Prediction Probability`.
+    """
+    df = _to_frame(locations).copy()
+
+    if all(f in df.columns for f in FEATURES_USED_IN_TRAINING):
+        features = df[FEATURES_USED_IN_TRAINING].to_numpy(dtype=np.float32)
+    else:
+        if not api_key:
+            raise ValueError("Kunci API OpenWeather dibutuhkan untuk mengambil data polutan.")
+        lon_col = _first_column(df, LON_COLUMNS)
+        if 'lat' in df.columns and lon_col:
+            lat = pd.to_numeric(df['lat'], errors='coerce')
+            lon = pd.to_numeric(df[lon_col], errors='coerce')
+        else:
+            lat, lon = _resolve_coordinates(df, api_key, max_workers)
+            df['lat'] = lat
+            df['lon'] = lon
+        features = _fetch_features(lat, lon, api_key, max_workers)
+        df[FEATURES_USED_IN_TRAINING] = features
+
+    class_index, categories, probability = predict_features(features, model)
+    df['Predicted AQI Class'] = class_index
+    df['Predicted AQI Category'] = categories
+    df['Prediction Probability'] = probability
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prediksi kategori AQI secara batch dari file CSV.")
+    parser.add_argument("input", help="CSV berisi kolom fitur, lat/lon, atau City ('-' untuk stdin).")
+    parser.add_argument("-o", "--output", default="-", help="File CSV output ('-' untuk stdout).")
+    parser.add_argument("--chunksize", type=int, default=50000, help="Jumlah baris yang diproses per chunk.")
+    parser.add_argument("--api-key", default=os.environ.get("OPENWEATHER_API_KEY"))
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else args.input
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    model = load_default_model()
+    try:
+        header = True
+        for chunk in pd.read_csv(source, chunksize=args.chunksize):
+            result = predict_batch(chunk, api_key=args.api_key, model=model, max_workers=args.max_workers)
+            result.to_csv(output, header=header, index=False)
+            header = False
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
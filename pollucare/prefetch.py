@@ -0,0 +1,287 @@
+"""
+Prefetch di background untuk lokasi yang paling sering diminta.
+
+Setiap request prediksi dicatat per sel grid `air_pollution` (koordinat yang sudah di-snap, sama
+dengan key cache di jalur request). Hitungan disimpan bersama di backend cache (pollucare/cache.py)
+dengan peluruhan eksponensial, sehingga semua proses Streamlit berbagi satu daftar popularitas.
+Scheduler mengambil top-N lokasi dan memperbarui data polutan sebelum TTL-nya habis, lalu
+menulisnya ke cache yang sama dengan `openweather.fetch_air_pollution`; request pengguna untuk
+kota populer pun selalu hit. Jumlah panggilan API dibatasi token bucket (kuota per hari).
+
+Scheduler bisa berjalan sebagai thread di server Streamlit (POLLUCARE_PREFETCH_MODE=thread,
+default) atau sebagai sidecar terpisah yang memakai backend cache bersama (sqlite/redis):
+    python -m pollucare.prefetch --top 50 --quota-per-day 5000
+Hanya satu scheduler yang aktif pada satu waktu (lock "leader" di backend cache).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import requests
+
+from pollucare import gazetteer, geogrid, openweather
+from pollucare.cache import get_cache
+
+# Harus sama dengan dekorator @cached di openweather.py agar hasil prefetch dibaca jalur request
+AIR_POLLUTION_TTL = 600
+AIR_POLLUTION_STALE_TTL = 1800
+
+PREFETCH_MODE = os.environ.get("POLLUCARE_PREFETCH_MODE", "thread")
+DEFAULT_TOP_N = int(os.environ.get("POLLUCARE_PREFETCH_TOP", 50))
+DEFAULT_QUOTA_PER_DAY = int(os.environ.get("POLLUCARE_PREFETCH_QUOTA_PER_DAY", 2000))
+DEFAULT_INTERVAL_SECONDS = 60
+DEFAULT_HALF_LIFE_SECONDS = 6 * 3600
+
+# Hitungan lokal di-merge ke backend oleh thread background setiap sekian detik
+FLUSH_INTERVAL_SECONDS = 30
+
+POPULARITY_KEY = "pollucare:prefetch:popularity"
+LEADER_KEY = "pollucare:prefetch:leader"
+LOCK_TTL_SECONDS = 10
+
+
+class QuotaBudget:
+    """Token bucket: `per_day` panggilan per hari, dengan ledakan maksimal `burst` panggilan."""
+
+    def __init__(self, per_day, burst=30):
+        self.rate = per_day / 86400.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, cost=1):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens < cost:
+                return False
+            self.tokens -= cost
+            return True
+
+
+class PopularityTracker:
+    """
+    Hitungan request per lokasi dengan peluruhan eksponensial (half-life), disimpan di backend cache.
+    `record` hanya menambah Counter di memori. Merge ke backend (yang bisa menunggu lock backend)
+    dilakukan thread daemon setiap FLUSH_INTERVAL_SECONDS dan oleh scheduler di awal setiap siklus,
+    tidak pernah di thread request.
+    """
+
+    def __init__(self, half_life=DEFAULT_HALF_LIFE_SECONDS, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.half_life = half_life
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def record(self, lat, lon):
+        location = tuple(float(v) for v in geogrid.snap_for('air_pollution', lat, lon))
+        with self._lock:
+            self._pending[location] += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_forever, name="pollucare-popularity", daemon=True)
+                self._flusher.start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                # Backend cache bermasalah: hitungan periode ini hilang, popularitas hanya perkiraan
+                pass
+
+    def _decayed(self, counts, updated_at, now):
+        factor = 0.5 ** ((now - updated_at) / self.half_life)
+        # Lokasi yang hampir tidak pernah diminta lagi dibuang agar daftar tidak tumbuh terus
+        return {location: count * factor for location, count in counts.items() if count * factor >= 0.01}
+
+    def _load(self, backend):
+        raw = backend.get(POPULARITY_KEY)
+        if raw is None:
+            return {}, time.time()
+        # JSON, bukan pickle: backend bersama (mis. Redis) tidak boleh bisa menjalankan kode di worker
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            # Entri format lama (pickle) atau rusak: hitungan dimulai lagi dari nol
+            return {}, time.time()
+        return {(lat, lon): count for lat, lon, count in data["counts"]}, data["updated_at"]
+
+    def flush(self):
+        cache = get_cache()
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if cache is None or not pending:
+            return
+        backend = cache.backend
+        lock_key = POPULARITY_KEY + ":lock"
+        deadline = time.monotonic() + LOCK_TTL_SECONDS
+        while not backend.set(lock_key, b"1", ex=LOCK_TTL_SECONDS, nx=True):
+            if time.monotonic() > deadline:
+                # Lock tidak didapat; hitungan dikembalikan dan dicoba lagi pada flush berikutnya
+                with self._lock:
+                    self._pending.update(pending)
+                return
+            time.sleep(0.05)
+        try:
+            now = time.time()
+            counts, updated_at = self._load(backend)
+            counts = self._decayed(counts, updated_at, now)
+            for location, count in pending.items():
+                counts[location] = counts.get(location, 0.0) + count
+            rows = [[lat, lon, count] for (lat, lon), count in counts.items()]
+            backend.set(POPULARITY_KEY, json.dumps({"counts": rows, "updated_at": now}).encode("utf-8"))
+        finally:
+            backend.delete(lock_key)
+
+    def top(self, n):
+        """N lokasi (lat, lon) terpopuler beserta skornya, terurut menurun."""
+        cache = get_cache()
+        if cache is None:
+            return []
+        counts, updated_at = self._load(cache.backend)
+        counts = self._decayed(counts, updated_at, time.time())
+        return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class PrefetchScheduler:
+
+    def __init__(self, api_key, tracker, top_n=DEFAULT_TOP_N, quota_per_day=DEFAULT_QUOTA_PER_DAY,
+                 interval=DEFAULT_INTERVAL_SECONDS, model=None):
+        self.api_key = api_key
+        self.tracker = tracker
+        self.top_n = top_n
+        self.budget = QuotaBudget(quota_per_day)
+        self.interval = interval
+        self.model = model
+        self.stats = Counter()
+        self._stop = threading.Event()
+
+    def _is_leader(self, backend):
+        """Hanya satu scheduler per backend yang memanggil API; lock diperpanjang setiap siklus."""
+        owner = f"{os.getpid()}:{id(self)}".encode()
+        if backend.set(LEADER_KEY, owner, ex=self.interval * 2, nx=True):
+            return True
+        if backend.get(LEADER_KEY) == owner:
+            backend.set(LEADER_KEY, owner, ex=self.interval * 2)
+            return True
+        return False
+
+    def run_once(self):
+        """
+        Satu siklus prefetch.
+        Returns:
+            list: Tuple (lat, lon, skor popularitas, status) untuk setiap lokasi hot set.
+        """
+        cache = get_cache()
+        if cache is None:
+            return []
+        self.tracker.flush()
+        if not self._is_leader(cache.backend):
+            self.stats["not_leader"] += 1
+            return []
+
+        # Perbarui sebelum TTL habis: entri yang akan kedaluwarsa sebelum siklus berikutnya ikut diambil
+        refresh_after = max(0, AIR_POLLUTION_TTL - self.interval - 30)
+        report = []
+        refreshed = []
+        for (lat, lon), score in self.tracker.top(self.top_n):
+            args = (lat, lon, self.api_key)
+            age = cache.age("air_pollution", args, {})
+            if age is not None and age < refresh_after:
+                status = "fresh"
+            elif not self.budget.take():
+                status = "over_budget"
+            else:
+                try:
+                    data = openweather.fetch_air_pollution.uncached(*args)
+                    cache.put("air_pollution", args, {}, data, AIR_POLLUTION_TTL, AIR_POLLUTION_STALE_TTL)
+                    status = "refreshed" if data else "empty"
+                    if data:
+                        refreshed.append(data)
+                except (requests.exceptions.RequestException, KeyError):
+                    status = "error"
+            self.stats[status] += 1
+            report.append((lat, lon, score, status))
+
+        if refreshed:
+            # Prediksi untuk seluruh lokasi yang diperbarui dalam satu panggilan model;
+            # tanpa model eksplisit dipakai NumpyDNN default yang dimuat saat pertama dibutuhkan
+            from pollucare import aqi, predict
+
+            features = np.vstack([aqi.features_from_components(data) for data in refreshed])
+            _, categories, _ = predict.predict_features(features, self.model)
+            self.stats.update(f"category:{category}" for category in categories)
+        return report
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                self.stats["cycle_errors"] += 1
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+
+_tracker = PopularityTracker()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def record_request(lat, lon):
+    """Mencatat satu request prediksi untuk lokasi ini (dipanggil dari jalur request)."""
+    if PREFETCH_MODE != "off":
+        _tracker.record(lat, lon)
+
+
+def start_background(api_key, **kwargs):
+    """Menjalankan scheduler sebagai thread daemon, sekali per proses (POLLUCARE_PREFETCH_MODE=thread)."""
+    global _scheduler
+    if PREFETCH_MODE != "thread":
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrefetchScheduler(api_key, _tracker, **kwargs)
+            threading.Thread(target=_scheduler.run_forever, name="pollucare-prefetch", daemon=True).start()
+        return _scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch data polutan untuk lokasi terpopuler.")
+    parser.add_argument("--api-key", default=os.environ.get("OPENWEATHER_API_KEY"))
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="Jumlah lokasi hot set.")
+    parser.add_argument("--quota-per-day", type=int, default=DEFAULT_QUOTA_PER_DAY)
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL_SECONDS, help="Detik antar siklus.")
+    parser.add_argument("--once", action="store_true", help="Jalankan satu siklus lalu keluar.")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("API key OpenWeather dibutuhkan (--api-key atau env OPENWEATHER_API_KEY).")
+
+    from pollucare import predict
+
+    scheduler = PrefetchScheduler(args.api_key, _tracker, args.top, args.quota_per_day, args.interval,
+                                  model=predict.load_default_model())
+    while True:
+        start = time.perf_counter()
+        report = scheduler.run_once()
+        for lat, lon, score, status in report:
+            print(f"{gazetteer.nearest_city(lat, lon, max_km=50) or '-':<24} {lat:9.4f} {lon:9.4f} "
+                  f"skor {score:7.2f}  {status}")
+        print(f"Siklus selesai dalam {time.perf_counter() - start:.2f} s: {dict(scheduler.stats)}", flush=True)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
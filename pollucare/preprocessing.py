@@ -0,0 +1,229 @@
+"""
+Preprocessing data AQI mentah (aqi_raw.csv) menjadi dataset training.
+
+Transformasinya sama dengan yang menghasilkan MLProject/aqi_preprocessing.csv: baris dengan nilai
+kosong dibuang, duplikat dibuang, lalu `AQI Category` di-encode menjadi kode dari
+AQI_CATEGORY_LABELS (sama dengan AQI_CATEGORY_MAP di aplikasi). Data dibaca per chunk dengan dtype
+ringkas (int16/float32/categorical), dan duplikat dideteksi lewat hash baris 64-bit. Karena itu
+memori yang dipakai hanya satu chunk plus 8 byte per baris unik, sehingga dump mentah berukuran
+beberapa GB tetap bisa diproses.
+
+Format output mengikuti ekstensi file: .parquet (default), .feather/.arrow (Arrow IPC tanpa
+kompresi, bisa di-memory-map tanpa salinan), atau .csv (format lama).
+    python -m pollucare.preprocessing aqi_raw.csv -o MLProject/aqi_preprocessing.parquet
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from pollucare.constants import AQI_CATEGORY_LABELS
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RAW_PATH = os.path.join(REPO_DIR, "aqi_raw.csv")
+DEFAULT_OUTPUT_PATH = os.path.join(REPO_DIR, "MLProject", "aqi_preprocessing.parquet")
+DEFAULT_CHUNKSIZE = 100000
+
+TARGET = 'AQI Category'
+TEXT_COLUMNS = ['Country', 'City']
+VALUE_COLUMNS = ['AQI Value', 'CO AQI Value', 'Ozone AQI Value', 'NO2 AQI Value', 'PM2.5 AQI Value']
+SUBCATEGORY_COLUMNS = ['CO AQI Category', 'Ozone AQI Category', 'NO2 AQI Category', 'PM2.5 AQI Category']
+COORD_COLUMNS = ['lat', 'lng']
+COLUMNS = [
+    'Country', 'City', 'AQI Value', 'AQI Category', 'CO AQI Value', 'CO AQI Category', 'Ozone AQI Value',
+    'Ozone AQI Category', 'NO2 AQI Value', 'NO2 AQI Category', 'PM2.5 AQI Value', 'PM2.5 AQI Category', 'lat', 'lng'
+]
+
+# Kategori dengan urutan tetap: kode categorical == kunci AQI_CATEGORY_LABELS di setiap chunk
+CATEGORY_DTYPE = pd.CategoricalDtype([AQI_CATEGORY_LABELS[code] for code in sorted(AQI_CATEGORY_LABELS)])
+
+# Nilai AQI dibaca sebagai float32 dulu agar baris kosong bisa dibuang sebelum dikonversi ke int16
+READ_DTYPES = {
+    **{column: 'object' for column in TEXT_COLUMNS},
+    **{column: 'float32' for column in VALUE_COLUMNS},
+    **{column: CATEGORY_DTYPE for column in [TARGET] + SUBCATEGORY_COLUMNS},
+    **{column: 'float32' for column in COORD_COLUMNS},
+}
+
+INT16_MAX = np.iinfo(np.int16).max
+
+
+def encode_categories(labels):
+    """Label kategori AQI (mis. 'Moderate') -> kode int8 sesuai AQI_CATEGORY_MAP; -1 untuk label tidak dikenal."""
+    return pd.Categorical(labels, dtype=CATEGORY_DTYPE).codes
+
+
+def decode_categories(codes):
+    return pd.Categorical.from_codes(np.asarray(codes), dtype=CATEGORY_DTYPE)
+
+
+def clean_chunk(chunk, stats):
+    """
+    Membersihkan satu chunk secara vektor.
+    Returns:
+        pd.DataFrame: Baris valid dengan dtype ringkas dan `AQI Category` sebagai kode int8.
+    """
+    for column in TEXT_COLUMNS:
+        chunk[column] = chunk[column].str.strip().replace('', np.nan)
+
+    missing = chunk[COLUMNS].isna().any(axis=1).to_numpy()
+    values = chunk[VALUE_COLUMNS].to_numpy()
+    with np.errstate(invalid='ignore'):
+        invalid = ~missing & (
+            (values < 0) | (values > INT16_MAX) | (values != np.round(values))
+        ).any(axis=1)
+    stats['dropped_missing'] += int(missing.sum())
+    stats['dropped_invalid'] += int(invalid.sum())
+
+    chunk = chunk.loc[~(missing | invalid), COLUMNS]
+    chunk = chunk.astype({column: 'int16' for column in VALUE_COLUMNS})
+    chunk[TARGET] = chunk[TARGET].cat.codes.astype('int8')
+    return chunk.reset_index(drop=True)
+
+
+class SeenRows:
+    """Himpunan hash baris yang sudah ditulis, disimpan sebagai array uint64 terurut."""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def filter_new(self, chunk):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        positions = np.searchsorted(self.hashes, hashes)
+        seen = positions < len(self.hashes)
+        seen[seen] = self.hashes[positions[seen]] == hashes[seen]
+        keep = first & ~seen
+        self.hashes = np.union1d(self.hashes, hashes[keep])
+        return keep
+
+
+class _ArrowWriter:
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.writer = None
+
+    def write(self, chunk):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            if self.kind == "parquet":
+                import pyarrow.parquet as pq
+
+                self.writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+            else:
+                self.writer = pa.ipc.new_file(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _CsvWriter:
+
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+def output_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".feather", ".arrow"):
+        return "feather"
+    if extension == ".csv":
+        return "csv"
+    return "parquet"
+
+
+def preprocess(raw_path=DEFAULT_RAW_PATH, output_path=DEFAULT_OUTPUT_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Menjalankan pipeline dari CSV mentah ke file output secara streaming.
+    File ditulis ke path sementara lalu di-rename, sehingga pembaca tidak pernah melihat file setengah jadi.
+    Returns:
+        dict: Jumlah baris yang dibaca, dibuang (kosong/tidak valid/duplikat) dan ditulis.
+    """
+    kind = output_format(output_path)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    writer = _CsvWriter(tmp_path) if kind == "csv" else _ArrowWriter(tmp_path, kind)
+
+    stats = {'rows_read': 0, 'dropped_missing': 0, 'dropped_invalid': 0, 'dropped_duplicates': 0, 'rows_written': 0}
+    seen = SeenRows()
+    try:
+        for chunk in pd.read_csv(raw_path, usecols=COLUMNS, dtype=READ_DTYPES, chunksize=chunksize):
+            stats['rows_read'] += len(chunk)
+            chunk = clean_chunk(chunk, stats)
+            keep = seen.filter_new(chunk)
+            stats['dropped_duplicates'] += int((~keep).sum())
+            chunk = chunk[keep]
+            if len(chunk):
+                writer.write(chunk)
+                stats['rows_written'] += len(chunk)
+        writer.close()
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return stats
+
+
+def load_dataset(path=DEFAULT_OUTPUT_PATH, columns=None):
+    """
+    Membaca dataset hasil preprocessing. Feather/Arrow dan Parquet dibuka lewat memory map,
+    sehingga kolom numerik tidak disalin ulang ke memori proses.
+    """
+    kind = output_format(path)
+    if kind == "csv":
+        dtypes = {column: dtype for column, dtype in READ_DTYPES.items() if column != TARGET}
+        dtypes.update({column: 'int16' for column in VALUE_COLUMNS})
+        dtypes[TARGET] = 'int8'
+        return pd.read_csv(path, usecols=columns, dtype=dtypes)
+
+    import pyarrow as pa
+
+    if kind == "feather":
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocessing aqi_raw.csv menjadi dataset training.")
+    parser.add_argument("raw", nargs="?", default=DEFAULT_RAW_PATH, help="CSV mentah.")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_PATH, help="File output (.parquet, .feather, .csv).")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Jumlah baris per chunk.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = preprocess(args.raw, args.output, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{stats['rows_written']} dari {stats['rows_read']} baris ditulis ke {args.output} dalam {elapsed:.2f} s "
+        f"(kosong: {stats['dropped_missing']}, tidak valid: {stats['dropped_invalid']}, "
+        f"duplikat: {stats['dropped_duplicates']})"
+    )
+
+
+if __name__ == "__main__":
+    main()
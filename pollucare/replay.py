@@ -0,0 +1,326 @@
+"""
+Rekam/putar ulang respon API eksternal (OpenWeather, Overpass, Gemini) dari fixture lokal.
+
+Mode dipilih lewat POLLUCARE_REPLAY:
+    - "off" (default): tidak ada perubahan perilaku,
+    - "record": request berjalan normal dan setiap respon disimpan sebagai fixture JSON,
+    - "replay": tidak ada jaringan; respon diambil dari fixture, dengan latensi dan error yang bisa diatur.
+
+Untuk HTTP, `ReplayAdapter` dipasang di session klien bersama (pollucare/httpclient.py), jadi retry,
+circuit breaker dan cache di atasnya tetap berjalan seperti biasa. Untuk Gemini, model dibungkus
+`wrap_gemini_model` (record) atau diganti `GeminiReplay` (replay) di app.py dan service.py.
+Fixture disimpan di POLLUCARE_FIXTURES_DIR (default data/fixtures) per layanan, dengan key dari
+method, URL tanpa `appid` dan body request; kunci API tidak pernah ikut tersimpan.
+
+Latensi dan error untuk mode replay (per layanan: openweather, overpass, gemini, atau * untuk semua):
+    POLLUCARE_REPLAY_LATENCY_MS="recorded"               latensi asli saat direkam (default)
+    POLLUCARE_REPLAY_LATENCY_MS="openweather=120,*=0"    latensi tetap dalam milidetik
+    POLLUCARE_REPLAY_JITTER=0.2                          variasi acak ±20% dari latensi
+    POLLUCARE_REPLAY_ERROR_RATE="overpass=0.1"           peluang error per request
+    POLLUCARE_REPLAY_ERROR_KIND=timeout                  timeout | connection | http503
+    POLLUCARE_REPLAY_SEED=0                              agar urutan latensi/error bisa diulang
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("off", "record", "replay")
+
+SERVICE_HOSTS = {
+    "api.openweathermap.org": "openweather",
+    "overpass-api.de": "overpass",
+}
+
+# Parameter yang tidak ikut key maupun file fixture
+SECRET_PARAMS = frozenset({"appid", "key", "api_key"})
+
+
+class FixtureMissingError(requests.exceptions.ConnectionError):
+    """Dilempar dalam mode replay jika request belum pernah direkam."""
+
+
+def _parse_rates(spec, default):
+    """'openweather=120,*=0' -> {'openweather': 120.0, '*': 0.0}; angka tunggal berlaku untuk semua layanan."""
+    rates = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, value = item.rpartition("=")
+        rates[name.strip() or "*"] = value.strip() if value.strip() == "recorded" else float(value)
+    rates.setdefault("*", default)
+    return rates
+
+
+class ReplayConfig:
+
+    def __init__(self, mode="off", fixtures_dir=None, latency_ms="recorded", jitter=0.0,
+                 error_rate="", error_kind="timeout", seed=None):
+        if mode not in MODES:
+            raise ValueError(f"POLLUCARE_REPLAY harus salah satu dari {', '.join(MODES)}, bukan {mode!r}")
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir or os.path.join(REPO_DIR, "data", "fixtures")
+        self.latency_ms = _parse_rates(latency_ms, "recorded")
+        self.jitter = float(jitter)
+        self.error_rate = _parse_rates(error_rate, 0.0)
+        self.error_kind = error_kind
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        seed = os.environ.get("POLLUCARE_REPLAY_SEED")
+        return cls(
+            mode=os.environ.get("POLLUCARE_REPLAY", "off").lower(),
+            fixtures_dir=os.environ.get("POLLUCARE_FIXTURES_DIR"),
+            latency_ms=os.environ.get("POLLUCARE_REPLAY_LATENCY_MS", "recorded"),
+            jitter=os.environ.get("POLLUCARE_REPLAY_JITTER", 0.0),
+            error_rate=os.environ.get("POLLUCARE_REPLAY_ERROR_RATE", ""),
+            error_kind=os.environ.get("POLLUCARE_REPLAY_ERROR_KIND", "timeout"),
+            seed=int(seed) if seed else None,
+        )
+
+    def _rate(self, rates, service):
+        return rates.get(service, rates["*"])
+
+    def delay_seconds(self, service, recorded_ms):
+        latency = self._rate(self.latency_ms, service)
+        if latency == "recorded":
+            latency = recorded_ms or 0.0
+        with self._lock:
+            factor = 1.0 + self._random.uniform(-self.jitter, self.jitter) if self.jitter else 1.0
+        return max(0.0, latency * factor / 1000.0)
+
+    def should_fail(self, service):
+        rate = self._rate(self.error_rate, service)
+        if not rate:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def path(self, service, key):
+        return os.path.join(self.fixtures_dir, service, f"{key}.json")
+
+
+_config = ReplayConfig.from_env()
+
+# Jumlah panggilan upstream per layanan (direkam atau diputar ulang), untuk mengukur efektivitas cache
+_calls = Counter()
+_calls_lock = threading.Lock()
+
+
+def get_config():
+    return _config
+
+
+def configure(**kwargs):
+    """
+    Mengganti konfigurasi replay untuk proses ini (mis. dari pollucare.benchmark). Harus dipanggil
+    sebelum klien HTTP bersama dibuat, karena adapter dipasang saat klien dibuat.
+    """
+    global _config
+    _config = ReplayConfig(**kwargs)
+    return _config
+
+
+def _count_call(service):
+    with _calls_lock:
+        _calls[service] += 1
+
+
+def call_counts(reset=False):
+    """Panggilan upstream per layanan sejak reset terakhir."""
+    with _calls_lock:
+        result = dict(_calls)
+        if reset:
+            _calls.clear()
+    return result
+
+
+def is_active():
+    return _config.mode != "off"
+
+
+def service_for(url):
+    return SERVICE_HOSTS.get(urlsplit(url).hostname, urlsplit(url).hostname or "http")
+
+
+def _public_url(url):
+    """URL dengan parameter query terurut dan tanpa kunci API."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _body_text(body):
+    if body is None:
+        return ""
+    return body.decode("utf-8", "replace") if isinstance(body, bytes) else str(body)
+
+
+def _digest(*parts):
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _inject(config, service, recorded_ms):
+    """Latensi lalu (dengan peluang yang diatur) error, seperti yang dialami dari upstream."""
+    delay = config.delay_seconds(service, recorded_ms)
+    if delay:
+        time.sleep(delay)
+    if config.should_fail(service):
+        if config.error_kind == "connection":
+            raise requests.exceptions.ConnectionError(f"Error koneksi buatan (replay) ke {service}")
+        if config.error_kind == "timeout":
+            raise requests.exceptions.ReadTimeout(f"Timeout buatan (replay) dari {service}")
+        return True
+    return False
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter `requests`: merekam respon (record) atau menjawab dari fixture (replay)."""
+
+    def send(self, request, **kwargs):
+        config = _config
+        service = service_for(request.url)
+        url = _public_url(request.url)
+        body = _body_text(request.body)
+        key = _digest(request.method, url, body)
+        _count_call(service)
+
+        if config.mode == "record":
+            start = time.perf_counter()
+            response = super().send(request, **kwargs)
+            _write_json(config.path(service, key), {
+                "method": request.method,
+                "url": url,
+                "body": body,
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type", "application/json"),
+                "content": response.text,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+            return response
+
+        fixture = _read_json(config.path(service, key))
+        if fixture is None:
+            raise FixtureMissingError(f"Fixture belum direkam untuk {request.method} {url}", request=request)
+        failed = _inject(config, service, fixture.get("elapsed_ms"))
+
+        response = requests.Response()
+        response.status_code = 503 if failed else fixture["status"]
+        response._content = b"" if failed else fixture["content"].encode("utf-8")
+        response.headers = CaseInsensitiveDict({"Content-Type": fixture["content_type"]})
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "Service Unavailable" if failed else "OK"
+        return response
+
+
+def http_adapter(**kwargs):
+    """Adapter untuk dipasang di requests.Session: ReplayAdapter bila replay aktif, HTTPAdapter biasa bila tidak."""
+    return ReplayAdapter(**kwargs) if is_active() else HTTPAdapter(**kwargs)
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def _gemini_key(prompt):
+    return _digest(" ".join(str(prompt).split()))
+
+
+class GeminiRecorder:
+    """Pembungkus model Gemini yang menyimpan potongan teks setiap stream ke fixture."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        _count_call("gemini")
+        start = time.perf_counter()
+        response = self.model.generate_content(prompt, stream=stream, **kwargs)
+        if not stream:
+            return response
+
+        def chunks():
+            texts, first_ms = [], None
+            for chunk in response:
+                if first_ms is None:
+                    first_ms = (time.perf_counter() - start) * 1000
+                text = getattr(chunk, "text", "")
+                texts.append(text)
+                yield chunk
+            _write_json(_config.path("gemini", _gemini_key(prompt)), {
+                "prompt": str(prompt),
+                "chunks": texts,
+                "first_chunk_ms": round(first_ms or 0.0, 1),
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+
+        return chunks()
+
+
+class GeminiReplay:
+    """
+    Pengganti model Gemini dalam mode replay: memutar ulang potongan teks yang direkam. Latensi
+    yang diatur berlaku sampai potongan pertama; sisa durasi rekaman dibagi rata antar-potongan.
+    """
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        config = _config
+        _count_call("gemini")
+        fixture = _read_json(config.path("gemini", _gemini_key(prompt)))
+        if fixture is None:
+            raise FixtureMissingError("Fixture Gemini belum direkam untuk prompt ini")
+
+        def chunks():
+            if _inject(config, "gemini", fixture.get("first_chunk_ms")):
+                raise requests.exceptions.HTTPError("503 buatan (replay) dari gemini")
+            texts = fixture["chunks"]
+            rest = max(0.0, (fixture.get("elapsed_ms") or 0.0) - (fixture.get("first_chunk_ms") or 0.0))
+            for i, text in enumerate(texts):
+                if i and config._rate(config.latency_ms, "gemini") == "recorded":
+                    time.sleep(rest / 1000.0 / max(1, len(texts) - 1))
+                yield _Chunk(text)
+
+        if stream:
+            return chunks()
+        return _Chunk("".join(chunk.text for chunk in chunks()))
+
+
+def wrap_gemini_model(model):
+    """Model Gemini sesuai mode: direkam (record), diganti GeminiReplay (replay), atau apa adanya (off)."""
+    if _config.mode == "replay":
+        return GeminiReplay()
+    if _config.mode == "record" and model is not None:
+        return GeminiRecorder(model)
+    return model
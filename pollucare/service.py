@@ -0,0 +1,336 @@
+"""
+Layanan HTTP JSON (FastAPI) untuk prediksi kualitas udara, saran kesehatan, dan rumah sakit terdekat,
+memakai modul yang sama dengan app.py tetapi tanpa Streamlit.
+
+Endpoint:
+    POST /predict    {"city": "Pekanbaru"} | {"lat": .., "lon": ..} | {"components": {"CO": .., "Ozone": .., "NO2": .., "PM25": ..}}
+    POST /advice     seperti /predict, ditambah "user_info" dan opsional "category" (lewati prediksi)
+    GET  /hospitals  ?lat=..&lon=..&radius_km=10&limit=5 -> name, address, lat, lon, distance_km
+    GET  /health     status dan statistik micro-batcher/cache
+    GET  /metrics    metrik Prometheus (pollucare/metrics.py)
+
+Kunci OpenWeather hanya dibaca dari env OPENWEATHER_API_KEY; tanpa kunci, endpoint yang butuh
+OpenWeather menjawab 503 (kecuali mode replay, lihat pollucare/replay.py).
+
+Inferensi /predict melewati MicroBatcher: request yang datang bersamaan dikumpulkan beberapa
+milidetik lalu diprediksi dengan satu perkalian matriks. Menjalankan server (port 8000 sesuai
+Dockerfile):
+    uvicorn pollucare.service:app --host 0.0.0.0 --port 8000 --workers 2
+Uji beban (server harus sudah berjalan):
+    python -m pollucare.loadtest --url http://localhost:8000 --concurrency 64 --duration 20
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import numpy as np
+import requests
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel
+
+from pollucare import advice, advice_templates, aqi, gazetteer, geogrid, hospitals, metrics, openweather, prefetch, replay
+from pollucare.cache import get_cache
+from pollucare.constants import AQI_CATEGORY_MAP
+from pollucare.inference import DEFAULT_NPZ_PATH, load_model
+
+OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY")
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+MODEL_PATH = os.environ.get("POLLUCARE_MODEL_PATH", DEFAULT_NPZ_PATH)
+
+# Ukuran batch maksimal dan batas tunggu (ms) micro-batcher; POLLUCARE_BATCH_MAX=1 mematikan batching
+BATCH_MAX_SIZE = int(os.environ.get("POLLUCARE_BATCH_MAX", 256))
+BATCH_MAX_WAIT_MS = float(os.environ.get("POLLUCARE_BATCH_WAIT_MS", 2))
+
+ADVICE_LLM_BUDGET_SECONDS = float(os.environ.get("POLLUCARE_ADVICE_LLM_BUDGET", 8))
+
+
+class MicroBatcher:
+    """
+    Mengumpulkan baris fitur dari request yang bersamaan lalu memanggil `model.predict` sekali.
+
+    Jendela tunggu adaptif: batch hanya menunggu jika batch sebelumnya berisi lebih dari satu
+    request (ada request bersamaan) dan selang antar-kedatangan (EWMA) lebih pendek dari
+    `max_wait`. Pada beban rendah atau satu klien berurutan batch langsung dijalankan tanpa
+    menambah latensi; di bawah beban, batch menunggu sampai penuh atau jendelanya habis.
+    """
+
+    def __init__(self, model, max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.interarrival = None
+        self._last_arrival = None
+        self._last_batch_size = 0
+        self._pending = deque()
+        self._wakeup = None
+        self._worker = None
+        self.stats = {"requests": 0, "batches": 0, "max_batch_seen": 0}
+
+    def _observe_arrival(self):
+        now = time.monotonic()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            self.interarrival = gap if self.interarrival is None else 0.8 * self.interarrival + 0.2 * gap
+        self._last_arrival = now
+
+    async def predict(self, features):
+        """Probabilitas kelas untuk satu baris fitur (1, 4)."""
+        if self._worker is None:
+            self._wakeup = asyncio.Event()
+            # Task pekerja dibuat dengan konteks kosong agar tidak mewarisi trace request pertama
+            self._worker = contextvars.Context().run(asyncio.create_task, self._run())
+        future = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        self._observe_arrival()
+        self._pending.append((np.asarray(features, dtype=np.float32).reshape(-1), future))
+        self._wakeup.set()
+        result = await future
+        # Latensi inferensi yang dialami request ini, termasuk waktu tunggu batch
+        metrics.observe("inference", time.perf_counter() - started)
+        return result
+
+    def _window(self):
+        if self.max_batch == 1 or self._last_batch_size <= 1:
+            return 0.0
+        if self.interarrival is None or self.interarrival > self.max_wait:
+            return 0.0
+        return min(self.max_wait, self.interarrival * (self.max_batch - len(self._pending)))
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            deadline = time.monotonic() + self._window()
+            # Setiap request baru membangunkan loop ini; berhenti saat batch penuh atau jendela habis
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+                matrix = np.stack([row for row, _ in batch])
+                metrics.observe_batch_size(len(batch))
+                try:
+                    proba = await asyncio.to_thread(self.model.predict, matrix)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self._last_batch_size = len(batch)
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+                for (_, future), row in zip(batch, np.asarray(proba)):
+                    if not future.done():
+                        future.set_result(row)
+
+
+class UserInfo(BaseModel):
+    age: object = 'N/A'
+    medical_condition: str = 'Tidak ada'
+    activity_preference: str = 'Tidak disebutkan'
+
+
+class Components(BaseModel):
+    """Konsentrasi polutan dalam µg/m³, dengan kunci yang sama seperti openweather.parse_components."""
+    CO: float = 0.0
+    Ozone: float = 0.0
+    NO2: float = 0.0
+    PM25: float = 0.0
+
+
+class PredictRequest(BaseModel):
+    city: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    components: Optional[Components] = None
+
+
+class AdviceRequest(PredictRequest):
+    category: Optional[str] = None
+    user_info: Optional[UserInfo] = None
+
+
+def _model_dump(model):
+    return model.model_dump() if hasattr(model, "model_dump") else model.dict()
+
+
+_batcher = None
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+
+def get_gemini_model():
+    """Model Gemini untuk /advice, dibuat sekali per proses; None jika GEMINI_API_KEY tidak diset."""
+    global _gemini_model
+    with _gemini_model_lock:
+        if _gemini_model is None:
+            if replay.get_config().mode == "replay":
+                _gemini_model = replay.wrap_gemini_model(None)
+            elif GEMINI_API_KEY:
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                _gemini_model = replay.wrap_gemini_model(genai.GenerativeModel('gemini-2.0-flash'))
+        return _gemini_model
+
+
+def openweather_api_key():
+    """Kunci OpenWeather dari env; 503 jika tidak diset (mode replay tidak membutuhkan kunci asli)."""
+    if OPENWEATHER_API_KEY:
+        return OPENWEATHER_API_KEY
+    if replay.get_config().mode == "replay":
+        return "replay"
+    raise HTTPException(status_code=503, detail="OPENWEATHER_API_KEY belum dikonfigurasi di server.")
+
+
+def get_batcher():
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(load_model(MODEL_PATH))
+    return _batcher
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Model dimuat sebelum request pertama; scheduler prefetch berjalan sekali per worker (lihat pollucare/prefetch.py)
+    batcher = get_batcher()
+    if OPENWEATHER_API_KEY:
+        prefetch.start_background(OPENWEATHER_API_KEY, model=batcher.model)
+    yield
+
+
+app = FastAPI(title="PolluCare API", description="Prediksi kualitas udara & saran kesehatan", lifespan=lifespan)
+
+
+def _openweather_call(stage, fn, *args):
+    try:
+        with metrics.stage(stage):
+            return fn(*args)
+    except requests.exceptions.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"OpenWeather tidak dapat dihubungi: {e}")
+    except (IndexError, KeyError):
+        raise HTTPException(status_code=502, detail="Format respon OpenWeather tidak sesuai yang diharapkan.")
+
+
+def resolve_location(body):
+    """(lat, lon, nama kota) dari nama kota atau koordinat pada body request."""
+    if body.lat is not None and body.lon is not None:
+        city = body.city or gazetteer.nearest_city(body.lat, body.lon)
+        if not city:
+            city = _openweather_call("reverse_geocoding", openweather.fetch_city_name,
+                                     *geogrid.snap_for('city_name', body.lat, body.lon), openweather_api_key())
+        return body.lat, body.lon, city
+    if body.city:
+        lat, lon = gazetteer.lookup(body.city)
+        if lat is None:
+            lat, lon = _openweather_call("geocoding", openweather.fetch_coordinates, body.city, openweather_api_key())
+        if lat is None:
+            raise HTTPException(status_code=404, detail=f"Kota '{body.city}' tidak ditemukan.")
+        return lat, lon, body.city
+    raise HTTPException(status_code=422, detail="Isi `city`, `lat` dan `lon`, atau `components`.")
+
+
+def load_components(body):
+    """Konsentrasi polutan (µg/m³) dan nama lokasi untuk body request."""
+    if body.components is not None:
+        return _model_dump(body.components), body.city
+    lat, lon, city = resolve_location(body)
+    prefetch.record_request(lat, lon)
+    components = _openweather_call(
+        "air_pollution", openweather.fetch_air_pollution, *geogrid.snap_for('air_pollution', lat, lon), openweather_api_key()
+    )
+    if not components:
+        raise HTTPException(status_code=404, detail="Data polutan tidak tersedia untuk lokasi ini.")
+    return components, city
+
+
+async def predict_components(components):
+    proba = await get_batcher().predict(aqi.features_from_components(components))
+    class_index = int(np.argmax(proba))
+    return {
+        "category": AQI_CATEGORY_MAP[class_index],
+        "class_index": class_index,
+        "probability": float(proba[class_index]),
+    }
+
+
+@metrics.instrument("advice")
+def generate_advice(category, components, city, user_info):
+    def template_advice():
+        return advice_templates.render_advice(category, components, city, user_info)
+
+    model = get_gemini_model()
+    if model is None:
+        return template_advice(), "template"
+    try:
+        text = "".join(advice.hedged_stream(
+            lambda: advice.stream_health_advice(model, category, components, city, user_info),
+            template_advice,
+            ADVICE_LLM_BUDGET_SECONDS
+        ))
+        return text, "llm"
+    except Exception as e:
+        metrics.record_upstream_error("advice", e)
+        return template_advice(), "template"
+
+
+@app.post("/predict")
+async def predict_endpoint(body: PredictRequest):
+    with metrics.trace_request("predict"):
+        components, city = await asyncio.to_thread(load_components, body)
+        return {"city": city, "components": components, **(await predict_components(components))}
+
+
+@app.post("/advice")
+async def advice_endpoint(body: AdviceRequest):
+    with metrics.trace_request("advice"):
+        category = body.category
+        if category is not None and category not in AQI_CATEGORY_MAP.values():
+            raise HTTPException(status_code=422, detail=f"Kategori '{category}' tidak dikenal; pilih salah satu dari "
+                                                        f"{sorted(AQI_CATEGORY_MAP.values())}.")
+        components, city = await asyncio.to_thread(load_components, body)
+        if category is None:
+            category = (await predict_components(components))["category"]
+        user_info = _model_dump(body.user_info or UserInfo())
+        text, source = await asyncio.to_thread(generate_advice, category, components, city, user_info)
+        return {"city": city, "category": category, "advice": text, "source": source}
+
+
+@app.get("/hospitals")
+async def hospitals_endpoint(lat: float, lon: float, radius_km: float = 10, limit: int = 5):
+    try:
+        with metrics.trace_request("hospitals"), metrics.stage("hospitals"):
+            results = await asyncio.to_thread(
+                hospitals.search_hospitals, *geogrid.snap_for('nearby_hospitals', lat, lon), radius_km, limit
+            )
+    except requests.exceptions.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Overpass API tidak dapat dihubungi: {e}")
+    return {"hospitals": results}
+
+
+@app.get("/health")
+async def health_endpoint():
+    cache = get_cache()
+    return {
+        "status": "ok",
+        "batcher": dict(get_batcher().stats),
+        "cache": cache.stats() if cache is not None else None,
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    content, content_type = metrics.render_latest()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,104 @@
+"""Uji pollucare.advice dengan model stub yang meniru `generate_content(stream=True)` Gemini."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from pollucare import advice
+from pollucare import cache as cache_module
+from pollucare.cache import MemoryBackend, PersistentCache
+
+POLLUTANTS = {'CO': 287.4, 'Ozone': 40.1, 'NO2': 10.2, 'PM25': 35.2}
+USER_INFO = {'age': 30, 'medical_condition': 'Asma, Diabetes', 'activity_preference': 'Lari pagi'}
+
+
+class StubModel:
+    """Mengembalikan `chunks` satu per satu; bila `gate` diberikan, potongan pertama menunggu gate dibuka."""
+
+    def __init__(self, chunks, gate=None):
+        self.chunks = chunks
+        self.gate = gate
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        assert stream
+        self.prompts.append(prompt)
+        return self._stream()
+
+    def _stream(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        for text in self.chunks:
+            yield SimpleNamespace(text=text)
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    cache = PersistentCache(MemoryBackend())
+    monkeypatch.setattr(cache_module, "_default_cache", cache)
+    monkeypatch.setattr(cache_module, "_default_cache_ready", True)
+    return cache
+
+
+def wait_for_cached_advice(*args, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        text = advice.get_cached_advice(*args)
+        if text:
+            return text
+        time.sleep(0.01)
+    return None
+
+
+def test_cache_hit_on_normalized_inputs(memory_cache):
+    model = StubModel(["Bapak/Ibu, ", "kurangi aktivitas ", "di luar ruangan."])
+    first = "".join(advice.stream_health_advice(model, "Sedang", POLLUTANTS, "Jakarta", USER_INFO))
+
+    # Spasi, huruf besar/kecil, urutan daftar dan pembulatan polutan tidak mengubah key cache
+    variant_pollutants = {**POLLUTANTS, 'CO': 291.0, 'PM25': 35.4}
+    variant_user = {'age': ' 30 ', 'medical_condition': 'diabetes ,  ASMA', 'activity_preference': 'lari  PAGI'}
+    second = list(advice.stream_health_advice(model, "Sedang", variant_pollutants, "  jakarta ", variant_user))
+
+    assert second == [first]
+    assert len(model.prompts) == 1
+
+    # Kategori berbeda tetap memanggil model
+    list(advice.stream_health_advice(model, "Tidak Sehat", POLLUTANTS, "Jakarta", USER_INFO))
+    assert len(model.prompts) == 2
+
+
+def test_stream_preserves_chunk_order(memory_cache):
+    chunks = ["Bapak/Ibu, ", "kualitas udara ", "hari ini ", "sedang."]
+    model = StubModel(chunks)
+    assert list(advice.stream_health_advice(model, "Sedang", POLLUTANTS, "Bandung")) == chunks
+    assert advice.get_cached_advice("Sedang", POLLUTANTS, "Bandung") == "".join(chunks)
+
+
+def test_hedged_stream_falls_back_after_budget(memory_cache):
+    gate = threading.Event()
+    model = StubModel(["Saran ", "dari model."], gate=gate)
+
+    start = time.monotonic()
+    result = list(advice.hedged_stream(
+        lambda: advice.stream_health_advice(model, "Sedang", POLLUTANTS, "Surabaya"),
+        lambda: "Saran template.",
+        budget=0.05,
+    ))
+    assert result == ["Saran template."]
+    assert time.monotonic() - start < 1.0
+
+    # Stream yang terlambat dihabiskan di background sehingga request berikutnya kena cache
+    gate.set()
+    assert wait_for_cached_advice("Sedang", POLLUTANTS, "Surabaya") == "Saran dari model."
+
+
+def test_hedged_stream_forwards_primary_within_budget(memory_cache):
+    chunks = ["Saran ", "dari model."]
+    model = StubModel(chunks)
+    result = list(advice.hedged_stream(
+        lambda: advice.stream_health_advice(model, "Sedang", POLLUTANTS, "Medan"),
+        lambda: "Saran template.",
+        budget=2.0,
+    ))
+    assert result == chunks
@@ -0,0 +1,56 @@
+"""Cakupan tabel saran template untuk semua kategori, polutan dominan dan profil pengguna."""
+import itertools
+
+import pytest
+
+from pollucare.advice_templates import AGE_SENTENCES, POLLUTANT_REFERENCE, dominant_pollutant, render_advice
+from pollucare.constants import AQI_CATEGORY_MAP
+
+# Satu usia per kelompok usia, termasuk usia yang tidak diisi
+AGES = {'anak': 8, 'remaja': 15, 'dewasa': 35, 'lansia': 70, 'tidak_diketahui': 'N/A'}
+
+# Satu input bebas per kelompok kondisi medis
+CONDITIONS = {
+    'asma': 'Asma',
+    'ppok': 'PPOK',
+    'paru': 'riwayat TBC',
+    'jantung': 'Darah tinggi',
+    'diabetes': 'Diabetes',
+    'hamil': 'Sedang hamil',
+    'lainnya': 'Migrain',
+    'tidak_ada': 'Tidak ada',
+}
+
+
+def pollutants_dominated_by(key):
+    """Konsentrasi dengan `key` jauh di atas pedoman WHO dan polutan lain di bawahnya."""
+    return {name: reference * (10.0 if name == key else 0.1) for name, reference in POLLUTANT_REFERENCE.items()}
+
+
+def test_age_bands_cover_table():
+    assert set(AGES) == set(AGE_SENTENCES)
+
+
+@pytest.mark.parametrize("category", list(AQI_CATEGORY_MAP.values()))
+def test_render_every_combination(category):
+    for pollutant, age, condition in itertools.product(POLLUTANT_REFERENCE, AGES.values(), CONDITIONS.values()):
+        values = pollutants_dominated_by(pollutant)
+        assert dominant_pollutant(values) == pollutant
+        user_info = {'age': age, 'medical_condition': condition, 'activity_preference': 'Bersepeda'}
+        text = render_advice(category, values, "Yogyakarta", user_info)
+        assert text.startswith("Bapak/Ibu")
+        assert "Yogyakarta" in text
+        assert "{" not in text
+        assert "bersepeda" in text
+
+
+def test_missing_profile_and_city():
+    text = render_advice('Tidak Sehat', {}, None)
+    assert "lokasi Anda" in text
+    assert "{" not in text
+
+
+@pytest.mark.parametrize("category", ["Bogus", "", None, "sedang"])
+def test_unknown_category_is_rejected(category):
+    with pytest.raises(ValueError):
+        render_advice(category, pollutants_dominated_by('PM25'), "Jakarta")
@@ -0,0 +1,170 @@
+"""Uji pollucare.httpclient terhadap server HTTP stub lokal (tanpa jaringan eksternal)."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from pollucare.httpclient import CircuitOpenError, HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 agar koneksi keep-alive bisa dipakai ulang oleh pool klien
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            script = server.scripts.get(self.path)
+            step = script.pop(0) if script and len(script) > 1 else (script[0] if script else (200, {}))
+        status, headers = step
+        if headers.get("delay"):
+            time.sleep(headers["delay"])
+        if headers.get("wait"):
+            headers["wait"].wait(5)
+        body = b'{"ok": true}'
+        self.send_response(status)
+        for name, value in headers.items():
+            if name not in ("delay", "wait"):
+                self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.hits = {}
+    # Per path: daftar (status, header) yang dijawab berurutan; langkah terakhir diulang terus
+    server.scripts = {}
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(**kwargs):
+    delays = []
+    kwargs.setdefault("sleep", delays.append)
+    client = HttpClient(**kwargs)
+    return client, delays
+
+
+def test_connections_are_reused(stub):
+    client, _ = make_client()
+    for _ in range(5):
+        assert client.get(stub.url + "/ok").status_code == 200
+    metrics = client.metrics()
+    assert metrics["connections_opened"] == 1
+    assert metrics["connections_reused"] == 4
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_honor_retry_after(stub, status):
+    stub.scripts["/busy"] = [(status, {"Retry-After": "2"}), (status, {"Retry-After": "1"}), (200, {})]
+    client, delays = make_client(max_retries=3)
+    response = client.get(stub.url + "/busy")
+    assert response.status_code == 200
+    assert delays == [2.0, 1.0]
+    assert stub.hits["/busy"] == 3
+    assert client.metrics()["retries"] == 2
+
+
+def test_retry_after_above_limit_is_not_retried(stub):
+    stub.scripts["/busy"] = [(503, {"Retry-After": "120"})]
+    client, delays = make_client(max_retries=3, max_retry_after=30.0)
+    assert client.get(stub.url + "/busy").status_code == 503
+    assert delays == []
+    assert stub.hits["/busy"] == 1
+
+
+def test_read_timeout(stub):
+    stub.scripts["/slow"] = [(200, {"delay": 1.0})]
+    client, _ = make_client(read_timeout=0.2, max_retries=0)
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get(stub.url + "/slow")
+    assert time.monotonic() - start < 0.9
+
+
+def test_breaker_closed_open_half_open(stub):
+    stub.scripts["/flaky"] = [(503, {}), (503, {})]
+    client, _ = make_client(max_retries=0, failure_threshold=2, reset_timeout=0.3)
+    host = stub.url.split("//")[1]
+
+    for _ in range(2):
+        assert client.get(stub.url + "/flaky").status_code == 503
+    assert client.breaker(host).state == "open"
+
+    # Terbuka: ditolak tanpa menghubungi server
+    with pytest.raises(CircuitOpenError):
+        client.get(stub.url + "/flaky")
+    assert stub.hits["/flaky"] == 2
+
+    time.sleep(0.35)
+    assert client.breaker(host).state == "half-open"
+
+    # Half-open: hanya satu request percobaan; request lain ditolak selama percobaan berjalan
+    release = threading.Event()
+    stub.scripts["/flaky"] = [(200, {"wait": release})]
+    trial = {}
+    thread = threading.Thread(target=lambda: trial.update(response=client.get(stub.url + "/flaky")))
+    thread.start()
+    deadline = time.monotonic() + 2
+    while stub.hits["/flaky"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with pytest.raises(CircuitOpenError):
+        client.get(stub.url + "/flaky")
+    release.set()
+    thread.join(5)
+
+    assert trial["response"].status_code == 200
+    assert stub.hits["/flaky"] == 3
+    assert client.breaker(host).state == "closed"
+
+
+def test_breaker_counts_requests_not_attempts(stub):
+    stub.scripts["/flaky"] = [(503, {})]
+    client, delays = make_client(max_retries=2, failure_threshold=2)
+    host = stub.url.split("//")[1]
+
+    assert client.get(stub.url + "/flaky").status_code == 503
+    assert stub.hits["/flaky"] == 3
+    assert len(delays) == 2
+    assert client.breaker(host).failures == 1
+    assert client.breaker(host).state == "closed"
+
+    assert client.get(stub.url + "/flaky").status_code == 503
+    assert client.breaker(host).state == "open"
+
+
+def test_half_open_trial_released_on_unexpected_error(stub):
+    client, _ = make_client(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    host = stub.url.split("//")[1]
+    stub.scripts["/flaky"] = [(503, {}), (200, {})]
+    client.get(stub.url + "/flaky")
+    assert client.breaker(host).state == "half-open"
+
+    original = client.session.request
+
+    def broken(*args, **kwargs):
+        raise ValueError("bukan error requests")
+
+    client.session.request = broken
+    with pytest.raises(ValueError):
+        client.get(stub.url + "/flaky")
+    client.session.request = original
+
+    assert client.get(stub.url + "/flaky").status_code == 200
+    assert client.breaker(host).state == "closed"
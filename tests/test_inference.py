@@ -0,0 +1,37 @@
+"""Kesetaraan output NumpyDNN dengan model Keras asli pada dataset training."""
+import os
+
+import numpy as np
+import pytest
+
+from pollucare.constants import FEATURES_USED_IN_TRAINING
+from pollucare.inference import DEFAULT_H5_PATH, DEFAULT_NPZ_PATH, NumpyDNN, load_from_h5
+
+DATASET_CSV = os.path.join(os.path.dirname(DEFAULT_H5_PATH), "..", "aqi_preprocessing.csv")
+
+# Perbedaan urutan penjumlahan float32 antara BLAS NumPy dan kernel TensorFlow
+ATOL = 1e-5
+
+
+def load_features():
+    pd = pytest.importorskip("pandas")
+    return pd.read_csv(DATASET_CSV, usecols=FEATURES_USED_IN_TRAINING)[FEATURES_USED_IN_TRAINING].to_numpy(
+        dtype=np.float32
+    )
+
+
+def test_numpy_matches_keras():
+    tf = pytest.importorskip("tensorflow")
+    X = load_features()
+    expected = tf.keras.models.load_model(DEFAULT_H5_PATH, compile=False).predict(X, batch_size=4096, verbose=0)
+    actual = NumpyDNN.from_npz(DEFAULT_NPZ_PATH).predict(X)
+    np.testing.assert_allclose(actual, expected, atol=ATOL)
+    np.testing.assert_array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+
+
+def test_npz_matches_h5_weights():
+    pytest.importorskip("h5py")
+    X = load_features()
+    np.testing.assert_allclose(
+        NumpyDNN.from_npz(DEFAULT_NPZ_PATH).predict(X), load_from_h5(DEFAULT_H5_PATH).predict(X), atol=ATOL
+    )